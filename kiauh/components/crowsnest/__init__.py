@@ -7,8 +7,11 @@
 #  This file may be distributed under the terms of the GNU GPLv3 license  #
 # ======================================================================= #
 
+from functools import lru_cache
 from pathlib import Path
+from typing import Any
 
+from core.constants import HOME_DIR
 from utils.sys_utils import InitSystem, get_init_system, get_service_directory
 
 # repo
@@ -16,29 +19,36 @@ CROWSNEST_REPO = "https://github.com/mainsail-crew/crowsnest.git"
 
 # names
 CROWSNEST_BASE_SERVICE_NAME = "crowsnest"
-_INIT_SYSTEM = get_init_system()
-CROWSNEST_SERVICE_NAME = (
-    f"{CROWSNEST_BASE_SERVICE_NAME}.service"
-    if _INIT_SYSTEM == InitSystem.SYSTEMD
-    else CROWSNEST_BASE_SERVICE_NAME
-)
 
 # directories
-CROWSNEST_DIR = Path.home().joinpath("crowsnest")
-CROWSNEST_CONFIG_DIR = Path.home().joinpath("printer_data/config")
-CROWSNEST_LOG_DIR = Path.home().joinpath("printer_data/logs")
-CROWSNEST_ENV_DIR = Path.home().joinpath("printer_data/systemd")
+CROWSNEST_DIR = HOME_DIR.joinpath("crowsnest")
+CROWSNEST_CONFIG_DIR = HOME_DIR.joinpath("printer_data/config")
+CROWSNEST_LOG_DIR = HOME_DIR.joinpath("printer_data/logs")
+CROWSNEST_ENV_DIR = HOME_DIR.joinpath("printer_data/systemd")
 
 # files
 CROWSNEST_MULTI_CONFIG = CROWSNEST_DIR.joinpath("tools/.config")
 CROWSNEST_INSTALL_SCRIPT = CROWSNEST_DIR.joinpath("tools/install.sh")
+CROWSNEST_DEPS_MARKER = CROWSNEST_DIR.joinpath(".kiauh-deps-checked")
 CROWSNEST_BIN_FILE = Path("/usr/local/bin/crowsnest")
 CROWSNEST_LOGROTATE_FILE = Path("/etc/logrotate.d/crowsnest")
 CROWSNEST_CONFIG_FILE = CROWSNEST_CONFIG_DIR.joinpath("crowsnest.conf")
 CROWSNEST_LOG_FILE = CROWSNEST_LOG_DIR.joinpath("crowsnest.log")
 CROWSNEST_ENV_FILE = CROWSNEST_ENV_DIR.joinpath("crowsnest.env")
-CROWSNEST_SERVICE_FILE = get_service_directory().joinpath(
-    CROWSNEST_SERVICE_NAME
-    if _INIT_SYSTEM == InitSystem.SYSTEMD
-    else CROWSNEST_BASE_SERVICE_NAME
-)
+
+
+@lru_cache(maxsize=1)
+def _resolve_service_name() -> str:
+    if get_init_system() == InitSystem.SYSTEMD:
+        return f"{CROWSNEST_BASE_SERVICE_NAME}.service"
+    return CROWSNEST_BASE_SERVICE_NAME
+
+
+def __getattr__(name: str) -> Any:
+    # the service constants depend on the init system, which is only
+    # probed once something actually asks for them
+    if name == "CROWSNEST_SERVICE_NAME":
+        return _resolve_service_name()
+    if name == "CROWSNEST_SERVICE_FILE":
+        return get_service_directory().joinpath(_resolve_service_name())
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
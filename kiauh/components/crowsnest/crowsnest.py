@@ -8,74 +8,94 @@
 # ======================================================================= #
 from __future__ import annotations
 
+import grp
+import hashlib
+import os
+import pwd
+import re
 import shutil
+import tarfile
 import time
 from datetime import datetime
+from functools import lru_cache
+from io import BytesIO
 from pathlib import Path
 from subprocess import DEVNULL, CalledProcessError, run
-from typing import List, Set
+from typing import TYPE_CHECKING, Dict, FrozenSet, List, Pattern, Set, Tuple
 
 from components.crowsnest import (
     CROWSNEST_BASE_SERVICE_NAME,
     CROWSNEST_BIN_FILE,
-    CROWSNEST_DIR,
-    CROWSNEST_INSTALL_SCRIPT,
     CROWSNEST_CONFIG_DIR,
     CROWSNEST_CONFIG_FILE,
+    CROWSNEST_DEPS_MARKER,
+    CROWSNEST_DIR,
     CROWSNEST_ENV_DIR,
     CROWSNEST_ENV_FILE,
-    CROWSNEST_LOGROTATE_FILE,
+    CROWSNEST_INSTALL_SCRIPT,
     CROWSNEST_LOG_DIR,
     CROWSNEST_LOG_FILE,
+    CROWSNEST_LOGROTATE_FILE,
     CROWSNEST_MULTI_CONFIG,
     CROWSNEST_REPO,
-    CROWSNEST_SERVICE_FILE,
-    CROWSNEST_SERVICE_NAME,
+    _resolve_service_name,
 )
-from components.klipper.klipper import Klipper
-from core.constants import CURRENT_USER
+from core.constants import get_current_user
 from core.logger import DialogType, Logger
-from core.services.backup_service import BackupService
-from core.settings.kiauh_settings import KiauhSettings
 from core.types.component_status import ComponentStatus
+from utils.cached_fs import cached_exists, invalidate_exists_cache
 from utils.common import (
     check_install_dependencies,
     get_install_status,
 )
+from utils.fs_utils import write_text_file
 from utils.git_utils import (
     git_clone_wrapper,
     git_pull_wrapper,
 )
 from utils.input_utils import get_confirm
 from utils.instance_utils import get_instances
+from utils.sudo_session import ensure_sudo_session
 from utils.sys_utils import (
     InitSystem,
     PackageManager,
-    cmd_sysctl_service,
     cmd_sysctl_manage,
+    cmd_sysctl_service,
     create_env_file,
     create_service_file,
     get_init_system,
     get_package_manager,
     parse_packages_from_file,
+    parse_packages_from_files,
     remove_system_service,
 )
-from utils.sudo_session import ensure_sudo_session
+
+if TYPE_CHECKING:
+    from components.klipper.klipper import Klipper
+
+_PACKAGE_DATABASES = {
+    PackageManager.APK: Path("/lib/apk/db/installed"),
+    PackageManager.APT: Path("/var/lib/dpkg/status"),
+}
 
 
 def install_crowsnest() -> None:
+    from components.klipper.klipper import Klipper
+
     # Step 1: Clone crowsnest repo
-    git_clone_wrapper(CROWSNEST_REPO, CROWSNEST_DIR, "master")
+    _clone_crowsnest()
 
     init_system = get_init_system()
     package_manager = get_package_manager()
 
     # Step 2: Install dependencies
     dependency_list: Set[str] = {"make"}
+    manifests: List[Path] = []
     pkglist_generic = CROWSNEST_DIR.joinpath("tools/libs/pkglist-generic.sh")
     if pkglist_generic.exists():
         dependency_list.update(parse_packages_from_file(pkglist_generic))
-    check_install_dependencies(dependency_list, include_global=False)
+        manifests.append(pkglist_generic)
+    _check_crowsnest_dependencies(dependency_list, manifests)
 
     # Step 3: Check for Multi Instance
     instances: List[Klipper] = get_instances(Klipper)
@@ -92,22 +112,34 @@ def install_crowsnest() -> None:
         configure_multi_instance()
 
     if package_manager == PackageManager.APK:
-        _install_crowsnest_apk(init_system)
+        try:
+            _install_crowsnest_apk(init_system)
+        finally:
+            invalidate_exists_cache()
         return
 
     # Step 4: Launch crowsnest installer
     Logger.print_status("Launching crowsnest installer ...")
     Logger.print_info("Installer will prompt you for sudo password!")
     try:
-        run(
-            "sudo make install",
-            cwd=CROWSNEST_DIR,
-            shell=True,
-            check=True,
-        )
+        run(["sudo", "make", "install"], cwd=CROWSNEST_DIR, check=True)
     except CalledProcessError as e:
         Logger.print_error(f"Something went wrong! Please try again...\n{e}")
         return
+    finally:
+        invalidate_exists_cache()
+
+
+def _clone_crowsnest() -> None:
+    # only the current master tree is needed to build and install crowsnest
+    git_clone_wrapper(
+        CROWSNEST_REPO,
+        CROWSNEST_DIR,
+        "master",
+        depth=1,
+        single_branch=True,
+    )
+    invalidate_exists_cache(CROWSNEST_DIR)
 
 
 def print_multi_instance_warning(instances: List[Klipper]) -> None:
@@ -128,12 +160,7 @@ def print_multi_instance_warning(instances: List[Klipper]) -> None:
 
 def configure_multi_instance() -> None:
     try:
-        run(
-            "make config",
-            cwd=CROWSNEST_DIR,
-            shell=True,
-            check=True,
-        )
+        run(["make", "config"], cwd=CROWSNEST_DIR, check=True)
     except CalledProcessError as e:
         Logger.print_error(f"Something went wrong! Please try again...\n{e}")
         if CROWSNEST_MULTI_CONFIG.exists():
@@ -146,18 +173,17 @@ def configure_multi_instance() -> None:
 
 def update_crowsnest() -> None:
     try:
-        service_name = (
-            CROWSNEST_SERVICE_NAME
-            if get_init_system() == InitSystem.SYSTEMD
-            else CROWSNEST_BASE_SERVICE_NAME
-        )
+        service_name = _resolve_service_name()
         cmd_sysctl_service(service_name, "stop")
 
         if not CROWSNEST_DIR.exists():
-            git_clone_wrapper(CROWSNEST_REPO, CROWSNEST_DIR, "master")
+            _clone_crowsnest()
         else:
             Logger.print_status("Updating Crowsnest ...")
 
+            from core.services.backup_service import BackupService
+            from core.settings.kiauh_settings import KiauhSettings
+
             settings = KiauhSettings()
             if settings.kiauh.backup_before_update:
                 svc = BackupService()
@@ -167,13 +193,14 @@ def update_crowsnest() -> None:
                     backup_name="crowsnest",
                 )
 
-            git_pull_wrapper(CROWSNEST_DIR)
+            git_pull_wrapper(CROWSNEST_DIR, shallow=True)
 
-            deps = set(parse_packages_from_file(CROWSNEST_INSTALL_SCRIPT))
+            sources = [CROWSNEST_INSTALL_SCRIPT]
             pkglist_generic = CROWSNEST_DIR.joinpath("tools/libs/pkglist-generic.sh")
             if pkglist_generic.exists():
-                deps.update(parse_packages_from_file(pkglist_generic))
-            check_install_dependencies(deps, include_global=False)
+                sources.append(pkglist_generic)
+            deps = set(parse_packages_from_files(sources))
+            _check_crowsnest_dependencies(deps, sources)
 
             Logger.print_status("Rebuilding Crowsnest backends ...")
             run(
@@ -190,7 +217,40 @@ def update_crowsnest() -> None:
         return
 
 
+def _dependency_fingerprint(deps: Set[str], manifests: List[Path]) -> str | None:
+    database = _PACKAGE_DATABASES.get(get_package_manager())
+    if database is None or not database.exists():
+        return None
+
+    # any package transaction touches the database, so a matching
+    # fingerprint means nothing was (un)installed since the last check
+    digest = hashlib.sha256("\n".join(sorted(deps)).encode())
+    for path in (*manifests, database):
+        digest.update(f"{path}:{path.stat().st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def _check_crowsnest_dependencies(deps: Set[str], manifests: List[Path]) -> None:
+    fingerprint = _dependency_fingerprint(deps, manifests)
+    if fingerprint is not None and CROWSNEST_DEPS_MARKER.exists():
+        if CROWSNEST_DEPS_MARKER.read_text().strip() == fingerprint:
+            Logger.print_info("Crowsnest dependencies unchanged. Skipping check ...")
+            return
+
+    check_install_dependencies(deps, include_global=False)
+
+    fingerprint = _dependency_fingerprint(deps, manifests)
+    if fingerprint is None:
+        return
+    try:
+        CROWSNEST_DEPS_MARKER.write_text(fingerprint)
+    except OSError:
+        pass
+
+
 def get_crowsnest_status() -> ComponentStatus:
+    from components.crowsnest import CROWSNEST_SERVICE_FILE
+
     files = [
         CROWSNEST_BIN_FILE,
         CROWSNEST_LOGROTATE_FILE,
@@ -200,96 +260,123 @@ def get_crowsnest_status() -> ComponentStatus:
 
 
 def remove_crowsnest() -> None:
-    if not CROWSNEST_DIR.exists():
+    if not cached_exists(CROWSNEST_DIR):
         Logger.print_info("Crowsnest does not seem to be installed! Skipping ...")
         return
 
     package_manager = get_package_manager()
     init_system = get_init_system()
 
-    if package_manager == PackageManager.APK:
-        _remove_crowsnest_apk(init_system)
-    else:
+    try:
+        if package_manager == PackageManager.APK:
+            _remove_crowsnest_apk(init_system)
+            return
+
         try:
-            run(
-                "make uninstall",
-                cwd=CROWSNEST_DIR,
-                shell=True,
-                check=True,
-            )
+            run(["make", "uninstall"], cwd=CROWSNEST_DIR, check=True)
         except CalledProcessError as e:
             Logger.print_error(f"Something went wrong! Please try again...\n{e}")
             return
 
         Logger.print_status("Removing crowsnest directory ...")
-        shutil.rmtree(CROWSNEST_DIR)
+        run(["rm", "-rf", CROWSNEST_DIR.as_posix()], check=True)
         Logger.print_ok("Directory removed!")
+    finally:
+        invalidate_exists_cache()
 
 
-def _render_template(template: Path, replacements: dict[str, str]) -> str:
-    content = template.read_text()
-    for key, value in replacements.items():
-        content = content.replace(key, value)
-    return content
+@lru_cache(maxsize=None)
+def _placeholder_pattern(placeholders: FrozenSet[str]) -> Pattern[str]:
+    # longest first, so a placeholder can never shadow a longer one
+    ordered = sorted(placeholders, key=len, reverse=True)
+    return re.compile("|".join(map(re.escape, ordered)))
 
 
-def _write_root_file(target: Path, content: str) -> None:
-    ensure_sudo_session()
+@lru_cache(maxsize=32)
+def _read_template_cached(template: str, mtime_ns: int) -> str:
+    # the mtime is part of the cache key, so edited templates are re-read
+    return Path(template).read_text()
+
+
+def _read_template(template: Path) -> str:
+    return _read_template_cached(template.as_posix(), template.stat().st_mtime_ns)
+
+
+def _render_template(template: Path, replacements: Dict[str, str]) -> str:
+    pattern = _placeholder_pattern(frozenset(replacements))
+    return pattern.sub(lambda m: replacements[m.group(0)], _read_template(template))
+
+
+def _write_root_files(files: Dict[Path, Tuple[bytes, int]]) -> None:
+    # pack all root-owned files into one tar stream, so a single privileged
+    # tar invocation drops them into place with the right owner and mode
+    if shutil.which("tar") is None:
+        for target, (content, mode) in files.items():
+            run(["sudo", "tee", target], input=content, stdout=DEVNULL, check=True)
+            run(["sudo", "chmod", f"{mode:o}", target], check=True)
+        return
+
+    buffer = BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as archive:
+        for target, (content, mode) in files.items():
+            info = tarfile.TarInfo(target.as_posix().lstrip("/"))
+            info.size = len(content)
+            info.mode = mode
+            info.mtime = int(time.time())
+            info.uid = info.gid = 0
+            info.uname = info.gname = "root"
+            archive.addfile(info, BytesIO(content))
+
     run(
-        ["sudo", "tee", target],
-        input=content.encode(),
+        ["sudo", "tar", "-x", "-f", "-", "-C", "/"],
+        input=buffer.getvalue(),
         stdout=DEVNULL,
         check=True,
     )
 
 
 def _ensure_directories(paths: List[Path]) -> None:
-    for directory in paths:
-        directory.mkdir(parents=True, exist_ok=True)
+    # the targets are siblings below printer_data, so only the first one
+    # has to walk up the tree, the others can mkdir right away
+    ensured: Set[Path] = set()
+    for directory in sorted(set(paths), key=lambda p: len(p.parts)):
+        if directory.parent in ensured:
+            directory.mkdir(exist_ok=True)
+        else:
+            directory.mkdir(parents=True, exist_ok=True)
+            ensured.update(directory.parents)
+        ensured.add(directory)
 
 
 def _install_crowsnest_apk(init_system: InitSystem) -> None:
+    current_user = get_current_user()
+
     Logger.print_status("Installing Crowsnest using apk workflow ...")
+    # prime the session once, its refresher keeps it alive for all later steps
+    ensure_sudo_session()
     _ensure_directories([CROWSNEST_CONFIG_DIR, CROWSNEST_LOG_DIR, CROWSNEST_ENV_DIR])
 
     Logger.print_status("Deploying crowsnest executable ...")
-    ensure_sudo_session()
-    run(
-        ["sudo", "install", "-m", "755", CROWSNEST_DIR.joinpath("crowsnest"), CROWSNEST_BIN_FILE],
-        check=True,
-    )
-    Logger.print_ok("Executable installed.")
-
     logrotate_template = CROWSNEST_DIR.joinpath("resources/logrotate_crowsnest")
+    logrotate_content = None
     if logrotate_template.exists():
-        Logger.print_status("Installing logrotate rule ...")
         logrotate_content = _render_template(
             logrotate_template,
             {"%LOGPATH%": str(CROWSNEST_LOG_FILE)},
         )
-        _write_root_file(CROWSNEST_LOGROTATE_FILE, logrotate_content)
+    root_files = {
+        CROWSNEST_BIN_FILE: (CROWSNEST_DIR.joinpath("crowsnest").read_bytes(), 0o755),
+    }
+    if logrotate_content is not None:
+        root_files[CROWSNEST_LOGROTATE_FILE] = (logrotate_content.encode(), 0o644)
+    _write_root_files(root_files)
+    Logger.print_ok("Executable installed.")
+    if logrotate_content is not None:
         Logger.print_ok("Logrotate rule installed.")
 
-    Logger.print_status("Writing environment configuration ...")
-    env_template = CROWSNEST_DIR.joinpath("resources/crowsnest.env")
-    env_content = _render_template(env_template, {"%CONFPATH%": str(CROWSNEST_CONFIG_DIR)})
-    create_env_file(CROWSNEST_ENV_FILE, env_content)
-
-    Logger.print_status("Writing crowsnest configuration ...")
-    config_template = CROWSNEST_DIR.joinpath("resources/crowsnest.conf")
-    if CROWSNEST_CONFIG_FILE.exists():
-        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-        backup = CROWSNEST_CONFIG_FILE.with_suffix(f"{CROWSNEST_CONFIG_FILE.suffix}.{timestamp}")
-        shutil.move(CROWSNEST_CONFIG_FILE, backup)
-        Logger.print_info(f"Existing configuration backed up as {backup}")
-    config_content = _render_template(
-        config_template,
-        {"%LOGPATH%": str(CROWSNEST_LOG_FILE)},
-    )
-    CROWSNEST_CONFIG_FILE.write_text(config_content)
-
-    Logger.print_status("Building streaming backends ...")
-    run(["bash", "bin/build.sh", "--build"], cwd=CROWSNEST_DIR, check=True)
+    _write_crowsnest_env()
+    _write_crowsnest_config()
+    _build_streaming_backends()
 
     _ensure_video_group_membership()
 
@@ -299,7 +386,7 @@ def _install_crowsnest_apk(init_system: InitSystem) -> None:
         service_content = _render_template(
             service_template,
             {
-                "%USER%": CURRENT_USER,
+                "%USER%": current_user,
                 "%ENV%": str(CROWSNEST_ENV_FILE),
             },
         )
@@ -311,22 +398,48 @@ def _install_crowsnest_apk(init_system: InitSystem) -> None:
         )
 
     cmd_sysctl_manage("daemon-reload")
-    service_name = (
-        CROWSNEST_SERVICE_NAME
-        if init_system == InitSystem.SYSTEMD
-        else CROWSNEST_BASE_SERVICE_NAME
-    )
+    service_name = _resolve_service_name()
     cmd_sysctl_service(service_name, "enable")
     cmd_sysctl_service(service_name, "start")
     Logger.print_ok("Crowsnest installation complete.")
 
 
+def _write_crowsnest_env() -> None:
+    Logger.print_status("Writing environment configuration ...")
+    env_template = CROWSNEST_DIR.joinpath("resources/crowsnest.env")
+    env_content = _render_template(env_template, {"%CONFPATH%": str(CROWSNEST_CONFIG_DIR)})
+    create_env_file(CROWSNEST_ENV_FILE, env_content)
+
+
+def _write_crowsnest_config() -> None:
+    Logger.print_status("Writing crowsnest configuration ...")
+    config_template = CROWSNEST_DIR.joinpath("resources/crowsnest.conf")
+    if CROWSNEST_CONFIG_FILE.exists():
+        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        backup = CROWSNEST_CONFIG_FILE.with_suffix(f"{CROWSNEST_CONFIG_FILE.suffix}.{timestamp}")
+        # the backup sits next to the original, a rename is always enough
+        os.replace(CROWSNEST_CONFIG_FILE, backup)
+        Logger.print_info(f"Existing configuration backed up as {backup}")
+    config_content = _render_template(
+        config_template,
+        {"%LOGPATH%": str(CROWSNEST_LOG_FILE)},
+    )
+    write_text_file(CROWSNEST_CONFIG_FILE, config_content)
+
+
+def _build_streaming_backends() -> None:
+    Logger.print_status("Building streaming backends ...")
+    run(["bash", "bin/build.sh", "--build"], cwd=CROWSNEST_DIR, check=True)
+
+
 def _render_openrc_service() -> str:
+    current_user = get_current_user()
+
     return f"""#!/sbin/openrc-run
 
 description=\"crowsnest webcam service\"
 command=\"/usr/local/bin/crowsnest\"
-command_user=\"{CURRENT_USER}\"
+command_user=\"{current_user}\"
 command_background=\"yes\"
 supervisor=supervise-daemon
 pidfile=\"/run/$RC_SVCNAME.pid\"
@@ -358,22 +471,17 @@ stop_pre() {{
 
 
 def _ensure_video_group_membership() -> None:
+    current_user = get_current_user()
+
     try:
-        group_check = run(
-            ["id", "-nG", CURRENT_USER],
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-        groups = group_check.stdout.split()
-        if "video" not in groups:
-            Logger.print_status(f"Adding user '{CURRENT_USER}' to group 'video' ...")
-            ensure_sudo_session()
-            run(["sudo", "usermod", "-a", "-G", "video", CURRENT_USER], check=True)
+        gids = os.getgrouplist(current_user, pwd.getpwnam(current_user).pw_gid)
+        if grp.getgrnam("video").gr_gid not in gids:
+            Logger.print_status(f"Adding user '{current_user}' to group 'video' ...")
+            run(["sudo", "usermod", "-a", "-G", "video", current_user], check=True)
             Logger.print_ok("User added to group 'video'.")
         else:
-            Logger.print_info(f"User '{CURRENT_USER}' already in group 'video'.")
-    except (CalledProcessError, FileNotFoundError) as error:
+            Logger.print_info(f"User '{current_user}' already in group 'video'.")
+    except (CalledProcessError, FileNotFoundError, KeyError) as error:
         message = (
             f"Unable to ensure video group membership automatically: {error}".replace(
                 "\n", " "
@@ -383,27 +491,26 @@ def _ensure_video_group_membership() -> None:
 
 
 def _remove_crowsnest_apk(init_system: InitSystem) -> None:
-    service_name = (
-        CROWSNEST_SERVICE_NAME
-        if init_system == InitSystem.SYSTEMD
-        else CROWSNEST_BASE_SERVICE_NAME
-    )
+    ensure_sudo_session()
+    service_name = _resolve_service_name()
 
     try:
         remove_system_service(service_name)
     except Exception as error:
         Logger.print_warn(f"Failed to remove service cleanly: {error}")
 
-    for path in (CROWSNEST_BIN_FILE, CROWSNEST_LOGROTATE_FILE):
-        if path.exists():
-            Logger.print_status(f"Removing {path} ...")
-            ensure_sudo_session()
-            run(["sudo", "rm", "-f", path], check=True)
-
     if CROWSNEST_ENV_FILE.exists():
         Logger.print_status("Removing environment file ...")
         CROWSNEST_ENV_FILE.unlink()
 
+    # the root-owned files and the checkout go away in one privileged call
+    targets = [
+        path.as_posix()
+        for path in (CROWSNEST_BIN_FILE, CROWSNEST_LOGROTATE_FILE)
+        if cached_exists(path)
+    ]
+    for target in targets:
+        Logger.print_status(f"Removing {target} ...")
     Logger.print_status("Removing crowsnest directory ...")
-    shutil.rmtree(CROWSNEST_DIR)
+    run(["sudo", "rm", "-rf", *targets, CROWSNEST_DIR.as_posix()], check=True)
     Logger.print_ok("Directory removed!")
@@ -8,7 +8,9 @@
 # ======================================================================= #
 
 from pathlib import Path
+from typing import Any
 
+from core.constants import HOME_DIR
 from utils.sys_utils import InitSystem, get_init_system
 
 MODULE_PATH = Path(__file__).resolve().parent
@@ -24,19 +26,24 @@ KLIPPER_ENV_FILE_NAME = "klipper.env"
 KLIPPER_SERVICE_NAME = "klipper.service"
 
 # directories
-KLIPPER_DIR = Path.home().joinpath("klipper")
-KLIPPER_KCONFIGS_DIR = Path.home().joinpath("klipper-kconfigs")
-KLIPPER_ENV_DIR = Path.home().joinpath("klippy-env")
+KLIPPER_DIR = HOME_DIR.joinpath("klipper")
+KLIPPER_KCONFIGS_DIR = HOME_DIR.joinpath("klipper-kconfigs")
+KLIPPER_ENV_DIR = HOME_DIR.joinpath("klippy-env")
 
 # files
 KLIPPER_REQ_FILE = KLIPPER_DIR.joinpath("scripts/klippy-requirements.txt")
 KLIPPER_INSTALL_SCRIPT = KLIPPER_DIR.joinpath("scripts/install-ubuntu-22.04.sh")
-_INIT_SYSTEM = get_init_system()
-if _INIT_SYSTEM == InitSystem.OPENRC:
-    KLIPPER_SERVICE_TEMPLATE = MODULE_PATH.joinpath("assets/klipper.openrc")
-else:
-    KLIPPER_SERVICE_TEMPLATE = MODULE_PATH.joinpath(f"assets/{KLIPPER_SERVICE_NAME}")
 KLIPPER_ENV_FILE_TEMPLATE = MODULE_PATH.joinpath(f"assets/{KLIPPER_ENV_FILE_NAME}")
 
 
 EXIT_KLIPPER_SETUP = "Exiting Klipper setup ..."
+
+
+def __getattr__(name: str) -> Any:
+    # the service template depends on the init system, which is only
+    # probed once something actually asks for it
+    if name == "KLIPPER_SERVICE_TEMPLATE":
+        if get_init_system() == InitSystem.OPENRC:
+            return MODULE_PATH.joinpath("assets/klipper.openrc")
+        return MODULE_PATH.joinpath(f"assets/{KLIPPER_SERVICE_NAME}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -20,10 +20,9 @@ from components.klipper import (
     KLIPPER_ENV_FILE_TEMPLATE,
     KLIPPER_LOG_NAME,
     KLIPPER_SERIAL_NAME,
-    KLIPPER_SERVICE_TEMPLATE,
     KLIPPER_UDS_NAME,
 )
-from core.constants import CURRENT_USER
+from core.constants import get_current_user
 from core.instance_manager.base_instance import BaseInstance
 from core.logger import Logger
 from utils.fs_utils import create_folders, get_data_dir
@@ -82,6 +81,10 @@ class Klipper:
             raise
 
     def _prep_service_file_content(self) -> str:
+        from components.klipper import KLIPPER_SERVICE_TEMPLATE
+
+        current_user = get_current_user()
+
         template = KLIPPER_SERVICE_TEMPLATE
 
         try:
@@ -93,7 +96,7 @@ class Klipper:
 
         service_content = template_content.replace(
             "%USER%",
-            CURRENT_USER,
+            current_user,
         )
         service_content = service_content.replace(
             "%KLIPPER_DIR%",
@@ -30,7 +30,7 @@ from components.webui_client.base_data import BaseWebClient
 from components.webui_client.client_config.client_config_setup import (
     create_client_config_symlink,
 )
-from core.constants import CURRENT_USER
+from core.constants import get_current_user
 from core.instance_manager.base_instance import SUFFIX_BLACKLIST
 from core.logger import DialogType, Logger
 from core.services.backup_service import BackupService
@@ -92,6 +92,8 @@ def assign_custom_name(key: int, name_dict: Dict[int, str]) -> None:
 
 
 def check_user_groups() -> None:
+    current_user = get_current_user()
+
     user_groups = [grp.getgrgid(gid).gr_name for gid in os.getgroups()]
     missing_groups = [g for g in ["tty", "dialout"] if g not in user_groups]
 
@@ -114,7 +116,7 @@ def check_user_groups() -> None:
         ],
     )
 
-    if not get_confirm(f"Add user '{CURRENT_USER}' to group(s) now?"):
+    if not get_confirm(f"Add user '{current_user}' to group(s) now?"):
         log = "Skipped adding user to required groups. You might encounter issues."
         Logger.print_warn(log)
         return
@@ -122,10 +124,10 @@ def check_user_groups() -> None:
     try:
         ensure_sudo_session()
         for group in missing_groups:
-            Logger.print_status(f"Adding user '{CURRENT_USER}' to group {group} ...")
-            command = ["sudo", "usermod", "-a", "-G", group, CURRENT_USER]
+            Logger.print_status(f"Adding user '{current_user}' to group {group} ...")
+            command = ["sudo", "usermod", "-a", "-G", group, current_user]
             run(command, check=True)
-            Logger.print_ok(f"Group {group} assigned to user '{CURRENT_USER}'.")
+            Logger.print_ok(f"Group {group} assigned to user '{current_user}'.")
     except CalledProcessError as e:
         Logger.print_error(f"Unable to add user to usergroups: {e}")
         raise
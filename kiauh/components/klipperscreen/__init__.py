@@ -6,7 +6,9 @@
 #                                                                         #
 #  This file may be distributed under the terms of the GNU GPLv3 license  #
 # ======================================================================= #
+from functools import lru_cache
 from pathlib import Path
+from typing import Any
 
 from utils.sys_utils import InitSystem, detect_init_system, get_service_directory
 
@@ -14,14 +16,6 @@ from utils.sys_utils import InitSystem, detect_init_system, get_service_director
 KLIPPERSCREEN_REPO = "https://github.com/KlipperScreen/KlipperScreen.git"
 
 # names
-def _resolve_service_name() -> str:
-    init_system = detect_init_system()
-    if init_system == InitSystem.OPENRC:
-        return "KlipperScreen"
-    return "KlipperScreen.service"
-
-
-KLIPPERSCREEN_SERVICE_NAME = _resolve_service_name()
 KLIPPERSCREEN_UPDATER_SECTION_NAME = "update_manager KlipperScreen"
 KLIPPERSCREEN_LOG_NAME = "KlipperScreen.log"
 
@@ -39,4 +33,25 @@ KLIPPERSCREEN_INSTALL_SCRIPT = KLIPPERSCREEN_DIR.joinpath(
 KLIPPERSCREEN_INSTALL_SCRIPT_ASSET = Path(__file__).parent.joinpath(
     "assets/KlipperScreen-install.sh"
 )
-KLIPPERSCREEN_SERVICE_FILE = get_service_directory().joinpath(KLIPPERSCREEN_SERVICE_NAME)
+KLIPPERSCREEN_START_SCRIPT = KLIPPERSCREEN_DIR.joinpath(
+    "scripts/KlipperScreen-start.sh"
+)
+KLIPPERSCREEN_START_PATCH_MARKER = KLIPPERSCREEN_DIR.joinpath(".kiauh-start-patched")
+
+
+@lru_cache(maxsize=1)
+def _resolve_service_name() -> str:
+    init_system = detect_init_system()
+    if init_system == InitSystem.OPENRC:
+        return "KlipperScreen"
+    return "KlipperScreen.service"
+
+
+def __getattr__(name: str) -> Any:
+    # the service constants depend on the init system, which is only
+    # probed once something actually asks for them
+    if name == "KLIPPERSCREEN_SERVICE_NAME":
+        return _resolve_service_name()
+    if name == "KLIPPERSCREEN_SERVICE_FILE":
+        return get_service_directory().joinpath(_resolve_service_name())
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
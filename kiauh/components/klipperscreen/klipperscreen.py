@@ -6,18 +6,20 @@
 #                                                                         #
 #  This file may be distributed under the terms of the GNU GPLv3 license  #
 # ======================================================================= #
+from __future__ import annotations
+
 import os
 import re
 import shlex
 import shutil
 from dataclasses import dataclass
 from enum import Enum, auto
+from functools import lru_cache
 from pathlib import Path
-from subprocess import CalledProcessError, run
+from subprocess import DEVNULL, PIPE, CalledProcessError, Popen, run
 from textwrap import dedent
-from typing import Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
 
-from components.klipper.klipper import Klipper
 from components.klipperscreen import (
     KLIPPERSCREEN_DIR,
     KLIPPERSCREEN_ENV_DIR,
@@ -26,22 +28,18 @@ from components.klipperscreen import (
     KLIPPERSCREEN_LOG_NAME,
     KLIPPERSCREEN_REPO,
     KLIPPERSCREEN_REQ_FILE,
-    KLIPPERSCREEN_SERVICE_FILE,
-    KLIPPERSCREEN_SERVICE_NAME,
+    KLIPPERSCREEN_START_PATCH_MARKER,
+    KLIPPERSCREEN_START_SCRIPT,
     KLIPPERSCREEN_UPDATER_SECTION_NAME,
 )
-from components.moonraker.moonraker import Moonraker
-from core.instance_manager.instance_manager import InstanceManager
+from core.constants import HOME_DIR
 from core.logger import DialogType, Logger
-from core.services.backup_service import BackupService
-from core.settings.kiauh_settings import KiauhSettings
 from core.types.component_status import ComponentStatus
 from utils.common import (
     check_install_dependencies,
     get_install_status,
 )
-from utils.config_utils import add_config_section, remove_config_section
-from utils.fs_utils import remove_with_sudo
+from utils.fs_utils import remove_with_sudo, replace_text_file, write_text_file
 from utils.git_utils import (
     git_clone_wrapper,
     git_pull_wrapper,
@@ -52,7 +50,6 @@ from utils.input_utils import (
     get_selection_input,
     get_string_input,
 )
-from utils.instance_utils import get_instances
 from utils.sys_utils import (
     InitSystem,
     PackageManager,
@@ -65,11 +62,15 @@ from utils.sys_utils import (
     remove_system_service,
 )
 
+if TYPE_CHECKING:
+    from components.moonraker.moonraker import Moonraker
+
 
 @dataclass(frozen=True)
 class WaylandPreset:
     key: str
     name: str
+    slug: str
     desktop: str
     description: str
     env: Dict[str, str]
@@ -136,7 +137,7 @@ def _activate_autostart_backend(result: AutostartResult) -> None:
         runlevels_dir = result.backend_path.parent.parent.joinpath("runlevels")
         default_runlevel = runlevels_dir.joinpath("default")
         try:
-            default_runlevel.mkdir(parents=True, exist_ok=True)
+            _ensure_dir(default_runlevel)
         except OSError as err:
             Logger.print_warn(
                 "Unable to prepare ~/.config/openrc/runlevels/default; KlipperScreen will not autostart until you link the service manually.",
@@ -176,94 +177,119 @@ class DisplayInfo:
     rotation: Optional[int] = None
 
 
-WAYLAND_PRESETS: Dict[str, WaylandPreset] = {
-    "1": WaylandPreset(
-        key="1",
-        name="Phosh",
-        desktop="Phosh",
-        description=(
-            "Optimised for GNOME/Phosh shells where GTK, Qt and SDL apps need explicit "
-            "Wayland configuration and where fractional scaling is handled by the shell."
+@lru_cache(maxsize=1)
+def _wayland_presets() -> Dict[str, WaylandPreset]:
+    return {
+        "1": WaylandPreset(
+            key="1",
+            name="Phosh",
+            slug="phosh",
+            desktop="Phosh",
+            description=(
+                "Optimised for GNOME/Phosh shells where GTK, Qt and SDL apps need explicit "
+                "Wayland configuration and where fractional scaling is handled by the shell."
+            ),
+            env={
+                "XDG_SESSION_TYPE": "wayland",
+                "WAYLAND_DISPLAY": "wayland-0",
+                "QT_QPA_PLATFORM": "wayland",
+                "QT_WAYLAND_DISABLE_WINDOWDECORATION": "1",
+                "GDK_BACKEND": "wayland",
+                "SDL_VIDEODRIVER": "wayland",
+                "MOZ_ENABLE_WAYLAND": "1",
+                "CLUTTER_BACKEND": "wayland",
+                "WLR_NO_HARDWARE_CURSORS": "1",
+            },
+            notes=[
+                "Makes KlipperScreen follow Phosh's compositor scaling.",
+                "Disables Qt's client-side decorations to avoid double title bars.",
+            ],
         ),
-        env={
-            "XDG_SESSION_TYPE": "wayland",
-            "WAYLAND_DISPLAY": "wayland-0",
-            "QT_QPA_PLATFORM": "wayland",
-            "QT_WAYLAND_DISABLE_WINDOWDECORATION": "1",
-            "GDK_BACKEND": "wayland",
-            "SDL_VIDEODRIVER": "wayland",
-            "MOZ_ENABLE_WAYLAND": "1",
-            "CLUTTER_BACKEND": "wayland",
-            "WLR_NO_HARDWARE_CURSORS": "1",
-        },
-        notes=[
-            "Makes KlipperScreen follow Phosh's compositor scaling.",
-            "Disables Qt's client-side decorations to avoid double title bars.",
-        ],
-    ),
-    "2": WaylandPreset(
-        key="2",
-        name="Plasma Mobile",
-        desktop="Plasma Mobile",
-        description=(
-            "Targets Plasma Mobile sessions that ship the KDE Wayland compositor and "
-            "QtQuick stack. Applies KDE-specific hints alongside generic Wayland flags."
+        "2": WaylandPreset(
+            key="2",
+            name="Plasma Mobile",
+            slug="plasma-mobile",
+            desktop="Plasma Mobile",
+            description=(
+                "Targets Plasma Mobile sessions that ship the KDE Wayland compositor and "
+                "QtQuick stack. Applies KDE-specific hints alongside generic Wayland flags."
+            ),
+            env={
+                "XDG_SESSION_TYPE": "wayland",
+                "QT_QPA_PLATFORM": "wayland",
+                "QT_WAYLAND_DISABLE_WINDOWDECORATION": "1",
+                "GDK_BACKEND": "wayland",
+                "SDL_VIDEODRIVER": "wayland",
+                "MOZ_ENABLE_WAYLAND": "1",
+                "QT_QUICK_CONTROLS_STYLE": "Plasma",
+                "QT_QPA_PLATFORMTHEME": "kde",
+                "KWIN_DRM_USE_MODIFIERS": "1",
+                "XCURSOR_SIZE": "24",
+            },
+            notes=[
+                "Uses KDE's platform theme so widgets inherit Plasma styling.",
+                "Keeps cursor size predictable when Plasma's scaling kicks in.",
+            ],
         ),
-        env={
-            "XDG_SESSION_TYPE": "wayland",
-            "QT_QPA_PLATFORM": "wayland",
-            "QT_WAYLAND_DISABLE_WINDOWDECORATION": "1",
-            "GDK_BACKEND": "wayland",
-            "SDL_VIDEODRIVER": "wayland",
-            "MOZ_ENABLE_WAYLAND": "1",
-            "QT_QUICK_CONTROLS_STYLE": "Plasma",
-            "QT_QPA_PLATFORMTHEME": "kde",
-            "KWIN_DRM_USE_MODIFIERS": "1",
-            "XCURSOR_SIZE": "24",
-        },
-        notes=[
-            "Uses KDE's platform theme so widgets inherit Plasma styling.",
-            "Keeps cursor size predictable when Plasma's scaling kicks in.",
-        ],
-    ),
-    "3": WaylandPreset(
-        key="3",
-        name="Sxmo",
-        desktop="Sxmo",
-        description=(
-            "Targets Sxmo's wlroots session defaults so KlipperScreen launches under its "
-            "dwl/sway based environments on Qualcomm handsets. Applies the wlroots "
-            "compatibility flags typically exported by sxmo-utils."
+        "3": WaylandPreset(
+            key="3",
+            name="Sxmo",
+            slug="sxmo",
+            desktop="Sxmo",
+            description=(
+                "Targets Sxmo's wlroots session defaults so KlipperScreen launches under its "
+                "dwl/sway based environments on Qualcomm handsets. Applies the wlroots "
+                "compatibility flags typically exported by sxmo-utils."
+            ),
+            env={
+                "XDG_SESSION_TYPE": "wayland",
+                "XDG_CURRENT_DESKTOP": "sxmo",
+                "XDG_SESSION_DESKTOP": "sxmo",
+                "WAYLAND_DISPLAY": "wayland-0",
+                "QT_QPA_PLATFORM": "wayland-egl",
+                "QT_WAYLAND_DISABLE_WINDOWDECORATION": "1",
+                "GDK_BACKEND": "wayland,x11",
+                "SDL_VIDEODRIVER": "wayland",
+                "MOZ_ENABLE_WAYLAND": "1",
+                "CLUTTER_BACKEND": "wayland",
+                "WLR_RENDERER_ALLOW_SOFTWARE": "1",
+                "WLR_NO_HARDWARE_CURSORS": "1",
+                "XCURSOR_SIZE": "32",
+            },
+            notes=[
+                "Mirrors the environment exported by sxmo-utils so wlroots-based shells on "
+                "qcom-msm8953 devices can spawn KlipperScreen without extra wrappers.",
+                "For systems with working GPU drivers you can drop WLR_RENDERER_ALLOW_SOFTWARE "
+                "after verifying hardware acceleration.",
+            ],
         ),
-        env={
-            "XDG_SESSION_TYPE": "wayland",
-            "XDG_CURRENT_DESKTOP": "sxmo",
-            "XDG_SESSION_DESKTOP": "sxmo",
-            "WAYLAND_DISPLAY": "wayland-0",
-            "QT_QPA_PLATFORM": "wayland-egl",
-            "QT_WAYLAND_DISABLE_WINDOWDECORATION": "1",
-            "GDK_BACKEND": "wayland,x11",
-            "SDL_VIDEODRIVER": "wayland",
-            "MOZ_ENABLE_WAYLAND": "1",
-            "CLUTTER_BACKEND": "wayland",
-            "WLR_RENDERER_ALLOW_SOFTWARE": "1",
-            "WLR_NO_HARDWARE_CURSORS": "1",
-            "XCURSOR_SIZE": "32",
-        },
-        notes=[
-            "Mirrors the environment exported by sxmo-utils so wlroots-based shells on "
-            "qcom-msm8953 devices can spawn KlipperScreen without extra wrappers.",
-            "For systems with working GPU drivers you can drop WLR_RENDERER_ALLOW_SOFTWARE "
-            "after verifying hardware acceleration.",
-        ],
-    ),
-}
+    }
+
 
 WAYLAND_PRESET_SKIP_KEY = "0"
-KLIPPERSCREEN_CONFIG_PATH = Path.home().joinpath("printer_data/config/KlipperScreen.conf")
+KLIPPERSCREEN_CONFIG_PATH = HOME_DIR.joinpath("printer_data/config/KlipperScreen.conf")
 BACKEND_TRACK_FILENAME = ".kiauh-backend-choice"
-PANORAMA_SCRIPT_PATH = Path.home().joinpath(".config/klipperscreen/panorama-xrandr.sh")
-AUTOROTATE_SCRIPT_PATH = Path.home().joinpath(".config/klipperscreen/autorotate.sh")
+PANORAMA_SCRIPT_PATH = HOME_DIR.joinpath(".config/klipperscreen/panorama-xrandr.sh")
+AUTOROTATE_SCRIPT_PATH = HOME_DIR.joinpath(".config/klipperscreen/autorotate.sh")
+
+_LOCAL_BIN_DIR = HOME_DIR.joinpath(".local/bin")
+_LOCAL_APPS_DIR = HOME_DIR.joinpath(".local/share/applications")
+_SYSTEMD_USER_DIR = HOME_DIR.joinpath(".config/systemd/user")
+_OPENRC_INIT_DIR = HOME_DIR.joinpath(".config/openrc/init.d")
+_AUTOSTART_DIR = HOME_DIR.joinpath(".config/autostart")
+_PROFILE_D_DIR = HOME_DIR.joinpath(".config/profile.d")
+_PROFILE_PATH = HOME_DIR.joinpath(".profile")
+
+_ENSURED_DIRS: Set[Path] = set()
+
+
+def _ensure_dir(path: Path) -> None:
+    """Create a directory once per session, later calls for it are no-ops."""
+
+    if path in _ENSURED_DIRS:
+        return
+    path.mkdir(parents=True, exist_ok=True)
+    _ENSURED_DIRS.add(path)
 
 
 def _sync_installer_script_with_asset() -> None:
@@ -292,21 +318,79 @@ _START_SCRIPT_SENTINEL = "# KIAUH fallback: ensure default client selection"
 _PANORAMA_SCRIPT_SENTINEL = "# KIAUH panorama orientation hook"
 _AUTOROTATE_SCRIPT_SENTINEL = "# KIAUH auto-rotation hook"
 
+_FALLBACK_BLOCK = dedent(
+    """
+# KIAUH fallback: ensure default client selection
+KS_BASEDIR="${SCRIPTPATH%/scripts}"
+if [ -z "${KS_DIR:-}" ]; then
+    KS_DIR="$KS_BASEDIR"
+fi
+if [ -z "${KS_ENV:-}" ]; then
+    KS_ENV="${HOME}/.KlipperScreen-env"
+fi
+if [ -z "${KS_XCLIENT:-}" ]; then
+    KS_XCLIENT="${KS_ENV}/bin/python ${KS_DIR}/screen.py"
+fi
+    """
+).rstrip()
+
+_PANORAMA_HOOK_BLOCK = dedent(
+    """
+# KIAUH panorama orientation hook
+if [ -z "${WAYLAND_DISPLAY:-}" ] && command -v xrandr >/dev/null 2>&1; then
+    PANORAMA_SCRIPT="${HOME}/.config/klipperscreen/panorama-xrandr.sh"
+    if [ -z "${KIAUH_DISABLE_PANORAMA:-}" ] && [ -x "$PANORAMA_SCRIPT" ]; then
+        "$PANORAMA_SCRIPT" || true
+    fi
+fi
+    """
+).rstrip()
+
+_AUTOROTATE_HOOK_BLOCK = dedent(
+    """
+# KIAUH auto-rotation hook
+if [ -z "${KIAUH_DISABLE_AUTOROTATE:-}" ]; then
+    AUTOROTATE_SCRIPT="${HOME}/.config/klipperscreen/autorotate.sh"
+    if [ -x "$AUTOROTATE_SCRIPT" ]; then
+        AUTOROTATE_HINT=""
+        if [ -n "${BACKEND:-}" ]; then
+            case "${BACKEND}" in
+                w|W|wayland|WAYLAND)
+                    AUTOROTATE_HINT="wayland"
+                    ;;
+                x|X|x11|X11)
+                    AUTOROTATE_HINT="x11"
+                    ;;
+            esac
+        fi
+        if [ -z "$AUTOROTATE_HINT" ]; then
+            if [ -n "${WAYLAND_DISPLAY:-}" ]; then
+                AUTOROTATE_HINT="wayland"
+            elif [ -n "${DISPLAY:-}" ]; then
+                AUTOROTATE_HINT="x11"
+            fi
+        fi
+        KIAUH_AUTOROTATE_BACKEND="$AUTOROTATE_HINT" "$AUTOROTATE_SCRIPT" >/dev/null 2>&1 &
+    fi
+fi
+    """
+).rstrip()
+
 
-def _ensure_start_script_client_fallback() -> None:
+def _ensure_start_script_client_fallback() -> bool:
     """Make the upstream launcher default to KlipperScreen when KS_XCLIENT is unset."""
 
-    script_path = KLIPPERSCREEN_DIR.joinpath("scripts/KlipperScreen-start.sh")
+    script_path = KLIPPERSCREEN_START_SCRIPT
     if not script_path.exists():
-        return
+        return False
 
     try:
         content = script_path.read_text(encoding="utf-8")
     except OSError:
-        return
+        return False
 
     if _START_SCRIPT_SENTINEL in content:
-        return
+        return True
 
     needle = "SCRIPTPATH=$(dirname $(realpath $0))"
     if needle not in content:
@@ -314,25 +398,9 @@ def _ensure_start_script_client_fallback() -> None:
             "Unable to inject KlipperScreen fallback into KlipperScreen-start.sh "
             "because the expected anchor was not found."
         )
-        return
+        return False
 
-    fallback_block = dedent(
-        """
-# KIAUH fallback: ensure default client selection
-KS_BASEDIR="${SCRIPTPATH%/scripts}"
-if [ -z "${KS_DIR:-}" ]; then
-    KS_DIR="$KS_BASEDIR"
-fi
-if [ -z "${KS_ENV:-}" ]; then
-    KS_ENV="${HOME}/.KlipperScreen-env"
-fi
-if [ -z "${KS_XCLIENT:-}" ]; then
-    KS_XCLIENT="${KS_ENV}/bin/python ${KS_DIR}/screen.py"
-fi
-        """
-    ).rstrip()
-
-    updated = content.replace(needle, f"{needle}\n{fallback_block}", 1)
+    updated = content.replace(needle, f"{needle}\n{_FALLBACK_BLOCK}", 1)
     try:
         script_path.write_text(updated, encoding="utf-8")
         Logger.print_info(
@@ -340,26 +408,28 @@ fi
             "manual launches use screen.py even when services skip environment "
             "exports."
         )
+        return True
     except OSError:
         Logger.print_warn(
             "Failed to update KlipperScreen-start.sh with KS_XCLIENT fallback."
         )
+        return False
 
 
-def _ensure_panorama_hook() -> None:
+def _ensure_panorama_hook() -> bool:
     """Ensure KlipperScreen's launcher runs user panorama helpers when present."""
 
-    script_path = KLIPPERSCREEN_DIR.joinpath("scripts/KlipperScreen-start.sh")
+    script_path = KLIPPERSCREEN_START_SCRIPT
     if not script_path.exists():
-        return
+        return False
 
     try:
         content = script_path.read_text(encoding="utf-8")
     except OSError:
-        return
+        return False
 
     if _PANORAMA_SCRIPT_SENTINEL in content:
-        return
+        return True
 
     anchor = (
         'if [ -z "${KS_XCLIENT:-}" ]; then\n'
@@ -372,47 +442,37 @@ def _ensure_panorama_hook() -> None:
             "Unable to inject panorama helper hook because the start script "
             "structure was not recognised."
         )
-        return
+        return False
 
-    hook_block = dedent(
-        """
-# KIAUH panorama orientation hook
-if [ -z "${WAYLAND_DISPLAY:-}" ] && command -v xrandr >/dev/null 2>&1; then
-    PANORAMA_SCRIPT="${HOME}/.config/klipperscreen/panorama-xrandr.sh"
-    if [ -z "${KIAUH_DISABLE_PANORAMA:-}" ] && [ -x "$PANORAMA_SCRIPT" ]; then
-        "$PANORAMA_SCRIPT" || true
-    fi
-fi
-        """
-    ).rstrip()
-
-    updated = content.replace(anchor, f"{anchor}\n{hook_block}", 1)
+    updated = content.replace(anchor, f"{anchor}\n{_PANORAMA_HOOK_BLOCK}", 1)
     try:
         script_path.write_text(updated, encoding="utf-8")
         Logger.print_info(
             "Added panorama orientation hook to KlipperScreen-start.sh so X11 "
             "sessions can apply user-defined display tweaks before launch."
         )
+        return True
     except OSError:
         Logger.print_warn(
             "Failed to update KlipperScreen-start.sh with panorama helper hook."
         )
+        return False
 
 
-def _ensure_autorotate_hook() -> None:
+def _ensure_autorotate_hook() -> bool:
     """Ensure KlipperScreen's launcher spawns the auto-rotation helper."""
 
-    script_path = KLIPPERSCREEN_DIR.joinpath("scripts/KlipperScreen-start.sh")
+    script_path = KLIPPERSCREEN_START_SCRIPT
     if not script_path.exists():
-        return
+        return False
 
     try:
         content = script_path.read_text(encoding="utf-8")
     except OSError:
-        return
+        return False
 
     if _AUTOROTATE_SCRIPT_SENTINEL in content:
-        return
+        return True
 
     anchor = (
         'if [ -z "${KS_XCLIENT:-}" ]; then\n'
@@ -425,49 +485,50 @@ def _ensure_autorotate_hook() -> None:
             "Unable to inject auto-rotation helper hook because the start script "
             "structure was not recognised.",
         )
-        return
+        return False
 
-    hook_block = dedent(
-        """
-# KIAUH auto-rotation hook
-if [ -z "${KIAUH_DISABLE_AUTOROTATE:-}" ]; then
-    AUTOROTATE_SCRIPT="${HOME}/.config/klipperscreen/autorotate.sh"
-    if [ -x "$AUTOROTATE_SCRIPT" ]; then
-        AUTOROTATE_HINT=""
-        if [ -n "${BACKEND:-}" ]; then
-            case "${BACKEND}" in
-                w|W|wayland|WAYLAND)
-                    AUTOROTATE_HINT="wayland"
-                    ;;
-                x|X|x11|X11)
-                    AUTOROTATE_HINT="x11"
-                    ;;
-            esac
-        fi
-        if [ -z "$AUTOROTATE_HINT" ]; then
-            if [ -n "${WAYLAND_DISPLAY:-}" ]; then
-                AUTOROTATE_HINT="wayland"
-            elif [ -n "${DISPLAY:-}" ]; then
-                AUTOROTATE_HINT="x11"
-            fi
-        fi
-        KIAUH_AUTOROTATE_BACKEND="$AUTOROTATE_HINT" "$AUTOROTATE_SCRIPT" >/dev/null 2>&1 &
-    fi
-fi
-        """
-    ).rstrip()
-
-    updated = content.replace(anchor, f"{anchor}\n{hook_block}", 1)
+    updated = content.replace(anchor, f"{anchor}\n{_AUTOROTATE_HOOK_BLOCK}", 1)
     try:
         script_path.write_text(updated, encoding="utf-8")
         Logger.print_info(
             "Added auto-rotation hook to KlipperScreen-start.sh so sensor helpers "
             "can follow orientation changes automatically.",
         )
+        return True
     except OSError:
         Logger.print_warn(
             "Failed to update KlipperScreen-start.sh with auto-rotation hook.",
         )
+        return False
+
+
+def _patch_start_script() -> None:
+    """Apply all launcher hooks unless the start script is unchanged since the last run."""
+
+    try:
+        mtime = str(os.stat(KLIPPERSCREEN_START_SCRIPT).st_mtime_ns)
+    except OSError:
+        return
+
+    try:
+        if KLIPPERSCREEN_START_PATCH_MARKER.read_text(encoding="utf-8") == mtime:
+            return
+    except OSError:
+        pass
+
+    patched = [
+        _ensure_start_script_client_fallback(),
+        _ensure_panorama_hook(),
+        _ensure_autorotate_hook(),
+    ]
+    if not all(patched):
+        return
+
+    try:
+        mtime = str(os.stat(KLIPPERSCREEN_START_SCRIPT).st_mtime_ns)
+        write_text_file(KLIPPERSCREEN_START_PATCH_MARKER, mtime)
+    except OSError:
+        pass
 
 
 def prompt_wayland_preset() -> Optional[WaylandPreset]:
@@ -482,24 +543,26 @@ def prompt_wayland_preset() -> Optional[WaylandPreset]:
 
     Logger.print_status("Available presets:")
     Logger.print_info(f"  {WAYLAND_PRESET_SKIP_KEY}) Skip Wayland preset creation")
-    for key, preset in WAYLAND_PRESETS.items():
+    presets = _wayland_presets()
+    for key, preset in presets.items():
         Logger.print_info(f"  {key}) {preset.name} — {preset.description}")
         for note in preset.notes:
             Logger.print_info(f"       • {note}")
 
     selection = get_selection_input(
         "Choose a Wayland preset (or 0 to skip)",
-        {**WAYLAND_PRESETS, WAYLAND_PRESET_SKIP_KEY: WAYLAND_PRESET_SKIP_KEY},
+        {**presets, WAYLAND_PRESET_SKIP_KEY: WAYLAND_PRESET_SKIP_KEY},
         default=WAYLAND_PRESET_SKIP_KEY,
     )
     if selection == WAYLAND_PRESET_SKIP_KEY:
         return None
-    return WAYLAND_PRESETS[selection]
+    return presets[selection]
 
 
 def configure_wayland_launchers(preset: WaylandPreset) -> AutostartResult:
     try:
-        result = _configure_wayland_launchers_internal(preset)
+        rendered = _render_preset(preset)
+        result = _configure_wayland_launchers_internal(rendered)
         if result.autostart_entry is None:
             if get_confirm(
                 "No graphical shell detected. Create a generic autostart entry so KlipperScreen launches after login?",
@@ -507,8 +570,7 @@ def configure_wayland_launchers(preset: WaylandPreset) -> AutostartResult:
                 allow_go_back=False,
             ):
                 result.autostart_entry = _write_autostart_entry(
-                    result.wrapper_path,
-                    preset,
+                    rendered,
                     shell="generic",
                 )
                 Logger.print_ok(
@@ -551,10 +613,11 @@ def configure_wayland_launchers(preset: WaylandPreset) -> AutostartResult:
         raise
 
 
-def _configure_wayland_launchers_internal(preset: WaylandPreset) -> AutostartResult:
-    wrapper_path = _write_wayland_wrapper(preset)
-    desktop_path = _write_desktop_entry(wrapper_path, preset)
-    service_result = _write_user_service(wrapper_path, preset)
+def _configure_wayland_launchers_internal(rendered: _RenderedPreset) -> AutostartResult:
+    preset = rendered.preset
+    wrapper_path = _write_wayland_wrapper(rendered)
+    desktop_path = _write_desktop_entry(rendered)
+    service_result = _write_user_service(rendered)
 
     autostart_entry: Optional[Path] = None
     login_snippet: Optional[Path] = None
@@ -562,9 +625,9 @@ def _configure_wayland_launchers_internal(preset: WaylandPreset) -> AutostartRes
 
     detected_shell = _detect_mobile_shell()
     if detected_shell and _shell_matches_preset(detected_shell, preset):
-        autostart_entry = _write_autostart_entry(wrapper_path, preset, detected_shell)
+        autostart_entry = _write_autostart_entry(rendered, detected_shell)
     elif service_result.backend is AutostartBackend.OPENRC and detected_shell is None:
-        login_snippet, profile_injection = _write_login_shell_snippet(wrapper_path, preset)
+        login_snippet, profile_injection = _write_login_shell_snippet(rendered)
 
     return AutostartResult(
         preset=preset,
@@ -578,61 +641,90 @@ def _configure_wayland_launchers_internal(preset: WaylandPreset) -> AutostartRes
     )
 
 
-def _write_wayland_wrapper(preset: WaylandPreset) -> Path:
-    bin_dir = Path.home().joinpath(".local/bin")
-    bin_dir.mkdir(parents=True, exist_ok=True)
-    wrapper_path = bin_dir.joinpath(
-        f"klipperscreen-{preset.name.lower().replace(' ', '-')}-wayland.sh"
-    )
+@dataclass(frozen=True)
+class _RenderedPreset:
+    preset: WaylandPreset
+    wrapper_path: Path
+    fields: Dict[str, object]
 
-    env_lines = [
-        "#!/bin/sh",
-        "set -eu",
-        "export KS_DIR=\"" + KLIPPERSCREEN_DIR.as_posix() + "\"",
-        "export KS_ENV=\"" + KLIPPERSCREEN_ENV_DIR.as_posix() + "\"",
-        "export KS_XCLIENT=\"" +
-        f"{KLIPPERSCREEN_ENV_DIR.as_posix()}/bin/python {KLIPPERSCREEN_DIR.as_posix()}/screen.py" +
-        "\"",
-        "export BACKEND=\"w\"",
-        'export XDG_RUNTIME_DIR="${XDG_RUNTIME_DIR:-/run/user/$(id -u)}"',
-    ]
 
-    for key, value in preset.env.items():
-        escaped = value.replace("\"", "\\\"")
-        env_lines.append(f'export {key}="{escaped}"')
+def _render_preset(preset: WaylandPreset) -> _RenderedPreset:
+    """Compute the values shared by all launcher files of a preset once."""
 
-    env_lines.append(
-        f'exec "{KLIPPERSCREEN_DIR.joinpath("scripts/KlipperScreen-start.sh").as_posix()}" "$@"'
+    wrapper_path = _LOCAL_BIN_DIR.joinpath(f"klipperscreen-{preset.slug}-wayland.sh")
+    shell_exports = "".join(
+        f"export {key}={shlex.quote(value)}\n" for key, value in preset.env.items()
+    )
+    env_lines = "\n".join(
+        (
+            f'Environment="{key}={value}"'
+            if " " in value
+            else f"Environment={key}={value}"
+        )
+        for key, value in preset.env.items()
     )
+    return _RenderedPreset(
+        preset=preset,
+        wrapper_path=wrapper_path,
+        fields={
+            "preset": preset,
+            "wrapper": wrapper_path.as_posix(),
+            "ks_dir": KLIPPERSCREEN_DIR.as_posix(),
+            "ks_env": KLIPPERSCREEN_ENV_DIR.as_posix(),
+            "shell_exports": shell_exports,
+            "env_lines": env_lines,
+        },
+    )
+
+
+_WAYLAND_WRAPPER_TEMPLATE = (
+    "#!/bin/sh\n"
+    "set -eu\n"
+    'export KS_DIR="{ks_dir}"\n'
+    'export KS_ENV="{ks_env}"\n'
+    'export KS_XCLIENT="{ks_env}/bin/python {ks_dir}/screen.py"\n'
+    'export BACKEND="w"\n'
+    'export XDG_RUNTIME_DIR="${{XDG_RUNTIME_DIR:-/run/user/$(id -u)}}"\n'
+    "{shell_exports}"
+    'exec "{ks_dir}/scripts/KlipperScreen-start.sh" "$@"\n'
+)
 
-    wrapper_path.write_text("\n".join(env_lines) + "\n", encoding="utf-8")
-    os.chmod(wrapper_path, 0o755)
+
+def _write_wayland_wrapper(rendered: _RenderedPreset) -> Path:
+    _ensure_dir(_LOCAL_BIN_DIR)
+    wrapper_path = rendered.wrapper_path
+    content = _WAYLAND_WRAPPER_TEMPLATE.format(**rendered.fields)
+
+    replace_text_file(wrapper_path, content, 0o755)
     Logger.print_info(f"Created Wayland wrapper: {wrapper_path}")
     return wrapper_path
 
 
-def _write_desktop_entry(wrapper_path: Path, preset: WaylandPreset) -> Path:
-    desktop_dir = Path.home().joinpath(".local/share/applications")
-    desktop_dir.mkdir(parents=True, exist_ok=True)
+_DESKTOP_ENTRY_TEMPLATE = dedent(
+    """
+    [Desktop Entry]
+    Type=Application
+    Name=KlipperScreen ({preset.name})
+    Comment=Launch KlipperScreen with the {preset.desktop} Wayland preset
+    Exec={wrapper}
+    Icon=klipperscreen
+    Terminal=false
+    Categories=Utility;System;
+    Keywords=klipper;klipperscreen;wayland;
+    """
+).strip()
+
+
+def _write_desktop_entry(rendered: _RenderedPreset) -> Path:
+    desktop_dir = _LOCAL_APPS_DIR
+    _ensure_dir(desktop_dir)
     desktop_path = desktop_dir.joinpath(
-        f"klipperscreen-{preset.name.lower().replace(' ', '-')}.desktop"
+        f"klipperscreen-{rendered.preset.slug}.desktop"
     )
 
-    desktop_content = dedent(
-        f"""
-        [Desktop Entry]
-        Type=Application
-        Name=KlipperScreen ({preset.name})
-        Comment=Launch KlipperScreen with the {preset.desktop} Wayland preset
-        Exec={wrapper_path.as_posix()}
-        Icon=klipperscreen
-        Terminal=false
-        Categories=Utility;System;
-        Keywords=klipper;klipperscreen;wayland;
-        """
-    ).strip()
+    desktop_content = _DESKTOP_ENTRY_TEMPLATE.format(**rendered.fields)
 
-    desktop_path.write_text(desktop_content + "\n", encoding="utf-8")
+    replace_text_file(desktop_path, desktop_content + "\n")
     Logger.print_info(f"Desktop entry stored at {desktop_path}")
 
     return desktop_path
@@ -644,13 +736,13 @@ class _ServiceResult:
     path: Optional[Path]
 
 
-def _write_user_service(wrapper_path: Path, preset: WaylandPreset) -> _ServiceResult:
+def _write_user_service(rendered: _RenderedPreset) -> _ServiceResult:
     init_system = detect_init_system()
     if init_system == InitSystem.OPENRC:
-        path = _write_openrc_service(wrapper_path, preset)
+        path = _write_openrc_service(rendered)
         return _ServiceResult(AutostartBackend.OPENRC, path)
     if init_system == InitSystem.SYSTEMD:
-        path = _write_systemd_user_service(wrapper_path, preset)
+        path = _write_systemd_user_service(rendered)
         return _ServiceResult(AutostartBackend.SYSTEMD_USER, path)
     Logger.print_warn(
         "Unsupported init system for user services; generated desktop entry only."
@@ -658,116 +750,124 @@ def _write_user_service(wrapper_path: Path, preset: WaylandPreset) -> _ServiceRe
     return _ServiceResult(AutostartBackend.NONE, None)
 
 
-def _write_systemd_user_service(wrapper_path: Path, preset: WaylandPreset) -> Path:
-    user_systemd_dir = Path.home().joinpath(".config/systemd/user")
-    user_systemd_dir.mkdir(parents=True, exist_ok=True)
+_SYSTEMD_USER_TEMPLATE = dedent(
+    """
+    [Unit]
+    Description=KlipperScreen ({preset.name} Wayland preset)
+    After=graphical-session.target
+    PartOf=graphical-session.target
+
+    [Service]
+    Type=simple
+    Restart=on-failure
+    Environment=KS_DIR={ks_dir}
+    Environment=KS_ENV={ks_env}
+    Environment="KS_XCLIENT={ks_env}/bin/python {ks_dir}/screen.py"
+    Environment=BACKEND=w
+    Environment=XDG_RUNTIME_DIR=%t
+    {env_lines}
+    ExecStart={wrapper}
+
+    [Install]
+    WantedBy=default.target
+    """
+).strip()
+
+
+def _write_systemd_user_service(rendered: _RenderedPreset) -> Path:
+    user_systemd_dir = _SYSTEMD_USER_DIR
+    _ensure_dir(user_systemd_dir)
     service_path = user_systemd_dir.joinpath(
-        f"klipperscreen-{preset.name.lower().replace(' ', '-')}.service"
+        f"klipperscreen-{rendered.preset.slug}.service"
     )
 
-    env_lines = "\n".join(
-        (
-            f'Environment="{key}={value}"'
-            if " " in value
-            else f"Environment={key}={value}"
-        )
-        for key, value in preset.env.items()
-    )
-
-    service_content = dedent(
-        f"""
-        [Unit]
-        Description=KlipperScreen ({preset.name} Wayland preset)
-        After=graphical-session.target
-        PartOf=graphical-session.target
-
-        [Service]
-        Type=simple
-        Restart=on-failure
-        Environment=KS_DIR={KLIPPERSCREEN_DIR.as_posix()}
-        Environment=KS_ENV={KLIPPERSCREEN_ENV_DIR.as_posix()}
-        Environment="KS_XCLIENT={KLIPPERSCREEN_ENV_DIR.as_posix()}/bin/python {KLIPPERSCREEN_DIR.as_posix()}/screen.py"
-        Environment=BACKEND=w
-        Environment=XDG_RUNTIME_DIR=%t
-        {env_lines}
-        ExecStart={wrapper_path.as_posix()}
-
-        [Install]
-        WantedBy=default.target
-        """
-    ).strip()
+    service_content = _SYSTEMD_USER_TEMPLATE.format(**rendered.fields)
 
-    service_path.write_text(service_content + "\n", encoding="utf-8")
+    replace_text_file(service_path, service_content + "\n")
 
     return service_path
 
 
-def _write_openrc_service(wrapper_path: Path, preset: WaylandPreset) -> Path:
-    openrc_dir = Path.home().joinpath(".config/openrc")
-    svc_dir = openrc_dir.joinpath("init.d")
-    svc_dir.mkdir(parents=True, exist_ok=True)
-    service_path = svc_dir.joinpath(
-        f"klipperscreen-{preset.name.lower().replace(' ', '-')}"
-    )
+_OPENRC_SERVICE_TEMPLATE = dedent(
+    """
+    #!/sbin/openrc-run
+    description="KlipperScreen ({preset.name} Wayland preset)"
+    command="{wrapper}"
+    command_background="yes"
+    pidfile="/run/$RC_SVCNAME.pid"
+    name="klipperscreen-{preset.slug}"
+
+    depend() {{
+        need net
+    }}
+
+    _kiauh_wait_for_moonraker() {{
+        local url="${{MOONRAKER_URL:-http://127.0.0.1:7125/server/info}}"
+        local tries=60
+        local have_client=""
+        if command -v wget >/dev/null 2>&1; then
+            have_client="wget"
+        elif command -v curl >/dev/null 2>&1; then
+            have_client="curl"
+        fi
 
-    content = dedent(
-        f"""
-        #!/sbin/openrc-run
-        description="KlipperScreen ({preset.name} Wayland preset)"
-        command="{wrapper_path.as_posix()}"
-        command_background="yes"
-        pidfile="/run/$RC_SVCNAME.pid"
-        name="klipperscreen-{preset.name.lower().replace(' ', '-')}"
-
-        depend() {{
-            need net
-        }}
-
-        _kiauh_wait_for_moonraker() {{
-            local url="${{MOONRAKER_URL:-http://127.0.0.1:7125/server/info}}"
-            local tries=60
-            local have_client=""
-            if command -v wget >/dev/null 2>&1; then
-                have_client="wget"
-            elif command -v curl >/dev/null 2>&1; then
-                have_client="curl"
-            fi
+        if [ -z "$have_client" ]; then
+            ewarn "No curl/wget available to probe Moonraker; starting immediately."
+            return 0
+        fi
 
-            if [ -z "$have_client" ]; then
-                ewarn "No curl/wget available to probe Moonraker; starting immediately."
-                return 0
+        while [ $tries -gt 0 ]; do
+            if [ "$have_client" = "wget" ]; then
+                wget -qO- "$url" >/dev/null 2>&1 && return 0
+            else
+                curl -fsS "$url" >/dev/null 2>&1 && return 0
             fi
+            sleep 2
+            tries=$((tries - 1))
+        done
+        ewarn "Moonraker did not become ready in time; continuing regardless."
+        return 0
+    }}
 
-            while [ $tries -gt 0 ]; do
-                if [ "$have_client" = "wget" ]; then
-                    wget -qO- "$url" >/dev/null 2>&1 && return 0
-                else
-                    curl -fsS "$url" >/dev/null 2>&1 && return 0
-                fi
-                sleep 2
-                tries=$((tries - 1))
-            done
-            ewarn "Moonraker did not become ready in time; continuing regardless."
-            return 0
-        }}
+    start_pre() {{
+        _kiauh_wait_for_moonraker
+    }}
+    """
+).strip()
 
-        start_pre() {{
-            _kiauh_wait_for_moonraker
-        }}
-        """
-    ).strip()
 
-    service_path.write_text(content + "\n", encoding="utf-8")
-    os.chmod(service_path, 0o755)
-    
+def _write_openrc_service(rendered: _RenderedPreset) -> Path:
+    svc_dir = _OPENRC_INIT_DIR
+    _ensure_dir(svc_dir)
+    service_path = svc_dir.joinpath(
+        f"klipperscreen-{rendered.preset.slug}"
+    )
+
+    content = _OPENRC_SERVICE_TEMPLATE.format(**rendered.fields)
+
+    replace_text_file(service_path, content + "\n", 0o755)
+
     return service_path
 
 
-def _write_autostart_entry(wrapper_path: Path, preset: WaylandPreset, shell: str) -> Path:
-    autostart_dir = Path.home().joinpath(".config/autostart")
-    autostart_dir.mkdir(parents=True, exist_ok=True)
+_AUTOSTART_TEMPLATE = dedent(
+    """
+    [Desktop Entry]
+    Type=Application
+    Name=KlipperScreen ({preset.name})
+    Comment=Autostart KlipperScreen in the {preset.desktop} session
+    Exec={wrapper}
+    X-GNOME-Autostart-enabled=true
+    {only_show_in}
+    """
+).strip()
+
+
+def _write_autostart_entry(rendered: _RenderedPreset, shell: str) -> Path:
+    autostart_dir = _AUTOSTART_DIR
+    _ensure_dir(autostart_dir)
     autostart_path = autostart_dir.joinpath(
-        f"klipperscreen-{preset.name.lower().replace(' ', '-')}-autostart.desktop"
+        f"klipperscreen-{rendered.preset.slug}-autostart.desktop"
     )
 
     only_show_in = ""
@@ -777,101 +877,110 @@ def _write_autostart_entry(wrapper_path: Path, preset: WaylandPreset, shell: str
     elif shell_lower == "plasma":
         only_show_in = "OnlyShowIn=KDE;Plasma;"
 
-    content = dedent(
-        f"""
-        [Desktop Entry]
-        Type=Application
-        Name=KlipperScreen ({preset.name})
-        Comment=Autostart KlipperScreen in the {preset.desktop} session
-        Exec={wrapper_path.as_posix()}
-        X-GNOME-Autostart-enabled=true
-        {only_show_in}
-        """
+    content = _AUTOSTART_TEMPLATE.format(
+        **rendered.fields,
+        only_show_in=only_show_in,
     ).strip()
 
-    autostart_path.write_text(content + "\n", encoding="utf-8")
+    replace_text_file(autostart_path, content + "\n")
     return autostart_path
 
 
-def _write_login_shell_snippet(wrapper_path: Path, preset: WaylandPreset) -> tuple[Path, Path]:
-    profile_dir = Path.home().joinpath(".config/profile.d")
-    profile_dir.mkdir(parents=True, exist_ok=True)
-    snippet_path = profile_dir.joinpath("klipperscreen-autostart.sh")
-
-    snippet_content = dedent(
-        f"""
-        # Auto-generated by KIAUH: start KlipperScreen once Moonraker is reachable.
-        # shellcheck disable=SC1090
-        if [ -n "$SSH_CONNECTION" ] || [ -n "$SSH_CLIENT" ]; then
-            return 0
-        fi
-        if command -v pgrep >/dev/null 2>&1 && \
-            pgrep -f "KlipperScreen-start.sh" >/dev/null 2>&1; then
-            return 0
-        fi
-        moonraker_url="${{MOONRAKER_URL:-http://127.0.0.1:7125/server/info}}"
-        tries=60
-        while [ $tries -gt 0 ]; do
-            if command -v wget >/dev/null 2>&1; then
-                wget -qO- "$moonraker_url" >/dev/null 2>&1 && break
-            elif command -v curl >/dev/null 2>&1; then
-                curl -fsS "$moonraker_url" >/dev/null 2>&1 && break
-            else
-                echo "Neither wget nor curl available to probe Moonraker; skipping check." >&2
-                break
-            fi
-            sleep 2
-            tries=$((tries - 1))
-        done
-        if [ $tries -eq 0 ]; then
-            echo "Moonraker not reachable; KlipperScreen autostart skipped." >&2
-            return 0
+_LOGIN_SNIPPET_TEMPLATE = dedent(
+    """
+    # Auto-generated by KIAUH: start KlipperScreen once Moonraker is reachable.
+    # shellcheck disable=SC1090
+    if [ -n "$SSH_CONNECTION" ] || [ -n "$SSH_CLIENT" ]; then
+        return 0
+    fi
+    if command -v pgrep >/dev/null 2>&1 && \
+        pgrep -f "KlipperScreen-start.sh" >/dev/null 2>&1; then
+        return 0
+    fi
+    moonraker_url="${{MOONRAKER_URL:-http://127.0.0.1:7125/server/info}}"
+    tries=60
+    while [ $tries -gt 0 ]; do
+        if command -v wget >/dev/null 2>&1; then
+            wget -qO- "$moonraker_url" >/dev/null 2>&1 && break
+        elif command -v curl >/dev/null 2>&1; then
+            curl -fsS "$moonraker_url" >/dev/null 2>&1 && break
+        else
+            echo "Neither wget nor curl available to probe Moonraker; skipping check." >&2
+            break
         fi
-        nohup {wrapper_path.as_posix()} >/dev/null 2>&1 &
+        sleep 2
+        tries=$((tries - 1))
+    done
+    if [ $tries -eq 0 ]; then
+        echo "Moonraker not reachable; KlipperScreen autostart skipped." >&2
         return 0
-        """
-    ).strip()
+    fi
+    nohup {wrapper} >/dev/null 2>&1 &
+    return 0
+    """
+).strip()
+
+
+_PROFILE_HOOK_MARKER = "# >>> KIAUH profile.d hook >>>"
+_PROFILE_HOOK_BLOCK = dedent(
+    """
+    # >>> KIAUH profile.d hook >>>
+    for profile_snippet in "$HOME"/.config/profile.d/*.sh; do
+        [ -r "$profile_snippet" ] && . "$profile_snippet"
+    done
+    # <<< KIAUH profile.d hook <<<
+    """
+).strip()
+
+
+def _write_login_shell_snippet(rendered: _RenderedPreset) -> tuple[Path, Path]:
+    profile_dir = _PROFILE_D_DIR
+    _ensure_dir(profile_dir)
+    snippet_path = profile_dir.joinpath("klipperscreen-autostart.sh")
 
-    snippet_path.write_text(snippet_content + "\n", encoding="utf-8")
+    snippet_content = _LOGIN_SNIPPET_TEMPLATE.format(**rendered.fields)
 
-    profile_path = Path.home().joinpath(".profile")
-    inclusion_block = dedent(
-        """
-        # >>> KIAUH profile.d hook >>>
-        for profile_snippet in "$HOME"/.config/profile.d/*.sh; do
-            [ -r "$profile_snippet" ] && . "$profile_snippet"
-        done
-        # <<< KIAUH profile.d hook <<<
-        """
-    ).strip()
+    replace_text_file(snippet_path, snippet_content + "\n")
+
+    profile_path = _PROFILE_PATH
 
     if profile_path.exists():
-        profile_contents = profile_path.read_text(encoding="utf-8")
-        if inclusion_block not in profile_contents:
-            if not profile_contents.endswith("\n"):
-                profile_contents += "\n"
-            profile_contents += inclusion_block + "\n"
-            profile_path.write_text(profile_contents, encoding="utf-8")
+        last_line = ""
+        with profile_path.open("r", encoding="utf-8") as profile:
+            for line in profile:
+                if line.startswith(_PROFILE_HOOK_MARKER):
+                    return snippet_path, profile_path
+                last_line = line
+        separator = "\n" if last_line and not last_line.endswith("\n") else ""
+        with profile_path.open("a", encoding="utf-8") as profile:
+            profile.write(separator + _PROFILE_HOOK_BLOCK + "\n")
     else:
-        profile_contents = "#!/bin/sh\n" + inclusion_block + "\n"
+        profile_contents = "#!/bin/sh\n" + _PROFILE_HOOK_BLOCK + "\n"
         profile_path.write_text(profile_contents, encoding="utf-8")
 
     return snippet_path, profile_path
 
 
+_SHELL_ENV_VARS = ("XDG_CURRENT_DESKTOP", "DESKTOP_SESSION", "XDG_SESSION_DESKTOP")
+_SHELL_TOKENS: Dict[str, str] = {
+    "phosh": "phosh",
+    "plasma": "plasma",
+    "plasma-mobile": "plasma",
+    "plasmamobile": "plasma",
+    "plasmawayland": "plasma",
+    "sxmo": "sxmo",
+}
+
+
 def _detect_mobile_shell() -> Optional[str]:
-    candidates = [
-        os.environ.get("XDG_CURRENT_DESKTOP", ""),
-        os.environ.get("DESKTOP_SESSION", ""),
-        os.environ.get("XDG_SESSION_DESKTOP", ""),
-    ]
-    combined = ":".join(filter(None, candidates)).lower()
-    if "phosh" in combined:
-        return "phosh"
-    if "plasma" in combined or "plasma-mobile" in combined:
-        return "plasma"
-    if "sxmo" in combined:
-        return "sxmo"
+    for var in _SHELL_ENV_VARS:
+        value = os.environ.get(var)
+        if not value:
+            continue
+        for token in value.lower().split(":"):
+            shell = _SHELL_TOKENS.get(token)
+            if shell:
+                return shell
     return None
 
 
@@ -896,84 +1005,96 @@ def detect_internal_display() -> Optional[DisplayInfo]:
     return None
 
 
+# one match per interesting wlr-randr line: an output header, its transform
+# or a mode carrying a resolution, everything else is skipped
+_WLR_LINE_RE = re.compile(
+    r"(?P<name>\S+)"
+    r"|\s+Transform:(?P<transform>.*)"
+    r"|\s+\D*?(?P<width>\d{3,4})x(?P<height>\d{3,4})"
+)
+
+
 def _detect_with_wlr_randr() -> Optional[DisplayInfo]:
-    if shutil.which("wlr-randr") is None:
-        return None
-    try:
-        result = run("wlr-randr", capture_output=True, text=True, check=True)
-    except CalledProcessError:
+    wlr_randr = shutil.which("wlr-randr")
+    if wlr_randr is None:
         return None
 
     display: Optional[DisplayInfo] = None
     current_name: Optional[str] = None
+    internal = False
     rotation: Optional[int] = None
 
-    for raw_line in result.stdout.splitlines():
-        line = raw_line.rstrip()
-        if not line:
-            continue
-        if not line.startswith(" "):
-            if display and display.name:
-                break
-            current_name = line.split()[0]
-            rotation = None
-            continue
-
-        if current_name and _looks_like_internal_connector(current_name):
-            if "Transform:" in line:
-                rotation = _transform_to_rotation(line.split("Transform:", 1)[1].strip())
-            match = _extract_resolution(line)
-            if match:
-                width, height = match
+    with Popen([wlr_randr], stdout=PIPE, stderr=DEVNULL, text=True) as proc:
+        for line in proc.stdout or ():
+            match = _WLR_LINE_RE.match(line)
+            if match is None:
+                continue
+            name, transform, width, height = match.groups()
+            if name is not None:
+                if display and display.name:
+                    # the internal output is fully parsed, stop reading
+                    proc.terminate()
+                    return display
+                current_name = name
+                internal = _looks_like_internal_connector(name)
+                rotation = None
+            elif not internal or current_name is None:
+                continue
+            elif transform is not None:
+                rotation = _transform_to_rotation(transform.strip())
+            else:
                 display = DisplayInfo(
                     name=current_name,
-                    width=width,
-                    height=height,
+                    width=int(width),
+                    height=int(height),
                     rotation=rotation,
                 )
+
+    if proc.returncode != 0:
+        return None
     return display
 
 
 def _detect_with_weston_info() -> Optional[DisplayInfo]:
-    if shutil.which("weston-info") is None:
-        return None
-    try:
-        result = run("weston-info", capture_output=True, text=True, check=True)
-    except CalledProcessError:
+    weston_info = shutil.which("weston-info")
+    if weston_info is None:
         return None
 
-    display: Optional[DisplayInfo] = None
     current_name: Optional[str] = None
     rotation: Optional[int] = None
 
-    for raw_line in result.stdout.splitlines():
-        line = raw_line.strip()
-        if not line:
-            continue
-        if line.startswith("output"):
-            _, current_name, *_ = line.split()
-            rotation = None
-            continue
-        if not current_name or not _looks_like_internal_connector(current_name):
-            continue
-        if "transform" in line and "transform=" in line:
-            rotation = _transform_to_rotation(line.split("transform=", 1)[1])
-        match = _extract_resolution(line)
-        if match:
-            width, height = match
-            display = DisplayInfo(
-                name=current_name,
-                width=width,
-                height=height,
-                rotation=rotation,
-            )
-            break
-    return display
+    with Popen([weston_info], stdout=PIPE, stderr=DEVNULL, text=True) as proc:
+        for raw_line in proc.stdout or ():
+            line = raw_line.strip()
+            if not line:
+                continue
+            if line.startswith("output"):
+                _, current_name, *_ = line.split()
+                rotation = None
+                continue
+            if not current_name or not _looks_like_internal_connector(current_name):
+                continue
+            if "transform" in line and "transform=" in line:
+                rotation = _transform_to_rotation(line.split("transform=", 1)[1])
+            match = _extract_resolution(line)
+            if match:
+                width, height = match
+                proc.terminate()
+                return DisplayInfo(
+                    name=current_name,
+                    width=width,
+                    height=height,
+                    rotation=rotation,
+                )
+
+    return None
+
+
+_INTERNAL_RE = re.compile(r"edp|dsi|lvds|panel|default")
 
 
 def _looks_like_internal_connector(name: str) -> bool:
-    lowered = name.lower()
-    return any(token in lowered for token in ("edp", "dsi", "lvds", "panel", "default"))
+    return _INTERNAL_RE.search(name.lower()) is not None
 
 
 def _ensure_main_section(lines: List[str]) -> Tuple[int, int]:
@@ -1049,28 +1170,36 @@ def _ensure_main_comment(lines: List[str], prefix: str, value: str) -> bool:
     return True
 
 
+_RES_RE = re.compile(r"(\d{3,4})x(\d{3,4})")
+_ROT_RE = re.compile(r"270|left|180|inverted|90|right|0|normal")
+_ROT_TOKENS: Dict[str, int] = {
+    "270": 270,
+    "left": 270,
+    "180": 180,
+    "inverted": 180,
+    "90": 90,
+    "right": 90,
+    "0": 0,
+    "normal": 0,
+}
+
+
 def _extract_resolution(line: str) -> Optional[tuple[int, int]]:
-    match = re.search(r"(\d{3,4})x(\d{3,4})", line)
+    match = _RES_RE.search(line)
     if match:
         return int(match.group(1)), int(match.group(2))
     return None
 
 
 def _transform_to_rotation(value: str) -> Optional[int]:
-    lowered = value.lower()
-    if "270" in lowered or "left" in lowered:
-        return 270
-    if "180" in lowered or "inverted" in lowered:
-        return 180
-    if "90" in lowered or "right" in lowered:
-        return 90
-    if "0" in lowered or "normal" in lowered:
-        return 0
+    match = _ROT_RE.search(value.lower())
+    if match:
+        return _ROT_TOKENS[match.group(0)]
     return None
 
 
 def preseed_klipperscreen_config(display: DisplayInfo) -> None:
-    KLIPPERSCREEN_CONFIG_PATH.parent.mkdir(parents=True, exist_ok=True)
+    _ensure_dir(KLIPPERSCREEN_CONFIG_PATH.parent)
     width_line = f"width: {display.width}"
     height_line = f"height: {display.height}"
     rotation_hint = (
@@ -1078,12 +1207,25 @@ def preseed_klipperscreen_config(display: DisplayInfo) -> None:
         if display.rotation is not None
         else "# rotation_hint: 0"
     )
+    marker = (
+        f"# Auto-generated by KIAUH using {display.name} detection "
+        f"({display.width}x{display.height}, rotation {display.rotation or 0})."
+    )
     header = (
-        f"# Auto-generated by KIAUH using {display.name} detection.\n"
+        f"{marker}\n"
         "# Adjust these values if the compositor applies a different scale or rotation.\n"
     )
 
-    if not KLIPPERSCREEN_CONFIG_PATH.exists():
+    try:
+        with open(KLIPPERSCREEN_CONFIG_PATH, "rb") as config:
+            head = config.read(256)
+    except FileNotFoundError:
+        head = None
+    if head is not None and marker.encode() in head:
+        # seeded by an earlier run with the same detection results
+        return
+
+    if head is None:
         content = "\n".join(["[main]", header.strip(), width_line, height_line, rotation_hint]) + "\n"
         KLIPPERSCREEN_CONFIG_PATH.write_text(content, encoding="utf-8")
         Logger.print_ok(
@@ -1092,7 +1234,14 @@ def preseed_klipperscreen_config(display: DisplayInfo) -> None:
         return
 
     existing = KLIPPERSCREEN_CONFIG_PATH.read_text(encoding="utf-8").splitlines()
-    updated = _ensure_main_option(existing, "width", str(display.width))
+    updated = False
+    for idx, line in enumerate(existing):
+        if line.startswith("# Auto-generated by KIAUH using "):
+            if line != marker:
+                existing[idx] = marker
+                updated = True
+            break
+    updated |= _ensure_main_option(existing, "width", str(display.width))
     updated |= _ensure_main_option(existing, "height", str(display.height))
     updated |= _ensure_main_comment(
         existing,
@@ -1105,7 +1254,7 @@ def preseed_klipperscreen_config(display: DisplayInfo) -> None:
 
 
 def _apply_panorama_config(width: int, height: int) -> None:
-    KLIPPERSCREEN_CONFIG_PATH.parent.mkdir(parents=True, exist_ok=True)
+    _ensure_dir(KLIPPERSCREEN_CONFIG_PATH.parent)
     if KLIPPERSCREEN_CONFIG_PATH.exists():
         lines = KLIPPERSCREEN_CONFIG_PATH.read_text(encoding="utf-8").splitlines()
     else:
@@ -1127,7 +1276,7 @@ def _apply_panorama_config(width: int, height: int) -> None:
 
 
 def _write_panorama_script(output_name: str, width: int, height: int) -> None:
-    PANORAMA_SCRIPT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    _ensure_dir(PANORAMA_SCRIPT_PATH.parent)
     quoted_output = shlex.quote(output_name)
     script = dedent(
         f"""#!/bin/sh
@@ -1137,15 +1286,14 @@ if [ -n "$DISPLAY" ] && [ -z "$WAYLAND_DISPLAY" ] && command -v xrandr >/dev/nul
 fi
 """
     )
-    PANORAMA_SCRIPT_PATH.write_text(script, encoding="utf-8")
-    os.chmod(PANORAMA_SCRIPT_PATH, 0o755)
+    replace_text_file(PANORAMA_SCRIPT_PATH, script, 0o755)
     Logger.print_ok(
         f"Panorama X11 helper stored at {PANORAMA_SCRIPT_PATH.as_posix()}."
     )
 
 
 def _write_autorotate_script(output_name: str) -> None:
-    AUTOROTATE_SCRIPT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    _ensure_dir(AUTOROTATE_SCRIPT_PATH.parent)
     quoted_output = shlex.quote(output_name)
     script = dedent(
         f"""#!/bin/sh
@@ -1350,14 +1498,15 @@ monitor-sensor 2>/dev/null | while read -r line; do
 done
 """
     )
-    AUTOROTATE_SCRIPT_PATH.write_text(script, encoding="utf-8")
-    os.chmod(AUTOROTATE_SCRIPT_PATH, 0o755)
+    replace_text_file(AUTOROTATE_SCRIPT_PATH, script, 0o755)
     Logger.print_ok(
         f"Auto-rotation helper stored at {AUTOROTATE_SCRIPT_PATH.as_posix()}.",
     )
 
 
 def prompt_panorama_mode(display: Optional[DisplayInfo]) -> None:
+    from components.klipperscreen import KLIPPERSCREEN_SERVICE_NAME
+
     enable = get_confirm(
         "Enable panorama (horizontal) view mode for KlipperScreen?",
         default_choice=False,
@@ -1420,6 +1569,8 @@ def prompt_panorama_mode(display: Optional[DisplayInfo]) -> None:
 
 
 def prompt_auto_rotation(display: Optional[DisplayInfo]) -> None:
+    from components.klipperscreen import KLIPPERSCREEN_SERVICE_NAME
+
     enable = get_confirm(
         "Enable sensor-based auto-rotation for KlipperScreen?",
         default_choice=False,
@@ -1466,17 +1617,25 @@ def prompt_auto_rotation(display: Optional[DisplayInfo]) -> None:
 
 def _read_backend_choice(path: Path) -> Optional[str]:
     try:
-        raw = path.read_text(encoding="utf-8").strip().upper()
-    except FileNotFoundError:
+        fd = os.open(path, os.O_RDONLY | os.O_CLOEXEC)
+    except OSError:
         return None
+    try:
+        raw = os.read(fd, 8).strip().upper()
     except OSError:
         return None
-    if raw in {"X", "W"}:
-        return raw
+    finally:
+        os.close(fd)
+    if raw in (b"X", b"W"):
+        return raw.decode()
     return None
 
 
 def install_klipperscreen() -> None:
+    from components.moonraker.moonraker import Moonraker
+    from core.instance_manager.instance_manager import InstanceManager
+    from utils.instance_utils import get_instances
+
     Logger.print_status("Installing KlipperScreen ...")
 
     if not check_python_version(3, 7):
@@ -1507,9 +1666,7 @@ def install_klipperscreen() -> None:
 
     git_clone_wrapper(KLIPPERSCREEN_REPO, KLIPPERSCREEN_DIR)
     _sync_installer_script_with_asset()
-    _ensure_start_script_client_fallback()
-    _ensure_panorama_hook()
-    _ensure_autorotate_hook()
+    _patch_start_script()
 
     backend_track_path = KLIPPERSCREEN_INSTALL_SCRIPT.parent.joinpath(
         BACKEND_TRACK_FILENAME
@@ -1595,20 +1752,26 @@ def install_klipperscreen() -> None:
                 pass
 
 
+_UPDATER_OPTIONS: Tuple[Tuple[str, str], ...] = (
+    ("type", "git_repo"),
+    ("path", KLIPPERSCREEN_DIR.as_posix()),
+    ("origin", KLIPPERSCREEN_REPO),
+    ("env", f"{KLIPPERSCREEN_ENV_DIR}/bin/python"),
+    ("requirements", KLIPPERSCREEN_REQ_FILE.as_posix()),
+    ("install_script", KLIPPERSCREEN_INSTALL_SCRIPT.as_posix()),
+)
+
+
 def patch_klipperscreen_update_manager(
     instances: List[Moonraker],
     *,
     manage_systemd_service: bool = True,
 ) -> None:
+    from core.services.backup_service import BackupService
+    from utils.config_utils import add_config_section
+
     BackupService().backup_moonraker_conf()
-    options = [
-        ("type", "git_repo"),
-        ("path", KLIPPERSCREEN_DIR.as_posix()),
-        ("origin", KLIPPERSCREEN_REPO),
-        ("env", f"{KLIPPERSCREEN_ENV_DIR}/bin/python"),
-        ("requirements", KLIPPERSCREEN_REQ_FILE.as_posix()),
-        ("install_script", KLIPPERSCREEN_INSTALL_SCRIPT.as_posix()),
-    ]
+    options = list(_UPDATER_OPTIONS)
     if manage_systemd_service:
         options.insert(3, ("managed_services", "KlipperScreen"))
 
@@ -1620,6 +1783,9 @@ def patch_klipperscreen_update_manager(
 
 
 def update_klipperscreen() -> None:
+    from components.klipperscreen import KLIPPERSCREEN_SERVICE_NAME
+    from core.settings.kiauh_settings import KiauhSettings
+
     if not KLIPPERSCREEN_DIR.exists():
         Logger.print_info("KlipperScreen does not seem to be installed! Skipping ...")
         return
@@ -1634,9 +1800,7 @@ def update_klipperscreen() -> None:
             backup_klipperscreen_dir()
 
         git_pull_wrapper(KLIPPERSCREEN_DIR)
-        _ensure_start_script_client_fallback()
-        _ensure_panorama_hook()
-        _ensure_autorotate_hook()
+        _patch_start_script()
 
         install_python_requirements(KLIPPERSCREEN_ENV_DIR, KLIPPERSCREEN_REQ_FILE)
 
@@ -1649,6 +1813,8 @@ def update_klipperscreen() -> None:
 
 
 def get_klipperscreen_status() -> ComponentStatus:
+    from components.klipperscreen import KLIPPERSCREEN_SERVICE_NAME
+
     service_dir = get_service_directory()
     return get_install_status(
         KLIPPERSCREEN_DIR,
@@ -1658,20 +1824,30 @@ def get_klipperscreen_status() -> ComponentStatus:
 
 
 def remove_klipperscreen() -> None:
+    from components.klipper.klipper import Klipper
+    from components.klipperscreen import (
+        KLIPPERSCREEN_SERVICE_FILE,
+        KLIPPERSCREEN_SERVICE_NAME,
+    )
+    from components.moonraker.moonraker import Moonraker
+    from core.services.backup_service import BackupService
+    from utils.config_utils import remove_config_section
+    from utils.instance_cache import get_instances_cached
+
     Logger.print_status("Removing KlipperScreen ...")
     try:
-        if KLIPPERSCREEN_DIR.exists():
+        try:
             Logger.print_status("Removing KlipperScreen directory ...")
             shutil.rmtree(KLIPPERSCREEN_DIR)
             Logger.print_ok("KlipperScreen directory successfully removed!")
-        else:
+        except FileNotFoundError:
             Logger.print_warn("KlipperScreen directory not found!")
 
-        if KLIPPERSCREEN_ENV_DIR.exists():
+        try:
             Logger.print_status("Removing KlipperScreen environment ...")
             shutil.rmtree(KLIPPERSCREEN_ENV_DIR)
             Logger.print_ok("KlipperScreen environment successfully removed!")
-        else:
+        except FileNotFoundError:
             Logger.print_warn("KlipperScreen environment not found!")
 
         if KLIPPERSCREEN_SERVICE_FILE.exists():
@@ -1683,15 +1859,16 @@ def remove_klipperscreen() -> None:
             remove_with_sudo(logfile)
             Logger.print_ok("KlipperScreen log file successfully removed!")
 
-        kl_instances: List[Klipper] = get_instances(Klipper)
+        kl_instances: List[Klipper] = get_instances_cached(Klipper)
         for instance in kl_instances:
             logfile = instance.base.log_dir.joinpath(KLIPPERSCREEN_LOG_NAME)
-            if logfile.exists():
-                Logger.print_status(f"Removing {logfile} ...")
-                Path(logfile).unlink()
+            try:
+                logfile.unlink()
                 Logger.print_ok(f"{logfile} successfully removed!")
+            except FileNotFoundError:
+                pass
 
-        mr_instances: List[Moonraker] = get_instances(Moonraker)
+        mr_instances: List[Moonraker] = get_instances_cached(Moonraker)
         if mr_instances:
             Logger.print_status("Removing KlipperScreen from update manager ...")
             BackupService().backup_moonraker_conf()
@@ -1705,14 +1882,11 @@ def remove_klipperscreen() -> None:
 
 
 def backup_klipperscreen_dir() -> None:
-    svc = BackupService()
-    svc.backup_directory(
-        source_path=KLIPPERSCREEN_DIR,
-        backup_name="KlipperScreen",
-        target_path="KlipperScreen",
-    )
-    svc.backup_directory(
-        source_path=KLIPPERSCREEN_ENV_DIR,
-        backup_name="KlipperScreen-env",
-        target_path="KlipperScreen",
+    from core.services.backup_service import BackupService
+
+    BackupService().backup_directories(
+        [
+            (KLIPPERSCREEN_DIR, "KlipperScreen", "KlipperScreen"),
+            (KLIPPERSCREEN_ENV_DIR, "KlipperScreen-env", "KlipperScreen"),
+        ]
     )
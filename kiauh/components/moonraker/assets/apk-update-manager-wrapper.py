@@ -8,14 +8,16 @@ import re
 import shutil
 import subprocess
 import sys
-from pathlib import Path
-from typing import Iterable, List, Sequence
+import tempfile
+from collections.abc import Iterable, Sequence
+from functools import lru_cache
 
 
 class CommandError(Exception):
     """Raised when an unsupported command is requested."""
 
 
+@lru_cache(maxsize=1)
 def _ensure_apk() -> str:
     apk = shutil.which("apk")
     if not apk:
@@ -25,15 +27,16 @@ def _ensure_apk() -> str:
 
 def _run_apk(args: Sequence[str]) -> int:
     apk = _ensure_apk()
-    env = os.environ.copy()
-    env.pop("DEBIAN_FRONTEND", None)
-    result = subprocess.run([apk, *args])
+    env = None
+    if "DEBIAN_FRONTEND" in os.environ:
+        env = {k: v for k, v in os.environ.items() if k != "DEBIAN_FRONTEND"}
+    result = subprocess.run([apk, *args], env=env)
     return result.returncode
 
 
-def _parse_subcommand(args: List[str]) -> tuple[str | None, List[str]]:
+def _parse_subcommand(args: list[str]) -> tuple[str | None, list[str]]:
     subcommand: str | None = None
-    remainder: List[str] = []
+    remainder: list[str] = []
     for arg in args:
         if subcommand is None and arg.startswith("-"):
             continue
@@ -44,35 +47,54 @@ def _parse_subcommand(args: List[str]) -> tuple[str | None, List[str]]:
     return subcommand, remainder
 
 
-def _filter_packages(args: Iterable[str]) -> List[str]:
+def _filter_packages(args: Iterable[str]) -> list[str]:
     return [arg for arg in args if not arg.startswith("-")]
 
 
+_PKG_REGEX = re.compile(
+    r"^(?P<name>.+?)-(?P<oldver>\d[^\s]*)\s+available\s+\((?P<newver>[^)]+)\)"
+)
+
+
 def _apt_list_upgradable() -> int:
     apk = _ensure_apk()
-    output = subprocess.run([apk, "list", "-u"], capture_output=True, text=True)
-    if output.returncode != 0:
-        sys.stderr.write(output.stderr)
-        return output.returncode
-
-    lines = [line.strip() for line in output.stdout.splitlines() if line.strip()]
-    print("Listing...")
-    print("Done")
-    pkg_regex = re.compile(
-        r"^(?P<name>.+?)-(?P<oldver>\d[^\s]*)\s+available\s+\((?P<newver>[^)]+)\)"
-    )
-    for line in lines:
-        match = pkg_regex.match(line)
-        if not match:
-            continue
-        name = match.group("name")
-        old_version = match.group("oldver")
-        new_version = match.group("newver")
-        print(f"{name}/apk {new_version} [upgradable from: {old_version}]")
+    out = ["Listing...\n", "Done\n"]
+    # stderr goes to a file, a full stderr pipe would block apk while the
+    # output is still being read
+    with tempfile.TemporaryFile(mode="w+") as stderr:
+        with subprocess.Popen(
+            [apk, "list", "-u"],
+            stdout=subprocess.PIPE,
+            stderr=stderr,
+            bufsize=1 << 16,
+            text=True,
+        ) as proc:
+            if proc.stdout is not None:
+                for line in proc.stdout:
+                    match = _PKG_REGEX.match(line.strip())
+                    if not match:
+                        continue
+                    name, old_version, new_version = match.group(
+                        "name", "oldver", "newver"
+                    )
+                    out.append(
+                        f"{name}/apk {new_version} [upgradable from: {old_version}]\n"
+                    )
+
+        if proc.returncode != 0:
+            stderr.seek(0)
+            sys.stderr.write(stderr.read())
+            return proc.returncode
+
+    sys.stdout.writelines(out)
     return 0
 
 
-def _apt_cache_search(args: List[str]) -> int:
+_SEARCH_META_CHARS = frozenset("^$|")
+_ANCHOR_TABLE = str.maketrans("", "", "^$")
+
+
+def _apt_cache_search(args: list[str]) -> int:
     if not args:
         raise CommandError("missing search arguments")
 
@@ -82,30 +104,40 @@ def _apt_cache_search(args: List[str]) -> int:
     if len(args) < 2:
         raise CommandError("missing search pattern")
 
-    pattern = args[1]
-    pattern = pattern.strip("'\"")
-    names = [token.strip("^") for token in pattern.split("|") if token]
-    names = [name.strip("$") for name in names]
+    pattern = args[1].strip("'\"")
+    if _SEARCH_META_CHARS.isdisjoint(pattern):
+        names = [pattern] if pattern else []
+    else:
+        names = [token.translate(_ANCHOR_TABLE) for token in pattern.split("|")]
+        names = [name for name in names if name]
 
     apk = _ensure_apk()
     for name in names:
-        result = subprocess.run([apk, "search", "-e", name], capture_output=True, text=True)
-        if result.returncode != 0 or not result.stdout.strip():
+        first_line = b""
+        with subprocess.Popen(
+            [apk, "search", "-e", name],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        ) as proc:
+            if proc.stdout is not None:
+                for line in proc.stdout:
+                    if not first_line:
+                        first_line = line.strip()
+        if proc.returncode != 0 or not first_line:
             continue
-        first_line = result.stdout.splitlines()[0].strip()
-        pkg_name = first_line.split()[0].rsplit("-", 2)[0]
+        pkg_name = first_line.split()[0].rsplit(b"-", 2)[0].decode()
         print(f"{pkg_name} - apk package")
     return 0
 
 
-def handle_apt_command(args: List[str]) -> int:
+def handle_apt_command(args: list[str]) -> int:
     subcommand, remainder = _parse_subcommand(args)
     if subcommand == "list" and remainder == ["--upgradable"]:
         return _apt_list_upgradable()
     raise CommandError(f"unsupported apt command: {' '.join(args)}")
 
 
-def handle_apt_get_command(args: List[str]) -> int:
+def handle_apt_get_command(args: list[str]) -> int:
     subcommand, remainder = _parse_subcommand(args)
     packages = _filter_packages(remainder)
 
@@ -120,7 +152,7 @@ def handle_apt_get_command(args: List[str]) -> int:
     raise CommandError(f"unsupported apt-get command: {' '.join(args)}")
 
 
-def handle_apt_cache_command(args: List[str]) -> int:
+def handle_apt_cache_command(args: list[str]) -> int:
     subcommand, remainder = _parse_subcommand(args)
     if subcommand != "search":
         raise CommandError(f"unsupported apt-cache command: {' '.join(args)}")
@@ -128,7 +160,7 @@ def handle_apt_cache_command(args: List[str]) -> int:
 
 
 def main() -> int:
-    command = Path(sys.argv[0]).name
+    command = os.path.basename(sys.argv[0])
     args = sys.argv[1:]
 
     try:
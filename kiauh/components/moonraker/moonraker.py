@@ -22,7 +22,7 @@ from components.moonraker import (
     MOONRAKER_LOG_NAME,
     MOONRAKER_SERVICE_TEMPLATE,
 )
-from core.constants import CURRENT_USER
+from core.constants import get_current_user
 from core.instance_manager.base_instance import BaseInstance
 from core.logger import Logger
 from core.submodules.simple_config_parser.src.simple_config_parser.simple_config_parser import (
@@ -87,6 +87,8 @@ class Moonraker:
             raise
 
     def _prep_service_file_content(self) -> str:
+        current_user = get_current_user()
+
         template = MOONRAKER_SERVICE_TEMPLATE
 
         try:
@@ -98,7 +100,7 @@ class Moonraker:
 
         service_content = template_content.replace(
             "%USER%",
-            CURRENT_USER,
+            current_user,
         )
         service_content = service_content.replace(
             "%MOONRAKER_DIR%",
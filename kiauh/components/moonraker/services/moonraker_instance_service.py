@@ -8,12 +8,37 @@
 # ======================================================================= #
 from __future__ import annotations
 
+from dataclasses import dataclass, field
 from typing import Dict, List
 
+from components.moonraker import MOONRAKER_DEFAULT_PORT
 from components.moonraker.moonraker import Moonraker
 from utils.instance_utils import get_instances
 
 
+@dataclass
+class PortsMap:
+    ports: Dict[str, int | None] = field(default_factory=dict)
+    max_port: int | None = field(init=False, default=None)
+
+    def __post_init__(self) -> None:
+        allocated = [p for p in self.ports.values() if p is not None]
+        self.max_port = max(allocated) if allocated else None
+
+    def __getitem__(self, suffix: str) -> int | None:
+        return self.ports.get(suffix)
+
+    def __setitem__(self, suffix: str, port: int) -> None:
+        self.ports[suffix] = port
+        if self.max_port is None or port > self.max_port:
+            self.max_port = port
+
+    def next_free(self) -> int:
+        if self.max_port is None:
+            return MOONRAKER_DEFAULT_PORT
+        return self.max_port + 1
+
+
 class MoonrakerInstanceService:
     __cls_instance = None
     __instances: List[Moonraker] = []
@@ -45,5 +70,5 @@ class MoonrakerInstanceService:
         instances: List[Moonraker] = [i for i in self.__instances if i.suffix == suffix]
         return instances[0] if instances else None
 
-    def get_instance_port_map(self) -> Dict[str, int]:
-        return {i.suffix: i.port for i in self.__instances}
+    def get_instance_port_map(self) -> PortsMap:
+        return PortsMap({i.suffix: i.port for i in self.__instances})
@@ -7,20 +7,23 @@
 #  This file may be distributed under the terms of the GNU GPLv3 license  #
 # ======================================================================= #
 import json
+import os
+import shlex
 import shutil
+from functools import lru_cache
 from pathlib import Path
 from subprocess import DEVNULL, PIPE, CalledProcessError, run
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set, Tuple
 
 from components.moonraker import (
     MODULE_PATH,
-    MOONRAKER_DEFAULT_PORT,
     MOONRAKER_DEPS_JSON_FILE,
     MOONRAKER_DIR,
     MOONRAKER_ENV_DIR,
     MOONRAKER_INSTALL_SCRIPT,
 )
 from components.moonraker.moonraker import Moonraker
+from components.moonraker.services.moonraker_instance_service import PortsMap
 from components.moonraker.utils.sysdeps_parser import SysDepsParser
 from components.webui_client.base_data import BaseWebClient
 from core.logger import Logger
@@ -30,8 +33,8 @@ from core.submodules.simple_config_parser.src.simple_config_parser.simple_config
 )
 from core.types.component_status import ComponentStatus
 from utils.common import check_install_dependencies, get_install_status
-from utils.fs_utils import create_symlink, remove_with_sudo
-from utils.instance_utils import get_instances
+from utils.fs_utils import remove_with_sudo
+from utils.instance_cache import get_instances_cached
 from utils.sys_utils import (
     PackageManager,
     get_ipv4_addr,
@@ -50,6 +53,31 @@ APK_UPDATE_LINKS = {
 }
 
 
+# parsed moonraker.conf files keyed by path, only reused while the mtime matches
+_SCP_CACHE: Dict[Path, Tuple[int, SimpleConfigParser]] = {}
+
+
+def _read_moonraker_conf(cfg_path: Path) -> SimpleConfigParser:
+    mtime_ns = cfg_path.stat().st_mtime_ns
+    cached = _SCP_CACHE.get(cfg_path)
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
+
+    scp = SimpleConfigParser()
+    scp.read_file(cfg_path)
+    _SCP_CACHE[cfg_path] = (mtime_ns, scp)
+    return scp
+
+
+def _write_moonraker_conf(cfg_path: Path, scp: SimpleConfigParser) -> None:
+    try:
+        scp.write_file(cfg_path)
+    except Exception:
+        _SCP_CACHE.pop(cfg_path, None)
+        raise
+    _SCP_CACHE[cfg_path] = (cfg_path.stat().st_mtime_ns, scp)
+
+
 def get_moonraker_status() -> ComponentStatus:
     return get_install_status(MOONRAKER_DIR, MOONRAKER_ENV_DIR, Moonraker)
 
@@ -57,42 +85,37 @@ def get_moonraker_status() -> ComponentStatus:
 def install_moonraker_packages() -> None:
     Logger.print_status("Parsing Moonraker system dependencies  ...")
 
-    moonraker_deps: List[str] = []
-    sysdeps: Dict[str, List[str]] = {}
-    parser: SysDepsParser | None = None
+    moonraker_deps: Set[str] = set()
     if MOONRAKER_DEPS_JSON_FILE.exists():
         Logger.print_info(
             f"Parsing system dependencies from {MOONRAKER_DEPS_JSON_FILE.name} ..."
         )
-        parser = SysDepsParser()
         sysdeps = load_sysdeps_json(MOONRAKER_DEPS_JSON_FILE)
-        moonraker_deps.extend(parser.parse_dependencies(sysdeps))
-
-    elif MOONRAKER_INSTALL_SCRIPT.exists():
-        Logger.print_warn(f"{MOONRAKER_DEPS_JSON_FILE.name} not found!")
-        Logger.print_info(
-            f"Parsing system dependencies from {MOONRAKER_INSTALL_SCRIPT.name} ..."
-        )
-        moonraker_deps = parse_packages_from_file(MOONRAKER_INSTALL_SCRIPT)
+        moonraker_deps.update(SysDepsParser().parse_dependencies(sysdeps))
 
-    if not moonraker_deps and sysdeps:
-        manager = get_package_manager()
         if (
-            manager == PackageManager.APK
-            and parser is not None
+            not moonraker_deps
             and "debian" in sysdeps
+            and get_package_manager() == PackageManager.APK
         ):
             Logger.print_warn(
                 "Moonraker's system-dependencies.json does not define a postmarketOS/"
                 "Alpine section. Reusing the Debian dependency list and translating it "
                 "for apk."
             )
-            moonraker_deps = sysdeps["debian"]
+            moonraker_deps.update(sysdeps["debian"])
+
+    elif MOONRAKER_INSTALL_SCRIPT.exists():
+        Logger.print_warn(f"{MOONRAKER_DEPS_JSON_FILE.name} not found!")
+        Logger.print_info(
+            f"Parsing system dependencies from {MOONRAKER_INSTALL_SCRIPT.name} ..."
+        )
+        moonraker_deps.update(parse_packages_from_file(MOONRAKER_INSTALL_SCRIPT))
 
     if not moonraker_deps:
         raise ValueError("Error parsing Moonraker dependencies!")
 
-    check_install_dependencies({*moonraker_deps})
+    check_install_dependencies(moonraker_deps)
 
 
 def _sudo_run(command: List[str], error_message: str) -> bool:
@@ -108,6 +131,22 @@ def _sudo_run(command: List[str], error_message: str) -> bool:
     return True
 
 
+def _apk_update_dropin_is_current() -> bool:
+    target = APK_UPDATE_TARGET.as_posix()
+    try:
+        target_stat = os.stat(target)
+        if target_stat.st_mode & 0o777 != 0o755:
+            return False
+        if target_stat.st_size != os.stat(APK_UPDATE_WRAPPER).st_size:
+            return False
+        if any(os.readlink(link) != target for link in APK_UPDATE_LINKS.values()):
+            return False
+        # the wrapper is only a few kilobytes, compare the content directly
+        return APK_UPDATE_TARGET.read_bytes() == APK_UPDATE_WRAPPER.read_bytes()
+    except OSError:
+        return False
+
+
 def ensure_apk_update_manager_dropin() -> bool:
     manager = get_package_manager()
     if manager != PackageManager.APK:
@@ -119,29 +158,25 @@ def ensure_apk_update_manager_dropin() -> bool:
         )
         return False
 
-    target_dir = APK_UPDATE_TARGET.parent
-    if not _sudo_run(["sudo", "mkdir", "-p", target_dir.as_posix()], "Failed to create drop-in directory"):
-        return False
+    if _apk_update_dropin_is_current():
+        return True
+
+    # install the wrapper and all its links with a single privileged shell
+    target = shlex.quote(APK_UPDATE_TARGET.as_posix())
+    commands = [
+        f"mkdir -p {shlex.quote(APK_UPDATE_TARGET.parent.as_posix())}",
+        f"cp -f {shlex.quote(APK_UPDATE_WRAPPER.as_posix())} {target}",
+        f"chmod 0755 {target}",
+        *(
+            f"ln -sf {target} {shlex.quote(link.as_posix())}"
+            for link in APK_UPDATE_LINKS.values()
+        ),
+    ]
     if not _sudo_run(
-        ["sudo", "cp", "-f", APK_UPDATE_WRAPPER.as_posix(), APK_UPDATE_TARGET.as_posix()],
+        ["sudo", "sh", "-c", " && ".join(commands)],
         "Failed to install apk update manager wrapper",
     ):
         return False
-    if not _sudo_run(
-        ["sudo", "chmod", "0755", APK_UPDATE_TARGET.as_posix()],
-        "Failed to adjust apk update manager wrapper permissions",
-    ):
-        return False
-
-    installed_links = True
-    for link in APK_UPDATE_LINKS.values():
-        try:
-            create_symlink(APK_UPDATE_TARGET, link, sudo=True)
-        except CalledProcessError as exc:
-            Logger.print_error(f"Failed to create symlink for {link.name}: {exc}")
-            installed_links = False
-    if not installed_links:
-        return False
 
     Logger.print_ok("Installed apk compatibility wrappers for Moonraker system updates.")
     return True
@@ -175,7 +210,7 @@ def remove_polkit_rules() -> bool:
 
 def create_example_moonraker_conf(
     instance: Moonraker,
-    ports_map: Dict[str, int],
+    ports_map: PortsMap,
     clients: Optional[List[BaseWebClient]] = None,
 ) -> None:
     Logger.print_status(f"Creating example moonraker.conf in '{instance.base.cfg_dir}'")
@@ -191,20 +226,14 @@ def create_example_moonraker_conf(
         Logger.print_error(f"Unable to create example moonraker.conf:\n{e}")
         return
 
-    ports = [
-        ports_map.get(instance)
-        for instance in ports_map
-        if ports_map.get(instance) is not None
-    ]
-    if ports_map.get(instance.suffix) is None:
+    port = ports_map[instance.suffix]
+    if port is None:
         # this could be improved to not increment the max value of the ports list and assign it as the port
         # as it can lead to situation where the port for e.g. instance moonraker-2 becomes 7128 if the port
         # of moonraker-1 is 7125 and moonraker-3 is 7127 and there are moonraker.conf files for moonraker-1
         # and moonraker-3 already. though, there does not seem to be a very reliable way of always assigning
         # the correct port to each instance and the user will likely be required to correct the value manually.
-        port = max(ports) + 1 if ports else MOONRAKER_DEFAULT_PORT
-    else:
-        port = ports_map.get(instance.suffix)
+        port = ports_map.next_free()
 
     ports_map[instance.suffix] = port
 
@@ -212,15 +241,13 @@ def create_example_moonraker_conf(
     ip.extend(["0", "0/16"])
     uds = instance.base.comms_dir.joinpath("klippy.sock")
 
-    scp = SimpleConfigParser()
-    scp.read_file(target)
+    scp = _read_moonraker_conf(target)
     trusted_clients: List[str] = [
         f"    {'.'.join(ip)}\n",
         *scp.getvals("authorization", "trusted_clients"),
     ]
 
-    scp.set_option("server", "port", str(port))
-    scp.set_option("server", "klippy_uds_address", str(uds))
+    scp.update_options("server", {"port": str(port), "klippy_uds_address": str(uds)})
     scp.set_option("authorization", "trusted_clients", trusted_clients)
 
     manager = get_package_manager()
@@ -241,32 +268,30 @@ def create_example_moonraker_conf(
         for c in clients:
             # client part
             c_section = f"update_manager {c.name}"
-            c_options = [
-                ("type", "web"),
-                ("channel", "stable"),
-                ("repo", c.repo_path),
-                ("path", c.client_dir),
-            ]
+            c_options: Dict[str, str | List[str]] = {
+                "type": "web",
+                "channel": "stable",
+                "repo": c.repo_path,
+                "path": str(c.client_dir),
+            }
             scp.add_section(section=c_section)
-            for option in c_options:
-                scp.set_option(c_section, option[0], option[1])
+            scp.update_options(c_section, c_options)
 
             # client config part
             c_config = c.client_config
             if c_config.config_dir.exists():
                 c_config_section = f"update_manager {c_config.name}"
-                c_config_options = [
-                    ("type", "git_repo"),
-                    ("primary_branch", "master"),
-                    ("path", c_config.config_dir),
-                    ("origin", c_config.repo_url),
-                    ("managed_services", "klipper"),
-                ]
+                c_config_options: Dict[str, str | List[str]] = {
+                    "type": "git_repo",
+                    "primary_branch": "master",
+                    "path": str(c_config.config_dir),
+                    "origin": c_config.repo_url,
+                    "managed_services": "klipper",
+                }
                 scp.add_section(section=c_config_section)
-                for option in c_config_options:
-                    scp.set_option(c_config_section, option[0], option[1])
+                scp.update_options(c_config_section, c_config_options)
 
-    scp.write_file(target)
+    _write_moonraker_conf(target, scp)
     if manager == PackageManager.APK:
         configure_apk_update_manager([instance])
     Logger.print_ok(f"Example moonraker.conf created in '{instance.base.cfg_dir}'")
@@ -283,7 +308,7 @@ def configure_apk_update_manager(
         return False
 
     if not instances:
-        instances = get_instances(Moonraker)
+        instances = get_instances_cached(Moonraker)
 
     if not instances:
         return True
@@ -294,8 +319,7 @@ def configure_apk_update_manager(
         if not cfg_path.exists():
             continue
 
-        scp = SimpleConfigParser()
-        scp.read_file(cfg_path)
+        scp = _read_moonraker_conf(cfg_path)
         updated = False
         if scp.getval("update_manager", "enable_system_updates", fallback="True") == "False":
             scp.set_option("update_manager", "enable_system_updates", "True")
@@ -305,7 +329,7 @@ def configure_apk_update_manager(
             updated = True
 
         if updated:
-            scp.write_file(cfg_path)
+            _write_moonraker_conf(cfg_path, scp)
             updated_any = True
 
     if updated_any:
@@ -322,7 +346,7 @@ def disable_system_updates(instances: Optional[List[Moonraker]] = None) -> None:
         return
 
     if not instances:
-        instances = get_instances(Moonraker)
+        instances = get_instances_cached(Moonraker)
 
     if not instances:
         return
@@ -333,12 +357,11 @@ def disable_system_updates(instances: Optional[List[Moonraker]] = None) -> None:
         if not cfg_path.exists():
             continue
 
-        scp = SimpleConfigParser()
-        scp.read_file(cfg_path)
+        scp = _read_moonraker_conf(cfg_path)
         if scp.getval("update_manager", "enable_system_updates", fallback="True") == "False":
             continue
         scp.set_option("update_manager", "enable_system_updates", "False")
-        scp.write_file(cfg_path)
+        _write_moonraker_conf(cfg_path, scp)
         updated = True
 
     if updated:
@@ -348,19 +371,16 @@ def disable_system_updates(instances: Optional[List[Moonraker]] = None) -> None:
 
 
 def backup_moonraker_dir() -> None:
-    svc = BackupService()
-    svc.backup_directory(
-        source_path=MOONRAKER_DIR, backup_name="moonraker", target_path="moonraker"
-    )
-    svc.backup_directory(
-        source_path=MOONRAKER_ENV_DIR,
-        backup_name="moonraker-env",
-        target_path="moonraker",
+    BackupService().backup_directories(
+        [
+            (MOONRAKER_DIR, "moonraker", "moonraker"),
+            (MOONRAKER_ENV_DIR, "moonraker-env", "moonraker"),
+        ]
     )
 
 
 def backup_moonraker_db_dir() -> None:
-    instances: List[Moonraker] = get_instances(Moonraker)
+    instances: List[Moonraker] = get_instances_cached(Moonraker)
     svc = BackupService()
 
     if not instances:
@@ -370,37 +390,46 @@ def backup_moonraker_db_dir() -> None:
             "Attempting to find printer data directories in home directory..."
         )
 
-        home_dir = Path.home()
-        printer_data_dirs = []
-
-        for pattern in ["printer_data", "printer_*_data"]:
-            for data_dir in home_dir.glob(pattern):
-                if data_dir.is_dir():
-                    printer_data_dirs.append(data_dir)
+        printer_data_dirs: List[Path] = []
+        with os.scandir(Path.home()) as entries:
+            for entry in entries:
+                name = entry.name
+                if name != "printer_data" and not (
+                    name.startswith("printer_") and name.endswith("_data")
+                ):
+                    continue
+                if entry.is_dir():
+                    printer_data_dirs.append(Path(entry.path))
 
         if not printer_data_dirs:
             Logger.print_info("Unable to find directory to backup!")
             Logger.print_info("No printer data directories found in home directory.")
             return
 
-        for data_dir in printer_data_dirs:
-            svc.backup_directory(
-                source_path=data_dir.joinpath("database"),
-                target_path=data_dir.name,
-                backup_name="database",
-            )
+        svc.backup_directories(
+            [
+                (data_dir.joinpath("database"), "database", data_dir.name)
+                for data_dir in printer_data_dirs
+            ]
+        )
 
         return
 
-    for instance in instances:
-        svc.backup_directory(
-            source_path=instance.db_dir,
-            target_path=f"{instance.data_dir.name}",
-            backup_name="database",
-        )
+    svc.backup_directories(
+        [
+            (instance.db_dir, "database", f"{instance.data_dir.name}")
+            for instance in instances
+        ]
+    )
 
 
 def load_sysdeps_json(file: Path) -> Dict[str, List[str]]:
+    return _load_sysdeps_json_cached(file, file.stat().st_mtime_ns)
+
+
+@lru_cache(maxsize=4)
+def _load_sysdeps_json_cached(file: Path, mtime_ns: int) -> Dict[str, List[str]]:
+    # mtime_ns is only part of the cache key, so an updated file is re-parsed
     try:
         sysdeps: Dict[str, List[str]] = json.loads(file.read_bytes())
     except json.JSONDecodeError as e:
@@ -6,11 +6,11 @@
 #                                                                         #
 #  This file may be distributed under the terms of the GNU GPLv3 license  #
 # ======================================================================= #
+from __future__ import annotations
 
-
-import shlex
+import re
 from pathlib import Path
-from typing import List, Optional
+from typing import List
 
 from components.klipper.klipper import Klipper
 from components.moonraker.moonraker import Moonraker
@@ -19,10 +19,9 @@ from core.logger import Logger
 from core.services.backup_service import BackupService
 from core.services.message_service import Message
 from core.types.color import Color
-from utils.config_utils import remove_config_section
+from utils.config_utils import ConfigEditSession, remove_config_section
 from utils.fs_utils import run_remove_routines
 from utils.instance_type import InstanceType
-from utils.instance_utils import get_instances
 
 
 def run_client_config_removal(
@@ -44,13 +43,15 @@ def run_client_config_removal(
 
     BackupService().backup_printer_config_dir()
 
-    completion_msg = remove_moonraker_config_section(
-        completion_msg, client_config, mr_instances
-    )
+    # read every config once and write each changed one back a single time
+    with ConfigEditSession() as session:
+        completion_msg = remove_moonraker_config_section(
+            completion_msg, client_config, mr_instances, session
+        )
 
-    completion_msg = remove_printer_config_section(
-        completion_msg, client_config, kl_instances
-    )
+        completion_msg = remove_printer_config_section(
+            completion_msg, client_config, kl_instances, session
+        )
 
     if completion_msg.text:
         completion_msg.text.insert(0, "The following actions were performed:")
@@ -65,11 +66,10 @@ def run_client_config_removal(
 def remove_cfg_symlink(
     client_config: BaseWebClientConfig,
     message: Message,
-    kl_instances: Optional[List[Klipper]] = None,
+    kl_instances: List[Klipper],
 ) -> Message:
-    instances: List[Klipper] = kl_instances or get_instances(Klipper)
     removed_from: List[Klipper] = []
-    for instance in instances:
+    for instance in kl_instances:
         cfg = instance.base.cfg_dir.joinpath(client_config.config_filename)
         if run_remove_routines(cfg):
             removed_from.append(instance)
@@ -78,15 +78,18 @@ def remove_cfg_symlink(
 
 
 def remove_printer_config_section(
-    message: Message, client_config: BaseWebClientConfig, kl_instances: List[Klipper]
+    message: Message,
+    client_config: BaseWebClientConfig,
+    kl_instances: List[Klipper],
+    session: ConfigEditSession | None = None,
 ) -> Message:
     kl_section = client_config.config_section
-    removed_sections = remove_config_section(kl_section, kl_instances)
+    removed_sections = remove_config_section(kl_section, kl_instances, session)
     text = f"Klipper config section '{kl_section}' removed for instance"
     message = update_msg(removed_sections, message, text)
 
     disabled_includes = disable_plain_include(
-        client_config.config_filename, kl_instances
+        client_config.config_filename, kl_instances, session
     )
     text = (
         f"Inline include for '{client_config.config_filename}' disabled in instance"
@@ -94,52 +97,53 @@ def remove_printer_config_section(
     return update_msg(disabled_includes, message, text)
 
 
+# matches a plain "include <file>" line, optionally followed by a comment
+_INCLUDE_RE = re.compile(
+    r"^(?P<lead>[ \t]*)include[ \t]+(?P<target>[^\s#;]+)[ \t]*(?:[#;].*)?$",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+
 def disable_plain_include(
-    filename: str, instances: List[Klipper]
+    filename: str,
+    instances: List[Klipper],
+    session: ConfigEditSession | None = None,
 ) -> List[Klipper]:
     affected: List[Klipper] = []
+    changed = False
+
+    def _disable(match: re.Match[str]) -> str:
+        nonlocal changed
+        if Path(match["target"].strip("'\"")).name != filename:
+            return match[0]
+        changed = True
+        body = match.string[match.end("lead") : match.end()]
+        return f"{match['lead']}# {body}  # disabled by KIAUH"
+
     for instance in instances:
         cfg_file = instance.cfg_file
-        if not cfg_file.exists():
+        if session is not None:
+            text = session.read(cfg_file)
+            if text is None:
+                Logger.print_warn(f"'{cfg_file}' not found!")
+                continue
+        elif not cfg_file.exists():
             Logger.print_warn(f"'{cfg_file}' not found!")
             continue
-
-        try:
-            lines = cfg_file.read_text(encoding="utf-8").splitlines(keepends=True)
-        except OSError as e:
-            Logger.print_error(f"Unable to read '{cfg_file}':\n{e}")
-            continue
-
-        changed = False
-        updated: List[str] = []
-        for line in lines:
-            stripped = line.strip()
-            if not stripped or stripped.startswith(("#", ";")):
-                updated.append(line)
-                continue
-
+        else:
             try:
-                tokens = shlex.split(stripped, comments=True, posix=True)
-            except ValueError:
-                updated.append(line)
+                text = cfg_file.read_text(encoding="utf-8")
+            except OSError as e:
+                Logger.print_error(f"Unable to read '{cfg_file}':\n{e}")
                 continue
 
-            if len(tokens) < 2 or tokens[0].lower() != "include":
-                updated.append(line)
-                continue
+        # most configs never mention the file, skip them without a regex pass
+        if filename not in text:
+            continue
 
-            include_target = Path(tokens[1]).name
-            if include_target != filename:
-                updated.append(line)
-                continue
+        changed = False
 
-            leading = line[: len(line) - len(line.lstrip())]
-            body = line.lstrip().rstrip("\n")
-            newline = "\n" if line.endswith("\n") else ""
-            updated.append(
-                f"{leading}# {body}  # disabled by KIAUH{newline}"
-            )
-            changed = True
+        updated = _INCLUDE_RE.sub(_disable, text)
 
         if not changed:
             continue
@@ -147,8 +151,13 @@ def disable_plain_include(
         Logger.print_status(
             f"Disable inline include '{filename}' in '{cfg_file}' ..."
         )
+        if session is not None:
+            # the session reports the result once the file is written
+            session.update(cfg_file, updated)
+            affected.append(instance)
+            continue
         try:
-            cfg_file.write_text("".join(updated), encoding="utf-8")
+            cfg_file.write_text(updated, encoding="utf-8")
         except OSError as e:
             Logger.print_error(f"Unable to update '{cfg_file}':\n{e}")
             continue
@@ -159,10 +168,13 @@ def disable_plain_include(
 
 
 def remove_moonraker_config_section(
-    message: Message, client_config: BaseWebClientConfig, mr_instances: List[Moonraker]
+    message: Message,
+    client_config: BaseWebClientConfig,
+    mr_instances: List[Moonraker],
+    session: ConfigEditSession | None = None,
 ) -> Message:
     mr_section = f"update_manager {client_config.name}"
-    mr_instances = remove_config_section(mr_section, mr_instances)
+    mr_instances = remove_config_section(mr_section, mr_instances, session)
     text = f"Moonraker config section '{mr_section}' removed for instance"
     return update_msg(mr_instances, message, text)
 
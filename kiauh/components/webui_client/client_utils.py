@@ -9,11 +9,15 @@
 from __future__ import annotations
 
 import json
+import os
 import re
+import shlex
 import shutil
+import time
+from functools import lru_cache
 from pathlib import Path
 from subprocess import PIPE, CalledProcessError, run
-from typing import List, get_args
+from typing import Dict, List, Tuple
 
 from components.klipper.klipper import Klipper
 from components.webui_client import MODULE_PATH
@@ -25,9 +29,10 @@ from components.webui_client.client_dialogs import print_client_port_select_dial
 from components.webui_client.fluidd_data import FluiddData
 from components.webui_client.mainsail_data import MainsailData
 from core.constants import (
-    NGINX_CONFD,
     NGINX_SITES_AVAILABLE,
     NGINX_SITES_ENABLED,
+    get_nginx_confd,
+    read_nginx_main_conf,
 )
 from core.logger import Logger
 from core.services.backup_service import BackupService
@@ -38,23 +43,23 @@ from core.submodules.simple_config_parser.src.simple_config_parser.simple_config
 from core.types.color import Color
 from core.types.component_status import ComponentStatus
 from utils.common import get_install_status
-from utils.fs_utils import create_symlink, remove_file
 from utils.git_utils import (
     get_latest_remote_tag,
     get_latest_unstable_tag,
 )
 from utils.input_utils import get_number_input
-from utils.instance_utils import get_instances
+from utils.instance_cache import get_instances_cached
 from utils.sudo_session import ensure_sudo_session
 
 
 def get_client_status(
     client: BaseWebClient, fetch_remote: bool = False
 ) -> ComponentStatus:
+    nginx_confd = get_nginx_confd()
     files = [
         NGINX_SITES_AVAILABLE.joinpath(client.name),
-        NGINX_CONFD.joinpath("upstreams.conf"),
-        NGINX_CONFD.joinpath("common_vars.conf"),
+        nginx_confd.joinpath("upstreams.conf"),
+        nginx_confd.joinpath("common_vars.conf"),
     ]
     comp_status: ComponentStatus = get_install_status(client.client_dir, files=files)
 
@@ -72,6 +77,31 @@ def get_client_config_status(client: BaseWebClient) -> ComponentStatus:
     return get_install_status(client.client_config.config_dir)
 
 
+def _printer_cfg_has_sections(
+    cfg_file: Path, sections: Tuple[str, ...]
+) -> Tuple[bool, ...]:
+    # the main menu asks for the current client config on every redraw, only
+    # look at a printer.cfg again once it was modified
+    return _printer_cfg_has_sections_cached(
+        cfg_file, cfg_file.stat().st_mtime_ns, sections
+    )
+
+
+@lru_cache(maxsize=8)
+def _printer_cfg_has_sections_cached(
+    cfg_file: Path, mtime_ns: int, sections: Tuple[str, ...]
+) -> Tuple[bool, ...]:
+    content = cfg_file.read_bytes()
+    candidates = [s for s in sections if f"[{s}]".encode() in content]
+    if not candidates:
+        return tuple(False for _ in sections)
+
+    # a header may also show up in a comment, let the parser have the final say
+    scp = SimpleConfigParser()
+    scp.read_file(cfg_file)
+    return tuple(s in candidates and scp.has_section(s) for s in sections)
+
+
 def get_current_client_config() -> str:
     mainsail, fluidd = MainsailData(), FluiddData()
     clients: List[BaseWebClient] = [mainsail, fluidd]
@@ -86,12 +116,15 @@ def get_current_client_config() -> str:
     # at this point, both client config folders exists, so we need to check
     # which are actually included in the printer.cfg of all klipper instances
     mainsail_includes, fluidd_includes = [], []
-    klipper_instances: List[Klipper] = get_instances(Klipper)
+    klipper_instances: List[Klipper] = get_instances_cached(Klipper)
     for instance in klipper_instances:
-        scp = SimpleConfigParser()
-        scp.read_file(instance.cfg_file)
-        includes_mainsail = scp.has_section(mainsail.client_config.config_section)
-        includes_fluidd = scp.has_section(fluidd.client_config.config_section)
+        includes_mainsail, includes_fluidd = _printer_cfg_has_sections(
+            instance.cfg_file,
+            (
+                mainsail.client_config.config_section,
+                fluidd.client_config.config_section,
+            ),
+        )
 
         if includes_mainsail:
             mainsail_includes.append(instance)
@@ -117,18 +150,16 @@ def get_current_client_config() -> str:
 def enable_mainsail_remotemode() -> None:
     Logger.print_status("Enable Mainsails remote mode ...")
     c_json = MainsailData().client_dir.joinpath("config.json")
-    with open(c_json, "r") as f:
-        config_data = json.load(f)
+    config_data = json.loads(c_json.read_bytes())
 
-    if config_data["instancesDB"] == "browser" or config_data["instancesDB"] == "json":
+    if config_data["instancesDB"] in ("browser", "json"):
         Logger.print_info("Remote mode already configured. Skipped ...")
         return
 
     Logger.print_status("Setting instance storage location to 'browser' ...")
     config_data["instancesDB"] = "browser"
 
-    with open(c_json, "w") as f:
-        json.dump(config_data, f, indent=4)
+    c_json.write_text(json.dumps(config_data, indent=4))
     Logger.print_ok("Mainsails remote mode enabled!")
 
 
@@ -136,34 +167,36 @@ def symlink_webui_nginx_log(
     client: BaseWebClient, klipper_instances: List[Klipper]
 ) -> None:
     Logger.print_status("Link NGINX logs into log directory ...")
-    access_log = client.nginx_access_log
-    error_log = client.nginx_error_log
+    logs = (
+        (client.nginx_access_log, client.nginx_access_log.name),
+        (client.nginx_error_log, client.nginx_error_log.name),
+    )
 
     for instance in klipper_instances:
-        desti_access = instance.base.log_dir.joinpath(access_log.name)
-        if not desti_access.exists():
-            desti_access.symlink_to(access_log)
-
-        desti_error = instance.base.log_dir.joinpath(error_log.name)
-        if not desti_error.exists():
-            desti_error.symlink_to(error_log)
+        log_dir = instance.base.log_dir
+        for log, name in logs:
+            try:
+                log_dir.joinpath(name).symlink_to(log)
+            except FileExistsError:
+                pass
 
 
 def get_local_client_version(client: BaseWebClient) -> str | None:
     relinfo_file = client.client_dir.joinpath("release_info.json")
     version_file = client.client_dir.joinpath(".version")
 
-    if not client.client_dir.exists():
-        return None
-    if not relinfo_file.is_file() and not version_file.is_file():
-        return "n/a"
+    try:
+        return str(json.loads(relinfo_file.read_bytes())["version"])
+    except FileNotFoundError:
+        pass
 
-    if relinfo_file.is_file():
-        with open(relinfo_file, "r") as f:
-            return str(json.load(f)["version"])
-    else:
+    try:
         with open(version_file, "r") as f:
-            return f.readlines()[0]
+            return f.readline().rstrip("\n")
+    except FileNotFoundError:
+        pass
+
+    return "n/a" if client.client_dir.exists() else None
 
 
 def get_remote_client_version(client: BaseWebClient) -> str | None:
@@ -175,13 +208,16 @@ def get_remote_client_version(client: BaseWebClient) -> str | None:
         return None
 
 
-def backup_client_data(client: BaseWebClient) -> None:
-    version = ""
-    src = client.client_dir
-    if src.joinpath(".version").exists():
-        with open(src.joinpath(".version"), "r") as v:
-            version = v.readlines()[0]
+def _read_client_version_file(client_dir: Path) -> str:
+    try:
+        content = client_dir.joinpath(".version").read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return ""
+    return content.partition("\n")[0]
+
 
+def backup_client_data(client: BaseWebClient) -> None:
+    version = _read_client_version_file(client.client_dir)
     svc = BackupService()
     target_path = svc.backup_root.joinpath(f"{client.client_dir.name}_{version}")
     svc.backup_directory(
@@ -196,12 +232,7 @@ def backup_client_data(client: BaseWebClient) -> None:
 
 
 def backup_client_config_data(client: BaseWebClient) -> None:
-    version = ""
-    src = client.client_dir
-    if src.joinpath(".version").exists():
-        with open(src.joinpath(".version"), "r") as v:
-            version = v.readlines()[0]
-
+    version = _read_client_version_file(client.client_dir)
     svc = BackupService()
     target_path = svc.backup_root.joinpath(f"{client.client_dir.name}_{version}")
     svc.backup_directory(
@@ -211,25 +242,17 @@ def backup_client_config_data(client: BaseWebClient) -> None:
     )
 
 
-def get_existing_clients() -> List[BaseWebClient]:
-    """Return metadata objects for all installed web UIs."""
-
-    client_factories = {
-        WebClientType.MAINSAIL: MainsailData,
-        WebClientType.FLUIDD: FluiddData,
-    }
+_CLIENT_FACTORIES: Tuple[Tuple[WebClientType, type], ...] = (
+    (WebClientType.MAINSAIL, MainsailData),
+    (WebClientType.FLUIDD, FluiddData),
+)
 
-    installed_clients: List[BaseWebClient] = []
-    for client_type in get_args(WebClientType):
-        factory = client_factories.get(client_type)
-        if factory is None:
-            continue
 
-        client = factory()
-        if client.client_dir.exists():
-            installed_clients.append(client)
+def get_existing_clients() -> List[BaseWebClient]:
+    """Return metadata objects for all installed web UIs."""
 
-    return installed_clients
+    clients = (factory() for _, factory in _CLIENT_FACTORIES)
+    return [client for client in clients if client.client_dir.exists()]
 
 
 def detect_client_cfg_conflict(curr_client: BaseWebClient) -> bool:
@@ -252,6 +275,25 @@ def detect_client_cfg_conflict(curr_client: BaseWebClient) -> bool:
     return False
 
 
+_UNSTABLE_TAG_TTL = 300.0
+_UNSTABLE_TAG_CACHE: Dict[str, Tuple[float, str]] = {}
+
+
+def _get_latest_unstable_tag_cached(repo_path: str) -> str:
+    # every MainsailData/FluiddData instance resolves its download url, don't
+    # ask GitHub for the same tag list each time one of them is created
+    now = time.monotonic()
+    cached = _UNSTABLE_TAG_CACHE.get(repo_path)
+    if cached is not None and now - cached[0] < _UNSTABLE_TAG_TTL:
+        return cached[1]
+
+    tag = get_latest_unstable_tag(repo_path)
+    # an empty tag is also what a non-200 response yields, retry those
+    if tag:
+        _UNSTABLE_TAG_CACHE[repo_path] = (now, tag)
+    return tag
+
+
 def get_download_url(base_url: str, client: BaseWebClient) -> str:
     settings = KiauhSettings()
     use_unstable = settings.get(client.name, "unstable_releases")
@@ -261,7 +303,7 @@ def get_download_url(base_url: str, client: BaseWebClient) -> str:
         return stable_url
 
     try:
-        unstable_tag = get_latest_unstable_tag(client.repo_path)
+        unstable_tag = _get_latest_unstable_tag_cached(client.repo_path)
         if unstable_tag == "":
             raise Exception
         return f"{base_url}/download/{unstable_tag}/{client.name}.zip"
@@ -282,17 +324,30 @@ def _nginx_has_sites_include() -> bool:
         f"include {NGINX_SITES_ENABLED.as_posix()}/*.conf;",
     )
 
-    candidate_files = [Path("/etc/nginx/nginx.conf")]
-    if NGINX_CONFD.exists():
-        candidate_files.extend(sorted(NGINX_CONFD.glob("*.conf")))
+    main_conf = read_nginx_main_conf()
+    if any(pattern in main_conf for pattern in include_patterns):
+        return True
 
-    for candidate in candidate_files:
+    try:
+        with os.scandir(get_nginx_confd()) as entries:
+            candidates = [
+                entry.path
+                for entry in entries
+                if entry.name.endswith(".conf") and entry.is_file()
+            ]
+    except OSError:
+        return False
+
+    # compare raw bytes, there is no need to decode the whole file
+    byte_patterns = [pattern.encode("utf-8") for pattern in include_patterns]
+    for candidate in candidates:
         try:
-            content = candidate.read_text(encoding="utf-8")
-        except (OSError, UnicodeDecodeError):
+            with open(candidate, "rb") as f:
+                content = f.read()
+        except OSError:
             continue
 
-        if any(pattern in content for pattern in include_patterns):
+        if any(pattern in content for pattern in byte_patterns):
             return True
 
     return False
@@ -311,7 +366,7 @@ def _ensure_nginx_sites_include() -> None:
         # caller can abort before we attempt to write into a missing directory.
         raise
 
-    include_file = NGINX_CONFD.joinpath("kiauh-sites.conf")
+    include_file = get_nginx_confd().joinpath("kiauh-sites.conf")
     content = f"include {NGINX_SITES_ENABLED.as_posix()}/*;\n"
 
     try:
@@ -392,15 +447,16 @@ def ensure_nginx_site_layout() -> None:
 def _ensure_nginx_confd() -> None:
     """Ensure the nginx conf.d directory exists before writing configuration."""
 
-    if NGINX_CONFD.exists():
+    nginx_confd = get_nginx_confd()
+    if nginx_confd.exists():
         return
 
     try:
-        Logger.print_status(f"Creating missing nginx directory {NGINX_CONFD} ...")
+        Logger.print_status(f"Creating missing nginx directory {nginx_confd} ...")
         ensure_sudo_session()
-        command = ["sudo", "install", "-d", "-m", "755", str(NGINX_CONFD)]
+        command = ["sudo", "install", "-d", "-m", "755", str(nginx_confd)]
         run(command, stderr=PIPE, check=True)
-        Logger.print_ok(f"Directory {NGINX_CONFD} created.")
+        Logger.print_ok(f"Directory {nginx_confd} created.")
     except CalledProcessError as e:
         log = f"Unable to create nginx directory: {e.stderr.decode()}"
         Logger.print_error(log)
@@ -413,7 +469,7 @@ def copy_upstream_nginx_cfg() -> None:
     :return: None
     """
     source = MODULE_PATH.joinpath("assets/upstreams.conf")
-    target = NGINX_CONFD.joinpath("upstreams.conf")
+    target = get_nginx_confd().joinpath("upstreams.conf")
     try:
         _ensure_nginx_confd()
         ensure_sudo_session()
@@ -431,7 +487,7 @@ def copy_common_vars_nginx_cfg() -> None:
     :return: None
     """
     source = MODULE_PATH.joinpath("assets/common_vars.conf")
-    target = NGINX_CONFD.joinpath("common_vars.conf")
+    target = get_nginx_confd().joinpath("common_vars.conf")
     try:
         _ensure_nginx_confd()
         ensure_sudo_session()
@@ -443,25 +499,37 @@ def copy_common_vars_nginx_cfg() -> None:
         raise
 
 
-def generate_nginx_cfg_from_template(name: str, template_src: Path, **kwargs) -> None:
-    """
-    Creates an NGINX config from a template file and
-    replaces all placeholders passed as kwargs. A placeholder must be defined
-    in the template file as %{placeholder}%.
-    :param name: name of the config to create
-    :param template_src: the path to the template file
-    :return: None
-    """
+# matches a %PLACEHOLDER% in the nginx config template
+_PLACEHOLDER_RE = re.compile(r"%([A-Za-z_][A-Za-z0-9_]*)%")
+
+
+def _render_nginx_cfg_template(template_src: Path, **kwargs) -> str:
     content = template_src.read_text(encoding="utf-8")
+    subs = {key: str(value) for key, value in kwargs.items()}
+    # single pass over the template, unknown placeholders are kept as they are
+    return _PLACEHOLDER_RE.sub(lambda m: subs.get(m[1], m[0]), content)
 
-    for key, value in kwargs.items():
-        content = content.replace(f"%{key}%", str(value))
 
-    target = NGINX_SITES_AVAILABLE.joinpath(name)
+def _write_nginx_cfg(cfg_name: str, content: str) -> None:
+    """
+    Writes an NGINX site config to sites-available, enables it and drops the
+    default site. All three steps run in a single privileged shell instead of
+    one sudo call per step |
+    :param cfg_name: name of the config to create
+    :param content: the rendered config
+    :return: None
+    """
+    source = NGINX_SITES_AVAILABLE.joinpath(cfg_name)
+    target = NGINX_SITES_ENABLED.joinpath(cfg_name)
+    default = NGINX_SITES_ENABLED.joinpath("default")
+    q_source = shlex.quote(source.as_posix())
+    q_target = shlex.quote(target.as_posix())
+    q_default = shlex.quote(default.as_posix())
+    script = f"rm -f {q_default} && cat > {q_source} && ln -sf {q_source} {q_target}"
 
     try:
         ensure_sudo_session()
-        command = ["sudo", "tee", str(target)]
+        command = ["sudo", "sh", "-c", script]
         run(
             command,
             input=content.encode("utf-8"),
@@ -470,7 +538,7 @@ def generate_nginx_cfg_from_template(name: str, template_src: Path, **kwargs) ->
             check=True,
         )
     except CalledProcessError as e:
-        log = f"Unable to create '{target}': {e.stderr.decode()}"
+        log = f"Unable to create '{source}': {e.stderr.decode()}"
         Logger.print_error(log)
         raise
 
@@ -487,11 +555,8 @@ def create_nginx_cfg(
         Logger.print_status(f"Creating NGINX config for {display_name} ...")
 
         ensure_nginx_site_layout()
-        source = NGINX_SITES_AVAILABLE.joinpath(cfg_name)
-        target = NGINX_SITES_ENABLED.joinpath(cfg_name)
-        remove_file(Path("/etc/nginx/sites-enabled/default"), True)
-        generate_nginx_cfg_from_template(cfg_name, template_src=template_src, **kwargs)
-        create_symlink(source, target, True)
+        content = _render_nginx_cfg_template(template_src, **kwargs)
+        _write_nginx_cfg(cfg_name, content)
         set_nginx_permissions()
 
         Logger.print_ok(f"NGINX config for {display_name} successfully created.")
@@ -505,12 +570,12 @@ def get_nginx_config_list() -> List[Path]:
     Get a list of all NGINX config files in /etc/nginx/sites-enabled
     :return: List of NGINX config files
     """
-    configs: List[Path] = []
-    for config in NGINX_SITES_ENABLED.iterdir():
-        if not config.is_file():
-            continue
-        configs.append(config)
-    return configs
+    with os.scandir(NGINX_SITES_ENABLED) as entries:
+        return [Path(e.path) for e in entries if e.is_file(follow_symlinks=True)]
+
+
+# noinspection HttpUrlsUsage
+_LISTEN_STRIP_RE = re.compile(r"default_server|http://|https://|[;\[\]]")
 
 
 def get_nginx_listen_port(config: Path) -> int | None:
@@ -520,23 +585,25 @@ def get_nginx_listen_port(config: Path) -> int | None:
     :return: The listen port as int or None if not found/parsable
     """
 
-    # noinspection HttpUrlsUsage
-    pattern = r"default_server|http://|https://|[;\[\]]"
     port = ""
-    if not config.exists():
+    try:
+        cfg = open(config, "r")
+    except FileNotFoundError:
         Logger.print_warn(
             f"Unable to read listen port for {config.name}: config file does not exist."
         )
         return None
 
-    with open(config, "r") as cfg:
-        for line in cfg.readlines():
-            line = re.sub(pattern, "", line.strip())
-            if line.startswith("listen"):
-                if ":" not in line:
-                    port = line.split()[-1]
-                else:
-                    port = line.split(":")[-1]
+    with cfg:
+        for line in cfg:
+            line = line.strip()
+            if not line.startswith("listen"):
+                continue
+            line = _LISTEN_STRIP_RE.sub("", line)
+            if ":" not in line:
+                port = line.split()[-1]
+            else:
+                port = line.split(":")[-1]
         try:
             return int(port)
         except ValueError:
@@ -552,11 +619,13 @@ def read_ports_from_nginx_configs() -> List[int]:
     and read all ports defined for listen
     :return: A sorted list of listen ports
     """
-    if not NGINX_SITES_ENABLED.exists():
+    try:
+        configs = get_nginx_config_list()
+    except FileNotFoundError:
         return []
 
     port_list: List[int] = []
-    for config in get_nginx_config_list():
+    for config in configs:
         port = get_nginx_listen_port(config)
         if port is not None:
             port_list.append(port)
@@ -597,10 +666,15 @@ def get_client_port_selection(
 
 
 def get_next_free_port(ports_in_use: List[int]) -> int:
-    valid_ports = set(range(80, 7125))
     used_ports = set(map(int, ports_in_use))
+    for port in range(80, 7125):
+        if port not in used_ports:
+            return port
+
+    raise ValueError("No free port available between 80 and 7124!")
+
 
-    return min(valid_ports - used_ports)
+_LISTEN_LINE_RE = re.compile(rb"^.*listen.*$", re.MULTILINE)
 
 
 def set_listen_port(client: BaseWebClient, curr_port: int, new_port: int) -> None:
@@ -612,12 +686,10 @@ def set_listen_port(client: BaseWebClient, curr_port: int, new_port: int) -> Non
     :return: None
     """
     config = NGINX_SITES_AVAILABLE.joinpath(client.name)
-    with open(config, "r") as f:
-        lines = f.readlines()
+    content = config.read_bytes()
 
-    for i, line in enumerate(lines):
-        if "listen" in line:
-            lines[i] = line.replace(str(curr_port), str(new_port))
+    curr, new = str(curr_port).encode(), str(new_port).encode()
+    updated = _LISTEN_LINE_RE.sub(lambda m: m[0].replace(curr, new), content)
 
-    with open(config, "w") as f:
-        f.writelines(lines)
+    if updated != content:
+        config.write_bytes(updated)
@@ -9,6 +9,7 @@
 
 import os
 import pwd
+from functools import lru_cache
 from pathlib import Path
 
 # global dependencies
@@ -17,31 +18,44 @@ GLOBAL_DEPS = ["git", "wget", "curl", "unzip", "dfu-util", "python3-virtualenv"]
 # strings
 INVALID_CHOICE = "Invalid choice. Please select a valid value."
 
-# current user
-CURRENT_USER = pwd.getpwuid(os.getuid())[0]
-
 # dirs
+HOME_DIR = Path.home()
 SYSTEMD = Path("/etc/systemd/system")
 OPENRC = Path("/etc/init.d")
 NGINX_SITES_AVAILABLE = Path("/etc/nginx/sites-available")
 NGINX_SITES_ENABLED = Path("/etc/nginx/sites-enabled")
 
 
-def _resolve_nginx_conf_dir() -> Path:
+NGINX_CONF = Path("/etc/nginx/nginx.conf")
+
+
+def read_nginx_main_conf() -> str:
+    """Return the content of nginx.conf, re-read only after it changed."""
+
+    try:
+        mtime_ns = NGINX_CONF.stat().st_mtime_ns
+    except OSError:
+        return ""
+    return _read_nginx_main_conf_cached(mtime_ns)
+
+
+@lru_cache(maxsize=1)
+def _read_nginx_main_conf_cached(mtime_ns: int) -> str:
+    try:
+        return NGINX_CONF.read_text(encoding="utf-8")
+    except (OSError, UnicodeDecodeError):
+        return ""
+
+
+@lru_cache(maxsize=1)
+def _resolve_nginx_conf_dir(config_text: str) -> Path:
     """Return the NGINX include directory actually loaded by nginx."""
 
     candidate_dirs = (Path("/etc/nginx/conf.d"), Path("/etc/nginx/http.d"))
-    nginx_conf = Path("/etc/nginx/nginx.conf")
 
-    if nginx_conf.exists():
-        try:
-            config_text = nginx_conf.read_text(encoding="utf-8")
-        except (OSError, UnicodeDecodeError):
-            config_text = ""
-
-        for candidate in candidate_dirs:
-            if candidate.as_posix() in config_text:
-                return candidate
+    for candidate in candidate_dirs:
+        if candidate.as_posix() in config_text:
+            return candidate
 
     for candidate in candidate_dirs:
         if candidate.exists():
@@ -50,4 +64,14 @@ def _resolve_nginx_conf_dir() -> Path:
     return candidate_dirs[0]
 
 
-NGINX_CONFD = _resolve_nginx_conf_dir()
+def get_nginx_confd() -> Path:
+    """Return the NGINX include directory, resolved again after nginx.conf changed."""
+
+    return _resolve_nginx_conf_dir(read_nginx_main_conf())
+
+
+@lru_cache(maxsize=1)
+def get_current_user() -> str:
+    """Return the name of the user running KIAUH, looked up once on first use."""
+
+    return pwd.getpwuid(os.getuid())[0]
@@ -23,6 +23,7 @@ from core.menus import FooterType, Option
 from core.services.message_service import MessageService
 from core.spinner import Spinner
 from core.types.color import Color
+from utils.cached_fs import invalidate_exists_cache
 from utils.input_utils import get_selection_input
 
 
@@ -246,6 +247,9 @@ class BaseMenu(metaclass=PostInitCaller):
                 opt_index=selected_option.opt_index,
                 opt_data=selected_option.opt_data,
             )
+            # the option may have installed or removed a component, let the
+            # next status screen stat the component files again
+            invalidate_exists_cache()
 
             self.run()
 
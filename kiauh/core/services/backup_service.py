@@ -9,14 +9,19 @@
 from __future__ import annotations
 
 import shutil
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple, Union
 
 from components.klipper.klipper import Klipper
 from components.moonraker.moonraker import Moonraker
 from core.logger import Logger
-from utils.instance_utils import get_instances
+from utils.instance_cache import get_instances_cached
+
+# source directory, name of the backup and optional subdirectory of the
+# backup root, the arguments of one backup_directory() call
+DirectoryBackup = Tuple[Path, str, Optional[Union[Path, str]]]
 
 
 class BackupService:
@@ -86,7 +91,64 @@ class BackupService:
         target_path: Optional[Path | str] = None,
     ) -> Optional[Path]:
         source_path = Path(source_path)
+        backup_path = self._prepare_directory_backup(
+            source_path, backup_name, target_path
+        )
+        if backup_path is None:
+            return None
+
+        try:
+            shutil.copytree(source_path, backup_path)
+        except Exception as e:
+            Logger.print_error(f"Failed to backup directory '{source_path}': {e}")
+            return None
+
+        Logger.print_ok(f"Successfully backed up '{source_path}' to '{backup_path}'")
+        return backup_path
+
+    def backup_directories(
+        self, backups: List[DirectoryBackup]
+    ) -> List[Optional[Path]]:
+        # the directories are independent of each other so copy them side by
+        # side, all logging stays on this thread to keep the output in order
+        if len(backups) < 2:
+            return [self.backup_directory(*backup) for backup in backups]
+
+        results: List[Optional[Path]] = [None] * len(backups)
+        with ThreadPoolExecutor(max_workers=min(len(backups), 4)) as executor:
+            futures: Dict[Future[Path], Tuple[int, Path, Path]] = {}
+            for index, (source_path, backup_name, target_path) in enumerate(backups):
+                source_path = Path(source_path)
+                backup_path = self._prepare_directory_backup(
+                    source_path, backup_name, target_path
+                )
+                if backup_path is not None:
+                    future = executor.submit(shutil.copytree, source_path, backup_path)
+                    futures[future] = (index, source_path, backup_path)
+
+            for future in as_completed(futures):
+                index, source_path, backup_path = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    Logger.print_error(
+                        f"Failed to backup directory '{source_path}': {e}"
+                    )
+                    continue
+
+                Logger.print_ok(
+                    f"Successfully backed up '{source_path}' to '{backup_path}'"
+                )
+                results[index] = backup_path
 
+        return results
+
+    def _prepare_directory_backup(
+        self,
+        source_path: Path,
+        backup_name: str,
+        target_path: Optional[Path | str],
+    ) -> Optional[Path]:
         Logger.print_status(f"Creating backup of {source_path} ...")
 
         if not source_path.exists():
@@ -101,31 +163,21 @@ class BackupService:
 
         try:
             self._backup_root.mkdir(parents=True, exist_ok=True)
-
-            backup_dir_name = f"{backup_name}_{self.timestamp}"
-
-            if target_path is not None:
-                backup_path = self._backup_root.joinpath(target_path, backup_dir_name)
-            else:
-                backup_path = self._backup_root.joinpath(backup_dir_name)
-
-            shutil.copytree(source_path, backup_path)
-
-            Logger.print_ok(
-                f"Successfully backed up '{source_path}' to '{backup_path}'"
-            )
-            return backup_path
-
         except Exception as e:
             Logger.print_error(f"Failed to backup directory '{source_path}': {e}")
             return None
 
+        backup_dir_name = f"{backup_name}_{self.timestamp}"
+        if target_path is not None:
+            return self._backup_root.joinpath(target_path, backup_dir_name)
+        return self._backup_root.joinpath(backup_dir_name)
+
     ################################################
     # SPECIFIC BACKUP METHODS
     ################################################
 
     def backup_printer_cfg(self):
-        klipper_instances: List[Klipper] = get_instances(Klipper)
+        klipper_instances: List[Klipper] = get_instances_cached(Klipper)
         for instance in klipper_instances:
             target_path: Path = self._backup_root.joinpath(
                 instance.data_dir.name, f"config_{self.timestamp}"
@@ -137,7 +189,7 @@ class BackupService:
             )
 
     def backup_moonraker_conf(self):
-        moonraker_instances: List[Moonraker] = get_instances(Moonraker)
+        moonraker_instances: List[Moonraker] = get_instances_cached(Moonraker)
         for instance in moonraker_instances:
             target_path: Path = self._backup_root.joinpath(
                 instance.data_dir.name, f"config_{self.timestamp}"
@@ -149,7 +201,7 @@ class BackupService:
             )
 
     def backup_printer_config_dir(self) -> None:
-        instances: List[Klipper] = get_instances(Klipper)
+        instances: List[Klipper] = get_instances_cached(Klipper)
         if not instances:
             # fallback: search for printer data directories in the user's home directory
             Logger.print_info("No Klipper instances found via systemd services.")
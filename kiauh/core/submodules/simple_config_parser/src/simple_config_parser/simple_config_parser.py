@@ -8,8 +8,9 @@
 
 from __future__ import annotations
 
+from io import StringIO
 from pathlib import Path
-from typing import Callable, Dict, List
+from typing import Callable, Dict, List, TextIO
 
 from ..simple_config_parser.constants import (
     BOOLEAN_STATES,
@@ -161,51 +162,66 @@ class SimpleConfigParser:
             for line in file:
                 self._parse_line(line)
 
+    def read_string(self, content: str) -> None:
+        """Parse a config from a string"""
+        for line in StringIO(content):
+            self._parse_line(line)
+
     def write_file(self, path: str | Path) -> None:
         """Write the config to a file"""
         if path is None:
             raise ValueError("File path cannot be None")
 
         with open(path, "w", encoding="utf-8") as f:
-            if HEADER_IDENT in self.config:
-                for line in self.config[HEADER_IDENT]:
-                    f.write(line)
-
-            sections = self.get_sections()
-            for i, section in enumerate(sections):
-                f.write(self.config[section]["header"])
-
-                for element in self.config[section]["elements"]:
-                    if element["type"] == LineType.OPTION.value:
-                        f.write(element["raw"])
-                    elif element["type"] == LineType.OPTION_BLOCK.value:
-                        f.write(element["raw"])
-                        for line in element["value"]:
-                            f.write(INDENT + line.strip() + "\n")
-                    elif element["type"] in [LineType.COMMENT.value, LineType.BLANK.value]:
-                        f.write(element["content"])
-                    else:
-                        raise UnknownLineError(element["raw"])
-
-            # Ensure file ends with a single newline
-            if sections:  # Only if we have any sections
-                last_section = sections[-1]
-                last_elements = self.config[last_section]["elements"]
-
-                if last_elements:
-                    last_element = last_elements[-1]
-                    if "raw" in last_element:
-                        last_line = last_element["raw"]
-                    else:  # comment or blank line
-                        last_line = last_element["content"]
-
-                    if not last_line.endswith("\n"):
-                        f.write("\n")
-
-            if self.save_config_block:
-                for line in self.save_config_block:
-                    f.write(line)
-                f.write("\n")
+            self._write(f)
+
+    def write_string(self) -> str:
+        """Return the config as it would be written to a file"""
+        buffer = StringIO()
+        self._write(buffer)
+        return buffer.getvalue()
+
+    def _write(self, f: TextIO) -> None:
+        """Write the config to an open text stream"""
+        if HEADER_IDENT in self.config:
+            for line in self.config[HEADER_IDENT]:
+                f.write(line)
+
+        sections = self.get_sections()
+        for i, section in enumerate(sections):
+            f.write(self.config[section]["header"])
+
+            for element in self.config[section]["elements"]:
+                if element["type"] == LineType.OPTION.value:
+                    f.write(element["raw"])
+                elif element["type"] == LineType.OPTION_BLOCK.value:
+                    f.write(element["raw"])
+                    for line in element["value"]:
+                        f.write(INDENT + line.strip() + "\n")
+                elif element["type"] in [LineType.COMMENT.value, LineType.BLANK.value]:
+                    f.write(element["content"])
+                else:
+                    raise UnknownLineError(element["raw"])
+
+        # Ensure file ends with a single newline
+        if sections:  # Only if we have any sections
+            last_section = sections[-1]
+            last_elements = self.config[last_section]["elements"]
+
+            if last_elements:
+                last_element = last_elements[-1]
+                if "raw" in last_element:
+                    last_line = last_element["raw"]
+                else:  # comment or blank line
+                    last_line = last_element["content"]
+
+                if not last_line.endswith("\n"):
+                    f.write("\n")
+
+        if self.save_config_block:
+            for line in self.save_config_block:
+                f.write(line)
+            f.write("\n")
 
     def get_sections(self) -> List[str]:
         """Return a list of all section names, but exclude any section starting with '#_'"""
@@ -327,6 +343,42 @@ class SimpleConfigParser:
 
         elements.insert(insert_pos, new_element)
 
+    def update_options(self, section: str, options: Dict[str, str | List[str]]) -> None:
+        """
+        Set the values of several options in a section at once. Behaves like
+        calling set_option for each option, but scans the section only once.
+        """
+        if not self.has_section(section):
+            self.add_section(section)
+
+        # index the existing options and find the last option, after which we insert new options
+        existing: Dict[str, Dict] = {}
+        insert_pos = 0
+        elements = self.config[section]["elements"]
+        for i, element in enumerate(elements):
+            if element["type"] in [LineType.OPTION.value, LineType.OPTION_BLOCK.value]:
+                existing.setdefault(element["name"], element)
+                insert_pos = i + 1
+
+        new_elements = []
+        for option, value in options.items():
+            element = existing.get(option)
+            if element is None:
+                element = {"type": None, "name": option}
+                existing[option] = element
+                new_elements.append(element)
+
+            if isinstance(value, list):
+                element["type"] = LineType.OPTION_BLOCK.value
+                element["value"] = value
+                element["raw"] = f"{option}:\n"
+            else:
+                element["type"] = LineType.OPTION.value
+                element["value"] = value
+                element["raw"] = f"{option}: {value}\n"
+
+        elements[insert_pos:insert_pos] = new_elements
+
     def remove_option(self, section: str, option: str) -> None:
         """Remove an option from a section"""
         if self.has_section(section):
@@ -6,12 +6,15 @@
 #  This file may be distributed under the terms of the GNU GPLv3 license  #
 # ======================================================================= #
 
+import copy
+
 import pytest
 
 from src.simple_config_parser.constants import LineType
 from src.simple_config_parser.simple_config_parser import (
     NoOptionError,
     NoSectionError,
+    SimpleConfigParser,
 )
 
 
@@ -181,6 +184,44 @@ def test_set_new_option(parser):
     assert parser.config["section_2"]["elements"][1]["raw"] == "array_option:\n"
 
 
+def test_update_options(parser):
+    parser.update_options(
+        "section_1",
+        {
+            "option_1": "updated_value",
+            "new_option": "new_value",
+            "array_option": ["value_1", "value_2"],
+        },
+    )
+    assert parser.getval("section_1", "option_1") == "updated_value"
+    assert parser.getval("section_1", "new_option") == "new_value"
+    assert parser.getvals("section_1", "array_option") == ["value_1", "value_2"]
+
+    assert parser.config["section_1"]["elements"][4]["name"] == "new_option"
+    assert parser.config["section_1"]["elements"][4]["raw"] == "new_option: new_value\n"
+    assert parser.config["section_1"]["elements"][5]["type"] == LineType.OPTION_BLOCK.value
+    assert parser.config["section_1"]["elements"][5]["name"] == "array_option"
+    assert parser.config["section_1"]["elements"][5]["raw"] == "array_option:\n"
+
+
+def test_update_options_matches_set_option(parser):
+    options = {"option_2": "value_x", "new_1": "a", "new_2": ["b", "c"]}
+    other = SimpleConfigParser()
+    other.config = copy.deepcopy(parser.config)
+
+    parser.update_options("section_2", options)
+    for option, value in options.items():
+        other.set_option("section_2", option, value)
+
+    assert parser.config == other.config
+
+
+def test_update_options_new_section(parser):
+    parser.update_options("new_section", {"very_new_option": "very_new_value"})
+    assert parser.has_section("new_section") is True
+    assert parser.getval("new_section", "very_new_option") == "very_new_value"
+
+
 def test_remove_option(parser):
     parser.remove_option("section_1", "option_1")
     assert parser.has_option("section_1", "option_1") is False
@@ -117,3 +117,20 @@ def test_add_option_and_write(tmp_path):
     parser2.read_file(output_file)
     assert parser2.has_option("section_1", "new_option")
     assert parser2.getval("section_1", "new_option") == "new_value"
+
+
+def test_write_string_matches_write_file(tmp_path):
+    tmp_file = Path(tmp_path).joinpath("tmp_config.cfg")
+    parser = SimpleConfigParser()
+    parser.read_file(TEST_DATA_PATH)
+    parser.write_file(tmp_file)
+
+    assert parser.write_string() == tmp_file.read_text()
+
+
+def test_read_string_and_write_string_roundtrip():
+    content = TEST_DATA_PATH.read_text()
+    parser = SimpleConfigParser()
+    parser.read_string(content)
+
+    assert parser.write_string() == content
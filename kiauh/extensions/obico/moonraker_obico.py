@@ -13,7 +13,7 @@ from pathlib import Path
 from subprocess import CalledProcessError, run
 
 from components.moonraker.moonraker import Moonraker
-from core.constants import CURRENT_USER
+from core.constants import get_current_user
 from core.instance_manager.base_instance import BaseInstance
 from core.logger import Logger
 from core.submodules.simple_config_parser.src.simple_config_parser.simple_config_parser import (
@@ -94,6 +94,8 @@ class MoonrakerObico:
             raise
 
     def _prep_service_file_content(self) -> str:
+        current_user = get_current_user()
+
         template = OBICO_SERVICE_TEMPLATE
 
         try:
@@ -105,7 +107,7 @@ class MoonrakerObico:
 
         service_content = template_content.replace(
             "%USER%",
-            CURRENT_USER,
+            current_user,
         )
         service_content = service_content.replace(
             "%OBICO_DIR%",
@@ -13,7 +13,7 @@ from pathlib import Path
 from textwrap import dedent
 
 from components.klipper.klipper import Klipper
-from core.constants import CURRENT_USER
+from core.constants import get_current_user
 from core.instance_manager.base_instance import BaseInstance
 from core.logger import Logger
 from extensions.octoprint import (
@@ -78,6 +78,8 @@ class Octoprint:
         create_service_file(self.service_file_path.name, self._prep_service_content(port))
 
     def _prep_service_content(self, port: int) -> str:
+        current_user = get_current_user()
+
         basedir = self.basedir.as_posix()
         cfg = self.cfg_file.as_posix()
         octo_exec = self.env_dir.joinpath("bin/octoprint").as_posix()
@@ -89,7 +91,7 @@ class Octoprint:
                 description="Starts OctoPrint on startup"
                 command="{octo_exec}"
                 command_args="--basedir {basedir} --config {cfg} --port={port} serve"
-                command_user="{CURRENT_USER}"
+                command_user="{current_user}"
                 directory="{basedir}"
                 supervisor=supervise-daemon
                 respawn_delay=10
@@ -117,7 +119,7 @@ class Octoprint:
             Environment="LC_ALL=C.UTF-8"
             Environment="LANG=C.UTF-8"
             Type=simple
-            User={CURRENT_USER}
+            User={current_user}
             ExecStart={octo_exec} --basedir {basedir} --config {cfg} --port={port} serve
 
             [Install]
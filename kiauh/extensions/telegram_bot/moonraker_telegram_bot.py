@@ -13,7 +13,7 @@ from pathlib import Path
 from subprocess import CalledProcessError
 
 from components.moonraker.moonraker import Moonraker
-from core.constants import CURRENT_USER
+from core.constants import get_current_user
 from core.instance_manager.base_instance import BaseInstance
 from core.logger import Logger
 from extensions.telegram_bot import (
@@ -75,6 +75,8 @@ class MoonrakerTelegramBot:
             raise
 
     def _prep_service_file_content(self) -> str:
+        current_user = get_current_user()
+
         template = TG_BOT_SERVICE_TEMPLATE
 
         try:
@@ -86,7 +88,7 @@ class MoonrakerTelegramBot:
 
         service_content = template_content.replace(
             "%USER%",
-            CURRENT_USER,
+            current_user,
         )
         service_content = service_content.replace(
             "%TELEGRAM_BOT_DIR%",
@@ -10,8 +10,6 @@ import io
 import sys
 
 from core.logger import Logger
-from core.menus.main_menu import MainMenu
-from core.settings.kiauh_settings import KiauhSettings
 from utils.sudo_session import shutdown_sudo_session
 
 
@@ -23,8 +21,14 @@ def ensure_encoding() -> None:
 
 def main() -> None:
     try:
-        KiauhSettings()
         ensure_encoding()
+
+        # the menus pull in every component, only import them once the
+        # terminal is set up
+        from core.menus.main_menu import MainMenu
+        from core.settings.kiauh_settings import KiauhSettings
+
+        KiauhSettings()
         MainMenu().run()
     except KeyboardInterrupt:
         Logger.print_ok("\nHappy printing!\n", prefix=False)
@@ -8,12 +8,20 @@
 # ======================================================================= #
 from __future__ import annotations
 
+import configparser
+import os
+import re
+import shlex
+import sys
+import tempfile
 from datetime import datetime
 from pathlib import Path
 from subprocess import PIPE, CalledProcessError, run
+from typing import Dict
 
 from core.logger import DialogType, Logger
 from core.types.color import Color
+from utils.cached_fs import cached_which
 from utils.common import check_install_dependencies
 from utils.input_utils import get_confirm, get_string_input
 from utils.sys_utils import InitSystem, cmd_sysctl_service, get_init_system
@@ -21,6 +29,8 @@ from utils.sudo_session import ensure_sudo_session
 
 WIREGUARD_DIR = Path("/etc/wireguard")
 
+_INTERFACE_NAME_RE = re.compile(r"^[a-zA-Z0-9_.-]+$")
+
 
 def provision_wireguard() -> None:
     """Install WireGuard tooling and guide the user through a client setup."""
@@ -47,10 +57,12 @@ def provision_wireguard() -> None:
         Logger.print_info("Skipping WireGuard provisioning at user request.")
         return
 
-    check_install_dependencies({"wireguard-tools"}, include_global=False)
+    # skip the package manager query when the tools are already on PATH
+    if cached_which("wg") is None or cached_which("wg-quick") is None:
+        check_install_dependencies({"wireguard-tools"}, include_global=False)
 
     interface = get_string_input(
-        "WireGuard interface name", regex=r"^[a-zA-Z0-9_.-]+$", default="wg0"
+        "WireGuard interface name", regex=_INTERFACE_NAME_RE, default="wg0"
     )
 
     private_key, public_key = _obtain_keypair()
@@ -59,61 +71,146 @@ def provision_wireguard() -> None:
     )
     Logger.print_status(public_key)
 
-    tunnel_address = get_string_input(
+    settings = _edit_tunnel_settings() or _prompt_tunnel_settings()
+
+    config_path = WIREGUARD_DIR.joinpath(f"{interface}.conf")
+    _write_wireguard_config(config_path, interface, private_key, **settings)
+    _enable_wireguard_service(interface)
+
+    Logger.print_ok(
+        "WireGuard provisioning complete. Use 'wg show' to inspect tunnel status.",
+        end="\n\n",
+    )
+
+
+# fill-in form for the editor, WireGuard configs are INI compatible
+_SETTINGS_TEMPLATE = """\
+# Fill in the WireGuard tunnel settings, then save and close the editor.
+# Lines starting with '#' are ignored, optional values may stay empty.
+# If a required value is missing, KIAUH asks for the settings one by one.
+
+[Interface]
+# client tunnel address (CIDR, e.g. 10.42.0.2/32), required
+Address =
+# DNS servers for the tunnel (comma separated, optional)
+DNS =
+
+[Peer]
+# remote peer public key, required
+PublicKey =
+# pre-shared key (optional)
+PresharedKey =
+# allowed IPs for the peer
+AllowedIPs = 0.0.0.0/0, ::/0
+# peer endpoint (host:port), required
+Endpoint =
+# persistent keepalive in seconds (optional)
+PersistentKeepalive = 25
+"""
+
+# (settings key, section, option, required)
+_SETTINGS_FIELDS = (
+    ("tunnel_address", "Interface", "Address", True),
+    ("dns_servers", "Interface", "DNS", False),
+    ("peer_public_key", "Peer", "PublicKey", True),
+    ("preshared_key", "Peer", "PresharedKey", False),
+    ("allowed_ips", "Peer", "AllowedIPs", False),
+    ("endpoint", "Peer", "Endpoint", True),
+    ("keepalive", "Peer", "PersistentKeepalive", False),
+)
+
+
+class _CaseSensitiveParser(configparser.ConfigParser):
+    # WireGuard keys are case sensitive
+    def optionxform(self, optionstr: str) -> str:
+        return optionstr
+
+
+def _find_editor() -> str | None:
+    if not (sys.stdin.isatty() and sys.stdout.isatty()):
+        return None
+    editor = os.environ.get("VISUAL") or os.environ.get("EDITOR")
+    if editor:
+        return editor
+    for candidate in ("nano", "vi"):
+        if cached_which(candidate) is not None:
+            return candidate
+    return None
+
+
+def _edit_tunnel_settings() -> Dict[str, str] | None:
+    """
+    Let the user fill in all tunnel settings at once in a text editor |
+    :return: the parsed settings or None to fall back to the single prompts
+    """
+    editor = _find_editor()
+    if editor is None:
+        return None
+    if not get_confirm(
+        f"Fill in the tunnel settings in a form using '{editor}'?",
+        default_choice=True,
+    ):
+        return None
+
+    fd, form = tempfile.mkstemp(prefix="kiauh-wireguard-", suffix=".conf")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(_SETTINGS_TEMPLATE)
+        run([*shlex.split(editor), form], check=True)
+
+        parser = _CaseSensitiveParser(interpolation=None)
+        parser.read(form, encoding="utf-8")
+    except (OSError, CalledProcessError, configparser.Error) as error:
+        Logger.print_warn(f"Unable to read the settings form: {error}")
+        return None
+    finally:
+        Path(form).unlink(missing_ok=True)
+
+    settings: Dict[str, str] = {}
+    for key, section, option, required in _SETTINGS_FIELDS:
+        value = parser.get(section, option, fallback="").strip()
+        if required and not value:
+            Logger.print_warn(f"'{option}' in [{section}] must not be empty.")
+            return None
+        settings[key] = value
+    return settings
+
+
+def _prompt_tunnel_settings() -> Dict[str, str]:
+    settings: Dict[str, str] = {}
+    settings["tunnel_address"] = get_string_input(
         "Client tunnel address (CIDR, e.g. 10.42.0.2/32)", allow_special_chars=True
     )
-    dns_servers = get_string_input(
+    settings["dns_servers"] = get_string_input(
         "DNS servers for the tunnel (comma separated, optional)",
         allow_special_chars=True,
         allow_empty=True,
         default="",
     )
-    peer_public_key = get_string_input(
+    settings["peer_public_key"] = get_string_input(
         "Remote peer public key", allow_special_chars=True
     )
-    preshared_key = get_string_input(
+    settings["preshared_key"] = get_string_input(
         "Pre-shared key (optional)",
         allow_special_chars=True,
         allow_empty=True,
         default="",
     )
-    allowed_ips = get_string_input(
+    settings["allowed_ips"] = get_string_input(
         "Allowed IPs for the peer",
         allow_special_chars=True,
         default="0.0.0.0/0, ::/0",
     )
-    endpoint = get_string_input(
+    settings["endpoint"] = get_string_input(
         "Peer endpoint (host:port)", allow_special_chars=True
     )
-    keepalive = get_string_input(
+    settings["keepalive"] = get_string_input(
         "Persistent keepalive (seconds, optional)",
         allow_special_chars=True,
         allow_empty=True,
         default="25",
     )
-
-    config_path = WIREGUARD_DIR.joinpath(f"{interface}.conf")
-    _ensure_wireguard_directory()
-    _backup_existing_config(config_path)
-    _write_wireguard_config(
-        config_path,
-        interface,
-        private_key,
-        tunnel_address,
-        dns_servers,
-        peer_public_key,
-        preshared_key,
-        allowed_ips,
-        endpoint,
-        keepalive,
-    )
-    _set_config_permissions(config_path)
-    _enable_wireguard_service(interface)
-
-    Logger.print_ok(
-        "WireGuard provisioning complete. Use 'wg show' to inspect tunnel status.",
-        end="\n\n",
-    )
+    return settings
 
 
 def _obtain_keypair() -> tuple[str, str]:
@@ -153,27 +250,19 @@ def _obtain_keypair() -> tuple[str, str]:
     return private_key, public_key
 
 
+# generate the private key and derive its public key with a single run(),
+# the key only ever travels through the shell's pipe to wg pubkey
+_KEYPAIR_SCRIPT = r'set -e; k=$(wg genkey); printf "%s\n" "$k"; printf "%s\n" "$k" | wg pubkey'
+
+
 def _generate_keypair() -> tuple[str, str]:
-    result = run(["wg", "genkey"], stdout=PIPE, stderr=PIPE, text=True, check=True)
-    private_key = result.stdout.strip()
-    if not private_key:
-        raise CalledProcessError(result.returncode, result.args, result.stdout, result.stderr)
-    public_result = run(
-        ["wg", "pubkey"],
-        input=f"{private_key}\n",
-        stdout=PIPE,
-        stderr=PIPE,
-        text=True,
-        check=True,
+    result = run(
+        ["sh", "-c", _KEYPAIR_SCRIPT], stdout=PIPE, stderr=PIPE, text=True, check=True
     )
-    public_key = public_result.stdout.strip()
-    if not public_key:
-        raise CalledProcessError(
-            public_result.returncode,
-            public_result.args,
-            public_result.stdout,
-            public_result.stderr,
-        )
+    keys = result.stdout.split()
+    if len(keys) != 2:
+        raise CalledProcessError(result.returncode, result.args, result.stdout, result.stderr)
+    private_key, public_key = keys
     return private_key, public_key
 
 
@@ -192,36 +281,22 @@ def _derive_public_key(private_key: str) -> str:
     return public_key
 
 
-def _ensure_wireguard_directory() -> None:
-    try:
-        ensure_sudo_session()
-        run(["sudo", "mkdir", "-p", WIREGUARD_DIR.as_posix()], check=True)
-    except CalledProcessError as error:
-        Logger.print_error(f"Failed to create {WIREGUARD_DIR}: {error}")
-        raise
-
-
-def _backup_existing_config(config_path: Path) -> None:
-    if not config_path.exists():
-        return
-    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-    backup_path = config_path.with_suffix(config_path.suffix + f".{timestamp}.bak")
-    try:
-        Logger.print_status(f"Backing up existing configuration to {backup_path} ...")
-        ensure_sudo_session()
-        run(
-            [
-                "sudo",
-                "cp",
-                config_path.as_posix(),
-                backup_path.as_posix(),
-            ],
-            check=True,
-        )
-        Logger.print_ok("Backup complete.")
-    except CalledProcessError as error:
-        Logger.print_error(f"Failed to backup existing config: {error}")
-        raise
+# create the directory, back up an existing config and atomically replace it
+# with the content from stdin, all within a single privileged shell. mktemp
+# creates the file as 0600, so the key is never readable by anyone else
+_WRITE_CONFIG_SCRIPT = """set -e
+tmp=
+trap 'rm -f "$tmp"' EXIT
+mkdir -p "$(dirname "$1")"
+if [ -e "$1" ]; then
+    cp -p "$1" "$2"
+    echo "$2"
+fi
+umask 077
+tmp=$(mktemp "$1.XXXXXX")
+cat > "$tmp"
+mv -f "$tmp" "$1"
+"""
 
 
 def _write_wireguard_config(
@@ -236,62 +311,52 @@ def _write_wireguard_config(
     endpoint: str,
     keepalive: str,
 ) -> None:
-    lines = [
-        "[Interface]",
-        f"PrivateKey = {private_key}",
-        f"Address = {tunnel_address}",
-    ]
-    if dns_servers:
-        lines.append(f"DNS = {dns_servers}")
-
-    lines.extend(
-        [
-            "",
-            "[Peer]",
-            f"PublicKey = {peer_public_key}",
-        ]
+    content = (
+        "[Interface]\n"
+        f"PrivateKey = {private_key}\n"
+        f"Address = {tunnel_address}\n"
+        f"{_optional_option('DNS', dns_servers)}"
+        "\n"
+        "[Peer]\n"
+        f"PublicKey = {peer_public_key}\n"
+        f"{_optional_option('PresharedKey', preshared_key)}"
+        f"{_optional_option('AllowedIPs', allowed_ips)}"
+        f"Endpoint = {endpoint}\n"
+        f"{_optional_option('PersistentKeepalive', keepalive)}"
     )
 
-    if preshared_key:
-        lines.append(f"PresharedKey = {preshared_key}")
-
-    if allowed_ips:
-        lines.append(f"AllowedIPs = {allowed_ips}")
-
-    lines.append(f"Endpoint = {endpoint}")
-
-    if keepalive:
-        lines.append(f"PersistentKeepalive = {keepalive}")
-
-    content = "\n".join(lines) + "\n"
-
+    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    backup_path = config_path.with_suffix(config_path.suffix + f".{timestamp}.bak")
     try:
         Logger.print_status(
             f"Writing WireGuard configuration for '{interface}' to {config_path} ..."
         )
         ensure_sudo_session()
-        run(
-            ["sudo", "tee", config_path.as_posix()],
+        result = run(
+            [
+                "sudo",
+                "sh",
+                "-c",
+                _WRITE_CONFIG_SCRIPT,
+                "_",
+                config_path.as_posix(),
+                backup_path.as_posix(),
+            ],
             input=content.encode(),
             stdout=PIPE,
             stderr=PIPE,
             check=True,
         )
-        Logger.print_ok("Configuration written.")
+        if result.stdout.strip():
+            Logger.print_info(f"Existing configuration backed up to {backup_path}")
+        Logger.print_ok("Configuration written with strict permissions.")
     except CalledProcessError as error:
         Logger.print_error(f"Failed to write WireGuard configuration: {error}")
         raise
 
 
-def _set_config_permissions(config_path: Path) -> None:
-    try:
-        Logger.print_status("Setting strict permissions on the WireGuard config ...")
-        ensure_sudo_session()
-        run(["sudo", "chmod", "600", config_path.as_posix()], check=True)
-        Logger.print_ok("Permissions updated.")
-    except CalledProcessError as error:
-        Logger.print_error(f"Failed to set permissions on {config_path}: {error}")
-        raise
+def _optional_option(key: str, value: str) -> str:
+    return f"{key} = {value}\n" if value else ""
 
 
 def _enable_wireguard_service(interface: str) -> None:
@@ -0,0 +1,67 @@
+# ======================================================================= #
+#  Copyright (C) 2020 - 2025 Dominik Willner <th33xitus@gmail.com>        #
+#                                                                         #
+#  This file is part of KIAUH - Klipper Installation And Update Helper    #
+#  https://github.com/dw-0/kiauh                                          #
+#                                                                         #
+#  This file may be distributed under the terms of the GNU GPLv3 license  #
+# ======================================================================= #
+from __future__ import annotations
+
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, Tuple
+
+_EXISTS_CACHE: Dict[str, Tuple[float, bool]] = {}
+_WHICH_CACHE: Dict[str, str] = {}
+
+
+def cached_exists(path: Path, ttl: float = 2.0) -> bool:
+    """
+    Check if a path exists, reusing results younger than ttl seconds.
+    Menus re-render the same component status checks over and over, this
+    keeps them from stat'ing the same files on every redraw |
+    :param path: the path to check
+    :param ttl: maximum age of a cached result in seconds
+    :return: True if the path exists, False otherwise
+    """
+    key = str(path)
+    now = time.monotonic()
+    cached = _EXISTS_CACHE.get(key)
+    if cached is not None and now - cached[0] < ttl:
+        return cached[1]
+
+    exists = os.path.exists(key)
+    _EXISTS_CACHE[key] = (now, exists)
+    return exists
+
+
+def invalidate_exists_cache(*paths: Path) -> None:
+    """
+    Drop cached results, call this after creating or removing files |
+    :param paths: the paths to forget, forget everything if none are given
+    :return: None
+    """
+    if not paths:
+        _EXISTS_CACHE.clear()
+        return
+
+    for path in paths:
+        _EXISTS_CACHE.pop(str(path), None)
+
+
+def cached_which(name: str) -> str | None:
+    """
+    Look up an executable on PATH, walking PATH only once per found command.
+    Misses are not cached, so a tool installed during the session is found |
+    :param name: the command to look up
+    :return: the full path of the command or None if it is not on PATH
+    """
+    path = _WHICH_CACHE.get(name)
+    if path is None:
+        path = shutil.which(name)
+        if path is not None:
+            _WHICH_CACHE[name] = path
+    return path
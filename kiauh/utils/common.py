@@ -21,6 +21,7 @@ from core.constants import (
 from core.logger import DialogType, Logger
 from core.types.color import Color
 from core.types.component_status import ComponentStatus, StatusCode
+from utils.cached_fs import cached_exists
 from utils.git_utils import (
     get_current_branch,
     get_local_commit,
@@ -110,7 +111,11 @@ def get_install_status(
     checks = []
     branch: str = ""
 
-    if repo_dir.exists():
+    # probe the repo once up front, most components on a status screen are not
+    # installed and the git helpers would each stat the missing directory again
+    repo_exists = repo_dir.exists()
+    is_git_repo = repo_exists and repo_dir.joinpath(".git").exists()
+    if repo_exists:
         checks.append(True)
         branch = get_current_branch(repo_dir)
 
@@ -124,7 +129,7 @@ def get_install_status(
 
     if files is not None:
         for f in files:
-            checks.append(f.exists())
+            checks.append(cached_exists(f))
 
     status: StatusCode
     if checks and all(checks):
@@ -134,8 +139,8 @@ def get_install_status(
     else:
         status = 1  # incomplete
 
-    org, repo = get_repo_name(repo_dir)
-    repo_url = get_repo_url(repo_dir) if repo_dir.exists() else None
+    org, repo = get_repo_name(repo_dir) if is_git_repo else ("-", "-")
+    repo_url = get_repo_url(repo_dir) if repo_exists else None
 
     return ComponentStatus(
         status=status,
@@ -144,8 +149,8 @@ def get_install_status(
         repo=repo,
         repo_url=repo_url,
         branch=branch,
-        local=get_local_commit(repo_dir),
-        remote=get_remote_commit(repo_dir),
+        local=get_local_commit(repo_dir) if is_git_repo else None,
+        remote=get_remote_commit(repo_dir) if is_git_repo else None,
     )
 
 
@@ -11,7 +11,7 @@ from __future__ import annotations
 import shutil
 import tempfile
 from pathlib import Path
-from typing import List, Tuple, Union
+from typing import Dict, List, Set, Tuple, Union
 
 from core.logger import Logger
 from core.submodules.simple_config_parser.src.simple_config_parser.simple_config_parser import (
@@ -78,28 +78,94 @@ def add_config_section_at_top(section: str, instances: List[InstanceType]) -> No
         Logger.print_ok("OK!")
 
 
+class ConfigEditSession:
+    """
+    Context manager that reads each config file at most once, lets several
+    edits work on the contents in memory and writes every changed file back
+    a single time on exit. Every changed file is attempted, an OSError is
+    raised afterwards if any of them could not be written
+    """
+
+    def __init__(self) -> None:
+        self._contents: Dict[Path, str] = {}
+        self._dirty: Set[Path] = set()
+
+    def __enter__(self) -> ConfigEditSession:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if exc_type is not None:
+            return
+
+        failed: List[Path] = []
+        for path, content in self._contents.items():
+            if path not in self._dirty:
+                continue
+            Logger.print_status(f"Write changes to '{path}' ...")
+            try:
+                path.write_text(content, encoding="utf-8")
+            except OSError as e:
+                Logger.print_error(f"Unable to write '{path}':\n{e}")
+                failed.append(path)
+                continue
+            Logger.print_ok("OK!")
+        self._dirty.clear()
+
+        if failed:
+            raise OSError(f"Unable to write {', '.join(map(str, failed))}")
+
+    def read(self, path: Path) -> str | None:
+        """Return the contents of a config file, None if it does not exist"""
+        path = Path(path)
+        if path not in self._contents:
+            try:
+                self._contents[path] = path.read_text(encoding="utf-8")
+            except FileNotFoundError:
+                return None
+        return self._contents[path]
+
+    def update(self, path: Path, content: str) -> None:
+        """Replace the contents of a config file, written back on exit"""
+        path = Path(path)
+        if self._contents.get(path) != content:
+            self._contents[path] = content
+            self._dirty.add(path)
+
+
 def remove_config_section(
-    section: str, instances: List[InstanceType]
+    section: str,
+    instances: List[InstanceType],
+    session: ConfigEditSession | None = None,
 ) -> List[InstanceType]:
     removed_from: List[InstanceType] = []
     for instance in instances:
         cfg_file = instance.cfg_file
         Logger.print_status(f"Remove section '[{section}]' from '{cfg_file}' ...")
 
-        if not Path(cfg_file).exists():
+        if session is not None:
+            content = session.read(cfg_file)
+        elif Path(cfg_file).exists():
+            content = Path(cfg_file).read_text(encoding="utf-8")
+        else:
+            content = None
+        if content is None:
             Logger.print_warn(f"'{cfg_file}' not found!")
             continue
 
         scp = SimpleConfigParser()
-        scp.read_file(cfg_file)
+        scp.read_string(content)
         if not scp.has_section(section):
             Logger.print_info("Section does not exist. Skipped ...")
             continue
 
         scp.remove_section(section)
-        scp.write_file(cfg_file)
-
         removed_from.append(instance)
+        if session is not None:
+            # the session reports the result once the file is written
+            session.update(cfg_file, scp.write_string())
+            continue
+
+        scp.write_file(cfg_file)
         Logger.print_ok("OK!")
 
     return removed_from
@@ -9,12 +9,14 @@
 from __future__ import annotations
 
 import ipaddress
-import shutil
-from subprocess import PIPE, CalledProcessError, run
-from typing import Dict, Iterable, List, Optional
+import re
+from pathlib import Path
+from subprocess import PIPE, CalledProcessError, Popen, run
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
 
 from core.logger import DialogType, Logger
 from core.types.color import Color
+from utils.cached_fs import cached_which
 from utils.input_utils import (
     get_confirm,
     get_selection_input,
@@ -24,7 +26,17 @@ from utils.sudo_session import ensure_sudo_session
 
 
 NFT_CHAIN_CMD = ["sudo", "nft", "list", "chain", "inet", "filter", "input"]
-NFT_ADD_RULE_CMD = ["sudo", "nft", "add", "rule", "inet", "filter", "input"]
+NFT_BATCH_CMD = ["sudo", "nft", "-f", "-"]
+NFT_ADD_RULE = "add rule inet filter input"
+
+# an optional "ip[6] saddr <network>" match followed by "tcp dport <port>"
+_RULE_RE = re.compile(
+    r"(?:\b(?P<family>ip6?) saddr (?P<network>\S+) )?\btcp dport (?P<port>\d+)\b"
+)
+
+IPNetwork = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+NftScope = Optional[Tuple[str, str]]
+NftRules = Set[Tuple[NftScope, int]]
 
 
 def configure_nftables(service_name: str, ports: Iterable[int], context: str | None = None) -> None:
@@ -34,7 +46,7 @@ def configure_nftables(service_name: str, ports: Iterable[int], context: str | N
     if not unique_ports:
         return
 
-    if not shutil.which("nft"):
+    if not cached_which("nft"):
         Logger.print_info(
             "nftables binary not found. Skipping firewall configuration prompt."
         )
@@ -48,7 +60,10 @@ def configure_nftables(service_name: str, ports: Iterable[int], context: str | N
         )
         return
 
-    missing_ports = [p for p in unique_ports if not _has_rule_for_port(chain_state, p)]
+    # the chain is listed and parsed once, _apply_nft_rules reuses the result
+    rules = _parse_chain(chain_state)
+    allowed = _ports_allowed(rules)
+    missing_ports = [p for p in unique_ports if p not in allowed]
     if not missing_ports:
         Logger.print_info(
             f"Existing nftables rules already allow access to {service_name} on "
@@ -91,7 +106,7 @@ def configure_nftables(service_name: str, ports: Iterable[int], context: str | N
         )
         return
 
-    _apply_nft_rules(service_name, missing_ports, networks)
+    _apply_nft_rules(service_name, missing_ports, networks, rules=rules, allowed=allowed)
 
 
 def _select_network_scope(service_name: str) -> Optional[Dict[str, List[str]]]:
@@ -146,19 +161,13 @@ def _prompt_custom_networks(service_name: str) -> Optional[Dict[str, List[str]]]
             Logger.print_error("Input must not be empty!")
             continue
 
-        networks: Dict[str, List[str]] = {"ip": [], "ip6": []}
-        try:
-            for entry in entries:
-                network = ipaddress.ip_network(entry, strict=False)
-                key = "ip6" if network.version == 6 else "ip"
-                formatted = str(network)
-                if formatted not in networks[key]:
-                    networks[key].append(formatted)
-        except ValueError:
+        parsed = [_safe_parse(entry) for entry in entries]
+        if None in parsed:
             Logger.print_error(
                 "One or more entries were invalid. Please provide CIDR notation or single IPs."
             )
             continue
+        networks = _group_networks(parsed)
 
         if not networks["ip"] and not networks["ip6"]:
             Logger.print_error("No valid networks provided. Try again.")
@@ -170,101 +179,131 @@ def _prompt_custom_networks(service_name: str) -> Optional[Dict[str, List[str]]]
         return networks
 
 
-def _detect_local_networks() -> Dict[str, List[str]]:
-    detected: Dict[str, List[str]] = {"ip": [], "ip6": []}
+IF_INET6 = Path("/proc/net/if_inet6")
+IPV4_ADDR_CMD = ["ip", "-o", "-f", "inet", "addr", "show"]
 
-    commands = [
-        ("ip", ["ip", "-o", "-f", "inet", "addr", "show"]),
-        ("ip6", ["ip", "-o", "-f", "inet6", "addr", "show"]),
-    ]
+# IPv6 address scopes as listed in /proc/net/if_inet6
+_IPV6_SCOPE_HOST = 0x10
+_IPV6_SCOPE_LINK = 0x20
 
-    for family, command in commands:
-        try:
-            result = run(command, stdout=PIPE, stderr=PIPE, text=True, check=True)
-        except (CalledProcessError, FileNotFoundError):
-            continue
 
-        for line in result.stdout.splitlines():
-            if " lo " in line or "scope host" in line:
-                continue
-            if family == "ip6" and " scope link " in line:
-                continue
-            parts = line.split()
-            if len(parts) < 4:
-                continue
-            address = parts[3]
-            try:
-                network = ipaddress.ip_network(address, strict=False)
-            except ValueError:
-                continue
-            key = "ip6" if network.version == 6 else "ip"
-            formatted = str(network)
-            if formatted not in detected[key]:
-                detected[key].append(formatted)
+def _safe_parse(entry: str) -> Optional[IPNetwork]:
+    try:
+        return ipaddress.ip_network(entry, strict=False)
+    except ValueError:
+        return None
 
-    return detected
 
+def _group_networks(networks: Iterable[Optional[IPNetwork]]) -> Dict[str, List[str]]:
+    grouped: Dict[str, List[str]] = {"ip": [], "ip6": []}
+    for network in networks:
+        if network is not None:
+            grouped["ip6" if network.version == 6 else "ip"].append(str(network))
+    # drop duplicates in a single pass while keeping the first-seen order
+    return {key: list(dict.fromkeys(values)) for key, values in grouped.items()}
 
-def _apply_nft_rules(
-    service_name: str, ports: Iterable[int], networks: Dict[str, List[str]]
-) -> None:
-    chain_state = _list_input_chain()
-    if chain_state is None:
-        Logger.print_warn(
-            "Unable to re-read nftables chain. Skipping automatic rule creation."
-        )
-        return
 
-    for port in ports:
-        if not networks["ip"] and not networks["ip6"]:
-            _add_rule(service_name, port, None, chain_state)
-            chain_state = _list_input_chain() or chain_state
-            continue
+def _detect_local_networks() -> Dict[str, List[str]]:
+    # start the IPv4 lookup first and read the IPv6 addresses while it runs
+    try:
+        proc: Popen | None = Popen(IPV4_ADDR_CMD, stdout=PIPE, stderr=PIPE, text=True)
+    except FileNotFoundError:
+        proc = None
 
-        for family in ("ip", "ip6"):
-            for network in networks[family]:
-                _add_rule(service_name, port, (family, network), chain_state)
-                chain_state = _list_input_chain() or chain_state
+    found: List[Optional[IPNetwork]] = list(_read_ipv6_networks())
 
+    if proc is not None:
+        stdout, _ = proc.communicate()
+        if proc.returncode == 0:
+            for line in stdout.splitlines():
+                parts = line.split()
+                if len(parts) < 4 or " lo " in line or "scope host" in line:
+                    continue
+                found.append(_safe_parse(parts[3]))
 
-def _add_rule(
+    return _group_networks(found)
+
+
+def _read_ipv6_networks() -> List[ipaddress.IPv6Network]:
+    # the kernel lists every IPv6 address as:
+    # <address hex> <ifindex> <prefix length> <scope> <flags> <interface>
+    try:
+        content = IF_INET6.read_text()
+    except OSError:
+        return []
+
+    networks: List[ipaddress.IPv6Network] = []
+    for line in content.splitlines():
+        parts = line.split()
+        if len(parts) < 6 or parts[5] == "lo":
+            continue
+        try:
+            scope = int(parts[3], 16)
+            if scope in (_IPV6_SCOPE_HOST, _IPV6_SCOPE_LINK):
+                continue
+            address = ipaddress.IPv6Address(bytes.fromhex(parts[0]))
+            prefix = int(parts[2], 16)
+            networks.append(ipaddress.IPv6Network(f"{address}/{prefix}", strict=False))
+        except ValueError:
+            continue
+    return networks
+
+
+def _apply_nft_rules(
     service_name: str,
-    port: int,
-    scope: Optional[tuple[str, str]],
-    chain_state: str,
+    ports: Iterable[int],
+    networks: Dict[str, List[str]],
+    *,
+    rules: NftRules,
+    allowed: Set[int],
 ) -> None:
-    family_label = "" if scope is None else f" {scope[0]} saddr {scope[1]}"
-    search_term = f"tcp dport {port}"
-    if scope is not None:
-        search_term = f"{scope[0]} saddr {scope[1]} {search_term}"
+    scopes: List[NftScope] = [
+        (family, network) for family in ("ip", "ip6") for network in networks[family]
+    ]
+    pending: List[Tuple[int, NftScope]] = []
+    for port in ports:
+        for scope in scopes or [None]:
+            if _has_rule(rules, allowed, port, scope) or (port, scope) in pending:
+                continue
+            pending.append((port, scope))
 
-    if search_term in chain_state:
+    if not pending:
         return
 
-    Logger.print_status(
-        f"Adding nftables rule for {service_name} on port {port}{family_label}."
-    )
-
-    command = list(NFT_ADD_RULE_CMD)
-    if scope is not None:
-        family, network = scope
-        command.extend([family, "saddr", network])
-    command.extend(["tcp", "dport", str(port), "accept"])
+    for port, scope in pending:
+        Logger.print_status(
+            f"Adding nftables rule for {service_name} on port {port}{_scope_label(scope)}."
+        )
 
+    # all rules go into a single nft transaction, they are applied atomically
+    script = "".join(f"{_rule_statement(port, scope)}\n" for port, scope in pending)
     try:
         ensure_sudo_session()
-        run(command, stderr=PIPE, check=True)
+        run(NFT_BATCH_CMD, input=script.encode(), stderr=PIPE, check=True)
     except CalledProcessError as exc:
         Logger.print_error(
-            "Failed to add nftables rule: "
+            "Failed to add nftables rules: "
             f"{exc.stderr.decode(errors='ignore').strip()}"
         )
-    else:
+        return
+
+    # keep the caller's view of the chain current without listing it again
+    for port, scope in pending:
+        rules.add((scope, port))
+        allowed.add(port)
         Logger.print_ok(
-            f"nftables now allows {service_name} on port {port}{family_label}."
+            f"nftables now allows {service_name} on port {port}{_scope_label(scope)}."
         )
 
 
+def _scope_label(scope: NftScope) -> str:
+    return "" if scope is None else f" {scope[0]} saddr {scope[1]}"
+
+
+def _rule_statement(port: int, scope: NftScope) -> str:
+    return f"{NFT_ADD_RULE}{_scope_label(scope)} tcp dport {port} accept"
+
+
 def _list_input_chain() -> Optional[str]:
     try:
         ensure_sudo_session()
@@ -291,6 +330,20 @@ def _list_input_chain() -> Optional[str]:
     return None
 
 
-def _has_rule_for_port(chain_state: str, port: int) -> bool:
-    pattern = f"tcp dport {port}"
-    return any(pattern in line for line in chain_state.splitlines())
+def _parse_chain(chain_state: str) -> NftRules:
+    rules: NftRules = set()
+    for match in _RULE_RE.finditer(chain_state):
+        scope = None if match["family"] is None else (match["family"], match["network"])
+        rules.add((scope, int(match["port"])))
+    return rules
+
+
+def _ports_allowed(rules: NftRules) -> Set[int]:
+    return {port for _, port in rules}
+
+
+def _has_rule(rules: NftRules, allowed: Set[int], port: int, scope: NftScope) -> bool:
+    # an unscoped rule counts as present if any rule already opens the port
+    if scope is None:
+        return port in allowed
+    return (scope, port) in rules
@@ -123,6 +123,46 @@ def run_remove_routines(file: Path) -> bool:
             return False
 
 
+def write_text_file(file_path: Path, content: str, mode: int = 0o644) -> None:
+    """
+    Helper function to write a small text file with a single raw write,
+    bypassing the buffered/text io layers of open() |
+    :param file_path: the path of the file to write
+    :param content: the content to write
+    :param mode: permissions used if the file gets created
+    :return: None
+    """
+    data = memoryview(content.encode())
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_CLOEXEC
+    fd = os.open(file_path, flags, mode)
+    try:
+        while data:
+            data = data[os.write(fd, data) :]
+    finally:
+        os.close(fd)
+
+
+def replace_text_file(file_path: Path, content: str, mode: int = 0o644) -> None:
+    """
+    Helper function to atomically replace a text file. The content is written
+    to a temporary sibling which is then renamed over the target, so readers
+    never see a partially written file |
+    :param file_path: the path of the file to replace
+    :param content: the content to write
+    :param mode: permissions of the resulting file
+    :return: None
+    """
+    tmp_path = file_path.with_name(f".{file_path.name}.tmp")
+    try:
+        write_text_file(tmp_path, content, mode)
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, file_path)
+    except OSError:
+        if tmp_path.exists():
+            tmp_path.unlink()
+        raise
+
+
 def unzip(filepath: Path, target_dir: Path) -> None:
     """
     Helper function to unzip a zip-archive into a target directory |
@@ -21,7 +21,12 @@ class GitException(Exception):
 
 
 def git_clone_wrapper(
-    repo: str, target_dir: Path, branch: str | None = None, force: bool = False
+    repo: str,
+    target_dir: Path,
+    branch: str | None = None,
+    force: bool = False,
+    depth: int | None = None,
+    single_branch: bool = False,
 ) -> None:
     """
     Clones a repository from the given URL and checks out the specified branch if given.
@@ -31,6 +36,8 @@ def git_clone_wrapper(
     :param branch: The branch to check out. If None, master or main, no checkout will be performed.
     :param target_dir: The directory where the repository will be cloned.
     :param force: Force the cloning of the repository even if it already exists.
+    :param depth: Truncate the history to the given number of commits.
+    :param single_branch: Only fetch the history of the given (or default) branch.
     :return: None
     """
     log = f"Cloning repository from '{repo}'"
@@ -43,7 +50,20 @@ def git_clone_wrapper(
                 return
             shutil.rmtree(target_dir)
 
-        git_cmd_clone(repo, target_dir, blobless=True)
+        if single_branch:
+            # the branch has to be selected at clone time, a later
+            # checkout would not find any other remote branch
+            git_cmd_clone(
+                repo,
+                target_dir,
+                blobless=True,
+                depth=depth,
+                branch=branch,
+                single_branch=True,
+            )
+            return
+
+        git_cmd_clone(repo, target_dir, blobless=True, depth=depth)
 
         if branch not in ("master", "main"):
             git_cmd_checkout(branch, target_dir)
@@ -57,15 +77,19 @@ def git_clone_wrapper(
         raise GitException(f"Error removing existing repository: {e.strerror}")
 
 
-def git_pull_wrapper(target_dir: Path) -> None:
+def git_pull_wrapper(target_dir: Path, shallow: bool = False) -> None:
     """
     A function that updates a repository using git pull.
 
     :param target_dir: The directory of the repository.
+    :param shallow: Fetch only the branch tip and hard reset to it instead of pulling.
     :return: None
     """
     Logger.print_status("Updating repository ...")
     try:
+        if shallow:
+            git_cmd_shallow_update(target_dir)
+            return
         git_cmd_pull(target_dir)
     except CalledProcessError:
         log = "An unexpected error occured during updating the repository."
@@ -308,19 +332,35 @@ def get_remote_commit(repo: Path) -> str | None:
         return None
 
 
-def git_cmd_clone(repo: str, target_dir: Path, blobless: bool = False) -> None:
+def git_cmd_clone(
+    repo: str,
+    target_dir: Path,
+    blobless: bool = False,
+    depth: int | None = None,
+    branch: str | None = None,
+    single_branch: bool = False,
+) -> None:
     """
     Clones a repository with optional blobless clone.
 
     :param repo: URL of the repository to clone.
     :param target_dir: Path where the repository will be cloned.
     :param blobless: If True, perform a blobless clone by adding the '--filter=blob:none' flag.
+    :param depth: If set, perform a shallow clone with the given history depth.
+    :param branch: Branch to check out directly while cloning.
+    :param single_branch: If True, only fetch the history of a single branch.
     """
     try:
         command = ["git", "clone"]
 
         if blobless:
             command.append("--filter=blob:none")
+        if depth is not None:
+            command.append(f"--depth={depth}")
+        if single_branch:
+            command.append("--single-branch")
+        if branch is not None:
+            command += ["--branch", branch]
 
         command += [repo, target_dir.as_posix()]
 
@@ -358,6 +398,32 @@ def git_cmd_pull(target_dir: Path) -> None:
         raise
 
 
+def git_cmd_shallow_update(target_dir: Path, branch: str | None = None) -> None:
+    """
+    Updates a (shallow) clone to the tip of the remote branch without merging.
+    Local changes to tracked files are discarded, untracked files are kept.
+
+    :param target_dir: The directory of the repository.
+    :param branch: The remote branch to update to, defaults to the current branch.
+    """
+    if branch is None:
+        branch = get_current_branch(target_dir)
+    if branch in ("", "-"):
+        # detached HEAD, fall back to the default branch of the remote
+        branch = "HEAD"
+
+    try:
+        command = ["git", "fetch", "--depth=1", "origin", branch]
+        run(command, cwd=target_dir, check=True)
+        command = ["git", "reset", "--hard", "FETCH_HEAD"]
+        run(command, cwd=target_dir, check=True)
+    except CalledProcessError as e:
+        error = e.stderr.decode() if e.stderr else "Unknown error"
+        log = f"Error updating repository to origin/{branch}: {error}"
+        Logger.print_error(log)
+        raise
+
+
 def rollback_repository(repo_dir: Path, instance: Type[InstanceType]) -> None:
     q1 = "How many commits do you want to roll back"
     amount = get_number_input(q1, 1, allow_go_back=True)
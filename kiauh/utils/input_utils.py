@@ -9,7 +9,7 @@
 from __future__ import annotations
 
 import re
-from typing import Dict, List
+from typing import Dict, List, Pattern
 
 from core.constants import INVALID_CHOICE
 from core.logger import Logger
@@ -82,7 +82,7 @@ def get_number_input(
 
 def get_string_input(
     question: str,
-    regex: str | None = None,
+    regex: str | Pattern[str] | None = None,
     exclude: List[str] | None = None,
     allow_empty: bool = False,
     allow_special_chars: bool = False,
@@ -91,7 +91,7 @@ def get_string_input(
     """
     Helper method to get a string input from the user
     :param question: The question to display
-    :param regex: An optional regex pattern to validate the input against
+    :param regex: An optional regex pattern or compiled pattern to validate the input against
     :param exclude: List of strings which are not allowed
     :param allow_empty: Whether to allow empty input
     :param allow_special_chars: Wheter to allow special characters in the input
@@ -100,6 +100,7 @@ def get_string_input(
     """
     _exclude = [] if exclude is None else exclude
     _question = format_question(question, default)
+    # re.compile hands an already compiled pattern back unchanged
     _pattern = re.compile(regex) if regex is not None else None
     while True:
         _input = input(_question)
@@ -0,0 +1,41 @@
+# ======================================================================= #
+#  Copyright (C) 2020 - 2025 Dominik Willner <th33xitus@gmail.com>        #
+#                                                                         #
+#  This file is part of KIAUH - Klipper Installation And Update Helper    #
+#  https://github.com/dw-0/kiauh                                          #
+#                                                                         #
+#  This file may be distributed under the terms of the GNU GPLv3 license  #
+# ======================================================================= #
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Dict, List, Type
+
+if TYPE_CHECKING:
+    from utils.instance_type import InstanceType
+
+_INSTANCES_CACHE: Dict[type, List[Any]] = {}
+
+
+def get_instances_cached(instance_type: Type[InstanceType]) -> List[InstanceType]:
+    """
+    Get the instances of a class, scanning the service directory only once.
+    A single install, update or remove action asks for the same instances
+    several times while the set of services does not change |
+    :param instance_type: the instance class to look up
+    :return: a new list of the cached instances
+    """
+    from utils.instance_utils import get_instances
+
+    cached = _INSTANCES_CACHE.get(instance_type)
+    if cached is None:
+        cached = get_instances(instance_type)
+        _INSTANCES_CACHE[instance_type] = cached
+    return list(cached)
+
+
+def invalidate_instances_cache() -> None:
+    """
+    Forget all cached instances, call this after creating or removing services |
+    :return: None
+    """
+    _INSTANCES_CACHE.clear()
@@ -2,22 +2,35 @@
 
 from __future__ import annotations
 
-import shutil
+import atexit
+import os
+import re
 import subprocess
 import threading
+import time
 from subprocess import DEVNULL
 
 from core.logger import Logger
+from utils.cached_fs import cached_which
 from utils.input_utils import get_confirm
 
 
 _GLOBAL_SESSION: "SudoSession" | None = None
 
+# sudo's built-in credential lifetime in minutes, used if none is configured
+_DEFAULT_TIMESTAMP_TIMEOUT = 5.0
+_TIMESTAMP_TIMEOUT_RE = re.compile(r"timestamp_timeout\s*=\s*(-?[\d.]+)")
+# seconds to wait before retrying a failed refresh
+_REFRESH_RETRY_DELAY = 2
+
 
 def get_sudo_session() -> "SudoSession":
     global _GLOBAL_SESSION
     if _GLOBAL_SESSION is None:
         _GLOBAL_SESSION = SudoSession()
+        # stop the refresher and drop the timestamp even if the helper
+        # exits without passing through main()
+        atexit.register(shutdown_sudo_session)
     return _GLOBAL_SESSION
 
 
@@ -37,23 +50,51 @@ def shutdown_sudo_session() -> None:
 class SudoSession:
     """Cache sudo credentials for the lifetime of a KIAUH session."""
 
-    def __init__(self, refresh_interval: int = 60) -> None:
+    def __init__(self, refresh_interval: int | None = None) -> None:
         self.refresh_interval = refresh_interval
+        # the interval in use, resolved once caching starts
+        self._interval = 0
         self._prompted = False
         self._enabled = False
+        self._expired = False
+        # wall clock time after which the cached credentials may be gone,
+        # time.time() keeps running while the machine is suspended
+        self._deadline = 0.0
         self._stop_event = threading.Event()
         self._thread: threading.Thread | None = None
         self._refresh_cmd: list[str] | None = ["sudo", "-n", "-v"]
+        self._refresh_disabled = os.environ.get("KIAUH_NO_SUDO_REFRESH") == "1"
+        # opened once for the refresher instead of once per refresh
+        self._devnull: int | None = None
+
+    def __enter__(self) -> "SudoSession":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
 
     def ensure_active(self) -> None:
         """Prompt for caching when first sudo access is required."""
 
         if self._prompted:
+            # the refresher stopped after the credentials expired, prime
+            # them again now that sudo is actually needed
+            if self._expired:
+                self._expired = False
+                Logger.print_warn("The cached sudo credentials expired.")
+                self._start_caching()
+            # the refresher's timer stood still during a suspend, refresh
+            # now instead of waiting for its next wakeup
+            elif self._thread and time.time() > self._deadline and not self._refresh():
+                self._stop_refresher()
+                self._enabled = False
+                self._start_caching()
             return
 
         self._prompted = True
 
-        if shutil.which("sudo") is None:
+        # root needs no cached credentials and no refresher thread
+        if os.geteuid() == 0 or cached_which("sudo") is None:
             return
 
         Logger.print_info(
@@ -71,6 +112,9 @@ class SudoSession:
         if not consent:
             return
 
+        self._start_caching()
+
+    def _start_caching(self) -> None:
         Logger.print_status("Priming sudo credential cache ...")
 
         try:
@@ -104,53 +148,104 @@ class SudoSession:
             )
             return
 
+        if self._refresh_disabled:
+            self.refresh_interval = 0
+        elif self.refresh_interval is None:
+            self.refresh_interval = self._detect_refresh_interval()
+        self._interval = self.refresh_interval
+
+        # credentials that never expire, or a disabled refresher, need no thread
+        if self._interval <= 0:
+            return
+
+        self._deadline = time.time() + self._interval
+
+        if self._devnull is None:
+            self._devnull = os.open(os.devnull, os.O_RDWR)
         self._thread = threading.Thread(target=self._refresh_loop, daemon=True)
         self._thread.start()
 
     def close(self) -> None:
         """Stop refreshing and clear cached credentials."""
 
-        if shutil.which("sudo") is None:
+        # nothing was cached: root, no sudo, declined, or already closed
+        if not self._enabled and self._thread is None and self._devnull is None:
+            self._expired = False
             return
 
-        if self._thread and self._thread.is_alive():
-            self._stop_event.set()
-            self._thread.join()
+        self._stop_refresher()
 
         if self._enabled:
             subprocess.run(["sudo", "-k"], stdout=DEVNULL, stderr=DEVNULL)
 
-        self._thread = None
+        if self._devnull is not None:
+            os.close(self._devnull)
+            self._devnull = None
+
         self._enabled = False
+        self._expired = False
+
+    def _stop_refresher(self) -> None:
+        if self._thread and self._thread.is_alive():
+            self._stop_event.set()
+            self._thread.join()
+
+        self._thread = None
         self._stop_event.clear()
 
     def _refresh_loop(self) -> None:
         if self._refresh_cmd is None:
             return
 
-        while not self._stop_event.wait(self.refresh_interval):
-            result = subprocess.run(
-                self._refresh_cmd,
-                stdout=DEVNULL,
-                stderr=subprocess.PIPE,
-                text=True,
-            )
-            if result.returncode == 0:
+        while not self._stop_event.wait(self._interval):
+            if self._refresh():
                 continue
 
-            if self._is_option_unsupported(result.stderr) and self._refresh_cmd != [
-                "sudo",
-                "-v",
-            ]:
-                self._refresh_cmd = ["sudo", "-v"]
+            # give a briefly locked timestamp file a second chance
+            if self._stop_event.wait(_REFRESH_RETRY_DELAY) or self._refresh():
                 continue
 
-            Logger.print_warn(
-                "The cached sudo credentials expired. Future commands may prompt again."
-            )
+            # no warning from here, it would garble the menu the main thread
+            # draws; ensure_active reports it before sudo is needed again
             self._enabled = False
+            self._expired = True
             return
 
+    def _refresh(self) -> bool:
+        # _select_refresh_command already probed which options sudo
+        # supports, so a failed refresh can only mean expired credentials
+        if self._refresh_cmd is None:
+            return False
+        devnull = DEVNULL if self._devnull is None else self._devnull
+        returncode = subprocess.call(
+            self._refresh_cmd, stdin=devnull, stdout=devnull, stderr=devnull
+        )
+        if returncode != 0:
+            return False
+        self._deadline = time.time() + self._interval
+        return True
+
+    @staticmethod
+    def _detect_refresh_interval() -> int:
+        """Refresh shortly before sudo's timestamp_timeout runs out, 0 if it never does."""
+
+        timeout = _DEFAULT_TIMESTAMP_TIMEOUT
+        try:
+            result = subprocess.run(
+                ["sudo", "-n", "-l"], stdout=subprocess.PIPE, stderr=DEVNULL, text=True
+            )
+            match = _TIMESTAMP_TIMEOUT_RE.search(result.stdout or "")
+            if result.returncode == 0 and match:
+                configured = float(match[1])
+                # negative values never expire, 0 disables caching: keep the default
+                if configured < 0:
+                    return 0
+                if configured > 0:
+                    timeout = configured
+        except (OSError, ValueError):
+            pass
+        return max(30, int(timeout * 60) - 30)
+
     @staticmethod
     def _is_option_unsupported(stderr: str | None) -> bool:
         if not stderr:
@@ -10,23 +10,25 @@ from __future__ import annotations
 
 import os
 import re
-import select
 import shutil
 import socket
+import stat
 import sys
 import time
 import urllib.error
 import urllib.request
+from collections import deque
 from enum import Enum
 from functools import lru_cache
 from pathlib import Path
 from subprocess import DEVNULL, PIPE, CalledProcessError, Popen, check_output, run
-from typing import Iterable, List, Literal, Set, Tuple
+from typing import Deque, Iterable, List, Literal, Set, Tuple
 
 from core.constants import OPENRC, SYSTEMD
 from core.logger import Logger
-from utils.fs_utils import check_file_exist, remove_with_sudo
+from utils.fs_utils import remove_with_sudo, write_text_file
 from utils.input_utils import get_confirm
+from utils.instance_cache import invalidate_instances_cache
 from utils.sudo_session import ensure_sudo_session
 
 SysCtlServiceAction = Literal[
@@ -138,11 +140,11 @@ PACKAGE_TRANSLATIONS = {
         "libavutil-dev": "ffmpeg-dev",
         "libbsd-dev": "libbsd-dev",
         "libcamera-apps-lite": None,
-        "libcamera-dev": ["libcamera", "libcamera-dev"],
-        "libevent-dev": ["libevent", "libevent-dev"],
+        "libcamera-dev": ("libcamera", "libcamera-dev"),
+        "libevent-dev": ("libevent", "libevent-dev"),
         "libffi-dev": "libffi-dev",
         "libjpeg-dev": "libjpeg-turbo-dev",
-        "liblivemedia-dev": ["live555", "live555-dev"],
+        "liblivemedia-dev": ("live555", "live555-dev"),
         "libncurses-dev": "ncurses-dev",
         "libnewlib-arm-none-eabi": "newlib-arm-none-eabi",
         "libopenblas-dev": "openblas-dev",
@@ -190,7 +192,7 @@ def has_package_equivalent(
     if mapped is None:
         return False
 
-    if isinstance(mapped, (list, tuple, set)):
+    if isinstance(mapped, tuple):
         return all(item for item in mapped)
 
     return bool(mapped)
@@ -200,27 +202,21 @@ def resolve_package_names(packages: Iterable[str], manager: PackageManager) -> L
     translations = PACKAGE_TRANSLATIONS.get(manager, {})
     resolved: List[str] = []
     for package in packages:
-        if package in translations:
-            mapped = translations[package]
-            if mapped is None:
-                warning_key = (manager, package)
-                if warning_key not in _UNAVAILABLE_PACKAGE_WARNINGS:
-                    Logger.print_warn(
-                        f"No {manager.value} equivalent available for package '{package}'. Skipping."
-                    )
-                    _UNAVAILABLE_PACKAGE_WARNINGS.add(warning_key)
-                continue
+        mapped = translations.get(package, package)
+        if mapped is None:
+            warning_key = (manager, package)
+            if warning_key not in _UNAVAILABLE_PACKAGE_WARNINGS:
+                Logger.print_warn(
+                    f"No {manager.value} equivalent available for package '{package}'. Skipping."
+                )
+                _UNAVAILABLE_PACKAGE_WARNINGS.add(warning_key)
+        elif isinstance(mapped, tuple):
+            resolved.extend(mapped)
         else:
-            mapped = package
+            resolved.append(mapped)
 
-        if isinstance(mapped, (list, tuple, set)):
-            for item in mapped:
-                if item not in resolved:
-                    resolved.append(item)
-        else:
-            if mapped not in resolved:
-                resolved.append(mapped)
-    return resolved
+    # dict keys keep the first-seen order while dropping duplicates
+    return list(dict.fromkeys(resolved))
 
 
 def kill(opt_err_msg: str = "") -> None:
@@ -250,6 +246,9 @@ def check_python_version(major: int, minor: int) -> bool:
     return True
 
 
+_PKGLIST_PATTERN = re.compile(rb"^[ \t]*PKGLIST=(.*)$", re.MULTILINE)
+
+
 def parse_packages_from_file(source_file: Path) -> List[str]:
     """
     Read the package names from bash scripts, when defined like:
@@ -258,15 +257,22 @@ def parse_packages_from_file(source_file: Path) -> List[str]:
     :return: A list of package names
     """
 
-    packages = []
-    with open(source_file, "r") as file:
-        for line in file:
-            line = line.strip()
-            if line.startswith("PKGLIST="):
-                line = line.replace('"', "")
-                line = line.replace("PKGLIST=", "")
-                line = line.replace("${PKGLIST}", "")
-                packages.extend(line.split())
+    return parse_packages_from_files([source_file])
+
+
+def parse_packages_from_files(source_files: Iterable[Path]) -> List[str]:
+    """
+    Read the package names from several bash scripts in a single pass,
+    see parse_packages_from_file() for the expected format |
+    :param source_files: paths of the sourcefiles to read from
+    :return: A list of package names
+    """
+
+    content = b"\n".join(Path(source).read_bytes() for source in source_files)
+    packages: List[str] = []
+    for match in _PKGLIST_PATTERN.finditer(content):
+        line = match.group(1).replace(b'"', b"").replace(b"${PKGLIST}", b"")
+        packages.extend(line.decode().split())
 
     return packages
 
@@ -295,35 +301,51 @@ def create_python_venv(
         "--system-site-packages"
     ) if allow_access_to_system_site_packages else None
 
-    n = 2
-    while(n > 0):
-        if not target.exists():
-            try:
-                run(cmd, check=True)
-                Logger.print_ok("Setup of virtualenv successful!")
-                return True
-            except CalledProcessError as e:
-                Logger.print_error(f"Error setting up virtualenv:\n{e}")
-                return False
-        else:
-            if n == 1:
-                # This case should never happen, 
-                # but the function should still behave correctly
-                Logger.print_error("Virtualenv still exists after deletion.")
-                return False                            
-            if not force and not get_confirm(
-                "Virtualenv already exists. Re-create?", default_choice=False
-            ):
-                Logger.print_info("Skipping re-creation of virtualenv ...")
-                return False
+    if target.exists():
+        if not force and not get_confirm(
+            "Virtualenv already exists. Re-create?", default_choice=False
+        ):
+            Logger.print_info("Skipping re-creation of virtualenv ...")
+            return False
+        # let virtualenv wipe the old environment in the same run
+        cmd.append("--clear")
 
-            try:
-                shutil.rmtree(target)
-                n -= 1
-            except OSError as e:
-                log = f"Error removing existing virtualenv: {e.strerror}"
-                Logger.print_error(log, False)
-                return False
+    try:
+        run(cmd, check=True)
+        Logger.print_ok("Setup of virtualenv successful!")
+        return True
+    except CalledProcessError as e:
+        Logger.print_error(f"Error setting up virtualenv:\n{e}")
+        return False
+
+
+_PIP_STDERR_TAIL = 200
+
+
+def _run_pip(command: List[str]) -> Tuple[int, str]:
+    """
+    Run a pip command. Its stdout goes straight to the console, its stderr
+    is read as it arrives and only the last lines are kept for the report |
+    :param command: the pip command to run
+    :return: the return code and the tail of pip's stderr
+    """
+    tail: Deque[str] = deque(maxlen=_PIP_STDERR_TAIL)
+    with Popen(command, stderr=PIPE, text=True) as process:
+        if process.stderr is not None:
+            tail.extend(process.stderr)
+    return process.returncode, "".join(tail)
+
+
+def _venv_pip(target: Path) -> str:
+    """
+    Get the pip executable of a virtualenv |
+    :param target: Path of the virtualenv
+    :return: the path of pip as string
+    """
+    pip = os.path.join(target, "bin", "pip")
+    if not os.path.isfile(pip):
+        raise FileNotFoundError(f"pip not found in virtualenv {target}!")
+    return pip
 
 
 def update_python_pip(target: Path) -> None:
@@ -334,16 +356,10 @@ def update_python_pip(target: Path) -> None:
     """
     Logger.print_status("Updating pip ...")
     try:
-        pip_location: Path = target.joinpath("bin/pip")
-        pip_exists: bool = check_file_exist(pip_location)
-
-        if not pip_exists:
-            raise FileNotFoundError("Error updating pip! Not found.")
-
-        command = [pip_location.as_posix(), "install", "-U", "pip"]
-        result = run(command, stderr=PIPE, text=True)
-        if result.returncode != 0 or result.stderr:
-            Logger.print_error(f"{result.stderr}", False)
+        command = [_venv_pip(target), "install", "-U", "pip"]
+        returncode, stderr = _run_pip(command)
+        if returncode != 0 or stderr:
+            Logger.print_error(f"{stderr}", False)
             Logger.print_error("Updating pip failed!")
             return
 
@@ -365,16 +381,11 @@ def install_python_requirements(target: Path, requirements: Path) -> None:
     """
     try:
         Logger.print_status("Installing Python requirements ...")
-        command = [
-            target.joinpath("bin/pip").as_posix(),
-            "install",
-            "-r",
-            f"{requirements}",
-        ]
-        result = run(command, stderr=PIPE, text=True)
+        command = [_venv_pip(target), "install", "-r", f"{requirements}"]
+        returncode, stderr = _run_pip(command)
 
-        if result.returncode != 0:
-            Logger.print_error(f"{result.stderr}", False)
+        if returncode != 0:
+            Logger.print_error(f"{stderr}", False)
             raise VenvCreationFailedException("Installing Python requirements failed!")
 
         Logger.print_ok("Installing Python requirements successful!")
@@ -394,16 +405,11 @@ def install_python_packages(target: Path, packages: List[str]) -> None:
     """
     try:
         Logger.print_status("Installing Python requirements ...")
-        command = [
-            target.joinpath("bin/pip").as_posix(),
-            "install",
-        ]
-        for pkg in packages:
-            command.append(pkg)
-        result = run(command, stderr=PIPE, text=True)
+        command = [_venv_pip(target), "install", *packages]
+        returncode, stderr = _run_pip(command)
 
-        if result.returncode != 0:
-            Logger.print_error(f"{result.stderr}", False)
+        if returncode != 0:
+            Logger.print_error(f"{stderr}", False)
             raise VenvCreationFailedException("Installing Python requirements failed!")
 
         Logger.print_ok("Installing Python requirements successful!")
@@ -414,6 +420,9 @@ def install_python_packages(target: Path, packages: List[str]) -> None:
         raise VenvCreationFailedException(log)
 
 
+_package_lists_updated = False
+
+
 def update_system_package_lists(silent: bool, rls_info_change=False) -> None:
     """
     Updates the systems package list |
@@ -421,6 +430,12 @@ def update_system_package_lists(silent: bool, rls_info_change=False) -> None:
     :param rls_info_change: Flag for "--allow-releaseinfo-change"
     :return: None
     """
+    global _package_lists_updated
+
+    # the lists were already refreshed during this session
+    if _package_lists_updated and not rls_info_change:
+        return
+
     manager = get_package_manager()
 
     if manager == PackageManager.APT:
@@ -430,11 +445,13 @@ def update_system_package_lists(silent: bool, rls_info_change=False) -> None:
             Path("/var/lib/apt/lists"),
         ]
         for cache_file in cache_files:
-            if cache_file.exists():
-                cache_mtime = max(cache_mtime, os.path.getmtime(cache_file))
+            try:
+                cache_mtime = max(cache_mtime, cache_file.stat().st_mtime)
+            except FileNotFoundError:
+                continue
 
         update_age = int(time.time() - cache_mtime)
-        update_interval = 6 * 3600  # 48hrs
+        update_interval = 6 * 3600  # 6hrs
 
         if update_age <= update_interval:
             return
@@ -454,6 +471,7 @@ def update_system_package_lists(silent: bool, rls_info_change=False) -> None:
                 Logger.print_error("Updating system package list failed!")
                 return
 
+            _package_lists_updated = True
             Logger.print_ok("System package list update successful!")
         except CalledProcessError as e:
             stderr = e.stderr.decode() if isinstance(e.stderr, (bytes, bytearray)) else e.stderr
@@ -473,6 +491,7 @@ def update_system_package_lists(silent: bool, rls_info_change=False) -> None:
                 Logger.print_error("Updating system package list failed!")
                 return
 
+            _package_lists_updated = True
             Logger.print_ok("System package list update successful!")
         except CalledProcessError as e:
             stderr = e.stderr.decode() if isinstance(e.stderr, (bytes, bytearray)) else e.stderr
@@ -483,6 +502,11 @@ def update_system_package_lists(silent: bool, rls_info_change=False) -> None:
         Logger.print_warn("Unsupported package manager. Skipping package list update.")
 
 
+# "name/suite version arch [upgradable from: ...]", the header has no slash
+_APT_UPGRADABLE_RE = re.compile(rb"^([^/\s]+)/", re.MULTILINE)
+_APK_UPGRADABLE_RE = re.compile(rb"^[ \t]*(\S+)", re.MULTILINE)
+
+
 def get_upgradable_packages() -> List[str]:
     """
     Reads all system packages that can be upgraded.
@@ -493,26 +517,14 @@ def get_upgradable_packages() -> List[str]:
     try:
         if manager == PackageManager.APT:
             command = ["apt", "list", "--upgradable"]
-            output: str = check_output(command, stderr=DEVNULL, text=True, encoding="utf-8")
-            pkglist = []
-            for line in output.split("\n"):
-                if "/" not in line:
-                    continue
-                pkg = line.split("/")[0]
-                pkglist.append(pkg)
-            return pkglist
+            output = check_output(command, stderr=DEVNULL)
+            return [m.group(1).decode() for m in _APT_UPGRADABLE_RE.finditer(output)]
 
         if manager == PackageManager.APK:
             command = ["apk", "version", "-l", "<"]
-            output = check_output(command, stderr=DEVNULL, text=True, encoding="utf-8")
-            pkglist = []
-            for line in output.splitlines():
-                if not line.strip():
-                    continue
-                pkg = line.split()[0]
-                if pkg and pkg not in pkglist:
-                    pkglist.append(pkg)
-            return pkglist
+            output = check_output(command, stderr=DEVNULL)
+            names = (m.group(1).decode() for m in _APK_UPGRADABLE_RE.finditer(output))
+            return list(dict.fromkeys(names))
 
         Logger.print_warn("Unsupported package manager. Cannot determine upgradable packages.")
         return []
@@ -520,46 +532,51 @@ def get_upgradable_packages() -> List[str]:
         raise Exception(f"Error reading upgradable packages: {e}")
 
 
-def check_package_install(packages: Set[str]) -> List[str]:
+def check_package_install(packages: Iterable[str]) -> List[str]:
     """
-    Checks the system for installed packages |
-    :param packages: List of strings of package names
+    Checks the system for installed packages with a single package manager query |
+    :param packages: Iterable of package names
     :return: A list containing the names of packages that are not installed
     """
     manager = get_package_manager()
     packages_to_check = resolve_package_names(packages, manager)
-
-    not_installed: List[str] = []
+    if not packages_to_check:
+        return []
 
     if manager == PackageManager.APT:
-        for package in packages_to_check:
-            command = ["dpkg-query", "-f'${Status}'", "--show", package]
-            result = run(
-                command,
-                stdout=PIPE,
-                stderr=DEVNULL,
-                text=True,
-            )
-            if "installed" not in result.stdout.strip("'").split():
-                not_installed.append(package)
-
-    elif manager == PackageManager.APK:
-        for package in packages_to_check:
-            command = ["apk", "info", "-e", package]
-            result = run(
-                command,
-                stdout=PIPE,
-                stderr=DEVNULL,
-                text=True,
-            )
-            if result.returncode != 0:
-                not_installed.append(package)
-
-    else:
-        Logger.print_warn("Unsupported package manager. Assuming packages are missing.")
-        not_installed.extend(packages_to_check)
-
-    return not_installed
+        # unknown packages only produce a message on stderr and no line
+        command = ["dpkg-query", "-W", "-f=${Package} ${Status}\n", *packages_to_check]
+        result = run(command, stdout=PIPE, stderr=DEVNULL, text=True)
+        installed: Set[str] = set()
+        for line in result.stdout.splitlines():
+            name, _, status = line.partition(" ")
+            if "installed" in status.split():
+                installed.add(name)
+        # dpkg-query reports multiarch names without their ":arch" qualifier
+        return [p for p in packages_to_check if p.split(":")[0] not in installed]
+
+    if manager == PackageManager.APK:
+        # apk exits with the number of missing packages and prints the others
+        command = ["apk", "info", "-e", *packages_to_check]
+        result = run(command, stdout=PIPE, stderr=DEVNULL, text=True)
+        if result.returncode == 0:
+            return []
+        installed = set(result.stdout.split())
+        return [p for p in packages_to_check if p not in installed]
+
+    Logger.print_warn("Unsupported package manager. Assuming packages are missing.")
+    return list(packages_to_check)
+
+
+def _run_with_sudo(command: List[str]) -> None:
+    """
+    Run a package manager command as root. The primed sudo session keeps
+    sudo from prompting while its credentials are cached |
+    :param command: the command to run, without sudo
+    :return: None
+    """
+    ensure_sudo_session()
+    run(["sudo", *command], stderr=PIPE, check=True, text=True)
 
 
 def install_system_packages(packages: List[str]) -> None:
@@ -576,20 +593,15 @@ def install_system_packages(packages: List[str]) -> None:
 
     try:
         if manager == PackageManager.APT:
-            ensure_sudo_session()
-            command = ["sudo", "apt-get", "install", "-y"] + packages_to_install
-            run(command, stderr=PIPE, check=True)
+            _run_with_sudo(["apt-get", "install", "-y", *packages_to_install])
         elif manager == PackageManager.APK:
-            ensure_sudo_session()
-            command = ["sudo", "apk", "add", "--no-cache"] + packages_to_install
-            run(command, stderr=PIPE, check=True, text=True)
+            _run_with_sudo(["apk", "add", "--no-cache", *packages_to_install])
         else:
             raise RuntimeError("Unsupported package manager")
 
         Logger.print_ok("Packages successfully installed.")
     except CalledProcessError as e:
-        stderr = e.stderr.decode() if isinstance(e.stderr, (bytes, bytearray)) else e.stderr
-        Logger.print_error(f"Error installing packages:\n{stderr}")
+        Logger.print_error(f"Error installing packages:\n{e.stderr}")
         raise
     except RuntimeError as e:
         Logger.print_error(str(e))
@@ -610,43 +622,49 @@ def upgrade_system_packages(packages: List[str]) -> None:
 
     try:
         if manager == PackageManager.APT:
-            ensure_sudo_session()
-            command = ["sudo", "apt-get", "upgrade", "-y"] + packages_to_upgrade
-            run(command, stderr=PIPE, check=True)
+            _run_with_sudo(["apt-get", "upgrade", "-y", *packages_to_upgrade])
         elif manager == PackageManager.APK:
-            ensure_sudo_session()
-            command = ["sudo", "apk", "upgrade"] + packages_to_upgrade
-            run(command, stderr=PIPE, check=True, text=True)
+            _run_with_sudo(["apk", "upgrade", *packages_to_upgrade])
         else:
             raise RuntimeError("Unsupported package manager")
 
         Logger.print_ok("Packages successfully upgraded.")
     except CalledProcessError as e:
-        stderr = e.stderr.decode() if isinstance(e.stderr, (bytes, bytearray)) else e.stderr
-        raise Exception(f"Error upgrading packages:\n{stderr}")
+        raise Exception(f"Error upgrading packages:\n{e.stderr}")
     except RuntimeError as e:
         raise Exception(str(e))
 
 
+_ipv4_addr: str | None = None
+
+
 # this feels hacky and not quite right, but for now it works
 # see: https://stackoverflow.com/questions/166506/finding-local-ip-addresses-using-pythons-stdlib
 def get_ipv4_addr() -> str:
     """
     Helper function that returns the IPv4 of the current machine
-    by opening a socket and sending a package to an arbitrary IP. |
+    by opening a socket and sending a package to an arbitrary IP.
+    The address is looked up once per session, the fallback is not cached
+    so an address is still found once the network comes up |
     :return: Local IPv4 of the current machine
     """
-    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    s.settimeout(0)
-    try:
-        # doesn't even have to be reachable
-        s.connect(("192.255.255.255", 1))
-        ipv4: str = str(s.getsockname()[0])
-        s.close()
-        return ipv4
-    except Exception:
-        s.close()
-        return "127.0.0.1"
+    global _ipv4_addr
+    if _ipv4_addr is not None:
+        return _ipv4_addr
+
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        s.settimeout(0)
+        try:
+            # doesn't even have to be reachable
+            s.connect(("192.255.255.255", 1))
+            _ipv4_addr = str(s.getsockname()[0])
+        except Exception:
+            return "127.0.0.1"
+
+    return _ipv4_addr
+
+
+_DOWNLOAD_CHUNK_SIZE = 1 << 20
 
 
 def download_file(url: str, target: Path, show_progress=True) -> None:
@@ -658,11 +676,27 @@ def download_file(url: str, target: Path, show_progress=True) -> None:
     :return: None
     """
     try:
-        if show_progress:
-            urllib.request.urlretrieve(url, target, download_progress)
-            sys.stdout.write("\n")
-        else:
-            urllib.request.urlretrieve(url, target)
+        with urllib.request.urlopen(url) as response, open(target, "wb") as file:
+            headers = response.headers
+            total = int(headers.get("Content-Length", 0))
+            if show_progress:
+                done = 0
+                while chunk := response.read(_DOWNLOAD_CHUNK_SIZE):
+                    file.write(chunk)
+                    done += len(chunk)
+                    download_progress(done, 1, total)
+                sys.stdout.write("\n")
+            else:
+                shutil.copyfileobj(response, file, _DOWNLOAD_CHUNK_SIZE)
+                done = file.tell()
+
+        if total and done < total:
+            # don't leave a truncated file behind for the caller to pick up
+            target.unlink(missing_ok=True)
+            raise urllib.error.ContentTooShortError(
+                f"retrieval incomplete: got only {done} out of {total} bytes",
+                (str(target), headers),
+            )
     except urllib.error.HTTPError as e:
         Logger.print_error(f"Download failed! HTTP error occured: {e}")
         raise
@@ -674,16 +708,26 @@ def download_file(url: str, target: Path, show_progress=True) -> None:
         raise
 
 
+_last_progress_update = 0.0
+
+
 def download_progress(block_num, block_size, total_size) -> None:
     """
-    Reporthook method for urllib.request.urlretrieve() method call in download_file() |
-    :param block_num:
-    :param block_size:
+    Print the progress bar of a running download in download_file() |
+    :param block_num: number of blocks downloaded so far
+    :param block_size: size of a block in bytes
     :param total_size: total filesize in bytes
     :return: None
     """
+    global _last_progress_update
+
     downloaded = block_num * block_size
     percent = 100 if downloaded >= total_size else downloaded / total_size * 100
+    now = time.monotonic()
+    if block_num and percent < 100 and now - _last_progress_update < 0.1:
+        return
+    _last_progress_update = now
+
     mb = 1024 * 1024
     progress = int(percent / 5)
     remaining = "-" * (20 - progress)
@@ -700,13 +744,13 @@ def set_nginx_permissions() -> None:
     This seems to have become necessary with Ubuntu 21+. |
     :return: None
     """
-    cmd = f"ls -ld {Path.home()} | cut -d' ' -f1"
-    homedir_perm = run(cmd, shell=True, stdout=PIPE, text=True)
-    permissions = homedir_perm.stdout
+    home = Path.home()
+    mode = home.stat().st_mode
+    required = stat.S_IXGRP | stat.S_IXOTH
 
-    if permissions.count("x") < 3:
+    if mode & required != required:
         Logger.print_status("Granting NGINX the required permissions ...")
-        run(["chmod", "og+x", Path.home()])
+        os.chmod(home, stat.S_IMODE(mode) | required)
         Logger.print_ok("Permissions granted.")
 
 
@@ -777,6 +821,11 @@ def cmd_sysctl_manage(action: SysCtlManageAction) -> None:
         raise RuntimeError("Unsupported init system. Unable to manage services.")
 
 
+@lru_cache(maxsize=128)
+def _unit_pattern(name: str, suffix: str) -> re.Pattern[str]:
+    return re.compile(rf"^{re.escape(name)}(-[0-9a-zA-Z]+)?\.{suffix}$")
+
+
 def unit_file_exists(
     name: str, suffix: Literal["service", "timer"], exclude: List[str] | None = None
 ) -> bool:
@@ -788,17 +837,18 @@ def unit_file_exists(
     :return: True if the unit file exists, False otherwise
     """
     exclude = exclude or []
-    pattern = re.compile(f"^{name}(-[0-9a-zA-Z]+)?.{suffix}$")
-    service_dir = get_service_directory()
-    if not service_dir.exists():
-        return False
-
-    service_list = [
-        Path(service_dir, service)
-        for service in service_dir.iterdir()
-        if pattern.search(service.name) and not any(s in service.name for s in exclude)
-    ]
-    return any(service_list)
+    pattern = _unit_pattern(name, suffix)
+    try:
+        with os.scandir(get_service_directory()) as entries:
+            for entry in entries:
+                unit = entry.name
+                if not unit.startswith(name) or not pattern.match(unit):
+                    continue
+                if not any(s in unit for s in exclude):
+                    return True
+    except FileNotFoundError:
+        pass
+    return False
 
 
 def log_process(process: Popen) -> None:
@@ -807,20 +857,11 @@ def log_process(process: Popen) -> None:
     :param process: Process to log the output from
     :return: None
     """
-    while True:
-        if process.stdout is not None:
-            reads = [process.stdout.fileno()]
-            ret = select.select(reads, [], [])
-            for fd in ret[0]:
-                if fd == process.stdout.fileno():
-                    line = process.stdout.readline()
-                    if line:
-                        print(line.strip(), flush=True)
-                    else:
-                        break
+    if process.stdout is not None:
+        for line in process.stdout:
+            print(line.strip(), flush=True)
 
-        if process.poll() is not None:
-            break
+    process.wait()
 
 
 def create_service_file(name: str, content: str) -> None:
@@ -843,6 +884,7 @@ def create_service_file(name: str, content: str) -> None:
         if get_init_system() == InitSystem.OPENRC:
             ensure_sudo_session()
             run(["sudo", "chmod", "+x", target_path], check=True)
+        invalidate_instances_cache()
         Logger.print_ok(f"Service file created: {target_path}")
     except CalledProcessError as e:
         Logger.print_error(f"Error creating service file: {e}")
@@ -857,8 +899,7 @@ def create_env_file(path: Path, content: str) -> None:
     :return: None
     """
     try:
-        with open(path, "w") as env_file:
-            env_file.write(content)
+        write_text_file(path, content)
         Logger.print_ok(f"Env file created: {path}")
     except OSError as e:
         Logger.print_error(f"Error creating env file: {e}")
@@ -896,6 +937,7 @@ def remove_system_service(service_name: str) -> None:
         cmd_sysctl_service(normalized_name, "stop")
         cmd_sysctl_service(normalized_name, "disable")
         remove_with_sudo(file)
+        invalidate_instances_cache()
         cmd_sysctl_manage("daemon-reload")
         cmd_sysctl_manage("reset-failed")
         Logger.print_ok(f"{normalized_name} successfully removed!")
@@ -921,25 +963,16 @@ def get_service_file_path(instance_type: type, suffix: str) -> Path:
 
 
 def get_distro_info() -> Tuple[str, str]:
-    distro_info: str = check_output(["cat", "/etc/os-release"]).decode().strip()
+    os_release = _read_os_release()
 
-    if not distro_info:
+    if not os_release:
         raise ValueError("Error reading distro info!")
 
-    distro_id: str = ""
-    distro_id_like: str = ""
-    distro_version: str = ""
-
-    for line in distro_info.split("\n"):
-        if line.startswith("ID="):
-            distro_id = line.split("=")[1].strip('"').strip()
-        if line.startswith("ID_LIKE="):
-            distro_id_like = line.split("=")[1].strip('"').strip()
-        if line.startswith("VERSION_ID="):
-            distro_version = line.split("=")[1].strip('"').strip()
+    distro_id = os_release.get("ID", "")
+    distro_version = os_release.get("VERSION_ID", "")
 
     if distro_id == "raspbian":
-        distro_id = distro_id_like
+        distro_id = os_release.get("ID_LIKE", "")
 
     if not distro_id:
         raise ValueError("Error reading distro id!")
@@ -950,30 +983,27 @@ def get_distro_info() -> Tuple[str, str]:
 
 
 def get_system_timezone() -> str:
-    timezone = "UTC"
     try:
         with open("/etc/timezone", "r") as f:
-            timezone = f.read().strip()
+            return f.read().strip()
     except FileNotFoundError:
-        # fallback to reading timezone from timedatectl
-        try:
-            result = run(
-                ["timedatectl", "show", "--property=Timezone"],
-                capture_output=True,
-                text=True,
-                check=True,
-            )
-            timezone = result.stdout.strip().split("=")[1]
-        except CalledProcessError:
-            # fallback if timedatectl fails, try reading from readlink
-            try:
-                result = run(
-                    ["readlink", "-f", "/etc/localtime"],
-                    capture_output=True,
-                    text=True,
-                    check=True,
-                )
-                timezone = result.stdout.strip().split("zoneinfo/")[1]
-            except (CalledProcessError, IndexError):
-                Logger.print_warn("Could not determine system timezone, using UTC")
-    return timezone
+        pass
+
+    # /etc/localtime links into the zoneinfo database, e.g.
+    # ../usr/share/zoneinfo/Europe/Berlin, resolve it without spawning readlink
+    _, sep, timezone = os.path.realpath("/etc/localtime").partition("zoneinfo/")
+    if sep and timezone:
+        return timezone
+
+    # fallback to asking timedatectl if /etc/localtime is no symlink
+    try:
+        result = run(
+            ["timedatectl", "show", "--property=Timezone"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return result.stdout.strip().split("=")[1]
+    except (CalledProcessError, FileNotFoundError, IndexError):
+        Logger.print_warn("Could not determine system timezone, using UTC")
+    return "UTC"